@@ -1,28 +1,28 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import librosa
-import librosa.display
-import sounddevice as sd
-import soundfile as sf
-from scipy import signal
-import os
-from datetime import datetime
-import IPython.display as ipd
+# 绘图、录音和播放相关的库较重，且服务器上可能缺少 PortAudio，用到时才导入
+from lazy_imports import is_headless, pyplot, librosa_display, sounddevice, display_audio
+from feature_extraction import (frame_signal, frame_and_window, get_window, preemphasis,
+                                get_feature_plan, resolve_dtype, compute_mfcc,
+                                SpectralAnalysis, StreamingMFCCExtractor)
 
 class VoicePreprocessing:
-    def __init__(self, sample_rate=22050):
+    def __init__(self, sample_rate=22050, feature_cache=None, dtype=None, backend='numpy'):
         self.sample_rate = sample_rate
         self.audio_data = None
         self.preprocessed_data = None
         self.mfcc_features = None
+        self.feature_cache = feature_cache  # 可选的特征磁盘缓存（FeatureCache）
+        self.dtype = resolve_dtype(dtype)  # 前端各环节统一使用的数据类型（默认float32）
+        self.backend = backend  # MFCC计算后端：'numpy'（默认，无需librosa）或 'librosa'
         
     def record_audio(self, duration=3, sample_rate=22050):
         """录制音频"""
+        sd = sounddevice()
         print(f"开始录音，请说话... ({duration}秒)")
         self.sample_rate = sample_rate
         self.audio_data = sd.rec(int(duration * sample_rate), 
                                 samplerate=sample_rate, 
-                                channels=1)
+                                channels=1, dtype=self.dtype.name)
         sd.wait()  # 等待录音完成
         self.audio_data = self.audio_data.flatten()
         print("录音完成!")
@@ -31,59 +31,123 @@ class VoicePreprocessing:
     def load_example_audio(self):
         """加载示例音频（使用librosa自带的示例）"""
         try:
+            import librosa
+            
             # 使用librosa自带的示例音频
             file_path = librosa.example('trumpet')
-            self.audio_data, self.sample_rate = librosa.load(file_path, sr=self.sample_rate)
+            self.audio_data, self.sample_rate = librosa.load(file_path, sr=self.sample_rate,
+                                                             dtype=self.dtype)
             print(f"加载示例音频成功，长度: {len(self.audio_data)/self.sample_rate:.2f}秒")
             return self.audio_data
         except:
             # 如果无法加载示例，生成一个简单的测试音频
             print("无法加载示例音频，生成测试音频...")
-            t = np.linspace(0, 3, 3 * self.sample_rate)
+            t = np.linspace(0, 3, 3 * self.sample_rate, dtype=self.dtype)
             # 生成包含多个频率的测试信号
             self.audio_data = 0.5 * np.sin(2 * np.pi * 440 * t) + 0.3 * np.sin(2 * np.pi * 880 * t)
-            self.audio_data = self.audio_data.astype(np.float32)
             return self.audio_data
     
-    def preemphasis(self, signal, alpha=0.97):
+    def preemphasis(self, signal, alpha=0.97, out=None):
         """预加重滤波"""
-        return np.append(signal[0], signal[1:] - alpha * signal[:-1])
+        return preemphasis(signal, alpha, out=out, dtype=self.dtype)
     
-    def framing(self, signal, frame_length=0.025, frame_step=0.01):
-        """分帧处理"""
+    def framing(self, signal, frame_length=0.025, frame_step=0.01, pad_mode=None):
+        """分帧处理（返回只读的跨步视图，不复制数据）"""
         frame_length = int(frame_length * self.sample_rate)
         frame_step = int(frame_step * self.sample_rate)
+        signal = np.asarray(signal, dtype=self.dtype)
         
-        signal_length = len(signal)
-        frames = []
-        
-        for i in range(0, signal_length - frame_length, frame_step):
-            frames.append(signal[i:i+frame_length])
+        return frame_signal(signal, frame_length, frame_step, pad_mode)
+    
+    def framing_windowed(self, signal, frame_length=0.025, frame_step=0.01,
+                         window_type='hamming', pad_mode=None, out=None):
+        """分帧并加窗，结果直接写入预分配的输出数组"""
+        frame_length = int(frame_length * self.sample_rate)
+        frame_step = int(frame_step * self.sample_rate)
+        window = get_window(window_type, frame_length, self.dtype)
+        signal = np.asarray(signal, dtype=self.dtype)
         
-        return np.array(frames)
+        return frame_and_window(signal, frame_length, frame_step, window,
+                                out=out, pad_mode=pad_mode)
     
-    def apply_window(self, frames, window_type='hamming'):
+    def apply_window(self, frames, window_type='hamming', out=None):
         """应用窗函数"""
         frame_length = frames.shape[1]
+        window = get_window(window_type, frame_length, self.dtype)
+        frames = np.asarray(frames, dtype=self.dtype)
         
-        if window_type == 'hamming':
-            window = np.hamming(frame_length)
-        elif window_type == 'hann':
-            window = np.hann(frame_length)
-        else:  # rectangular
-            window = np.ones(frame_length)
-        
-        return frames * window
+        return np.multiply(frames, window, out=out)
     
-    def extract_mfcc(self, audio, n_mfcc=13, n_fft=2048, hop_length=512):
-        """提取MFCC特征"""
-        mfccs = librosa.feature.mfcc(y=audio, sr=self.sample_rate, 
-                                   n_mfcc=n_mfcc, n_fft=n_fft, 
-                                   hop_length=hop_length)
+    def extract_mfcc(self, audio, n_mfcc=13, n_fft=2048, hop_length=512, out=None):
+        """提取MFCC特征（out 为可选的预分配数组，形状 (n_mfcc, 帧数)）"""
+        # numpy 后端复用缓存的滤波器组、窗函数和DCT矩阵，结果与 librosa.feature.mfcc 一致
+        def compute(out=None):
+            return compute_mfcc(audio, self.sample_rate, n_mfcc, n_fft, hop_length,
+                                backend=self.backend, dtype=self.dtype, out=out)
+        
+        if self.feature_cache is not None:
+            config = {'sr': self.sample_rate, 'n_mfcc': n_mfcc, 'n_fft': n_fft,
+                      'hop_length': hop_length, 'preemphasis': None,
+                      'dtype': self.dtype.name, 'backend': self.backend}
+            mfccs = self.feature_cache.get_or_compute(audio, config, compute)
+            if out is not None:
+                out[...] = mfccs.T
+                return out
+            return mfccs.T
+        mfccs = compute(out=None if out is None else out.T).T
         return mfccs
     
+    def extract_mfcc_batch(self, audios, n_mfcc=13, n_fft=2048, hop_length=512):
+        """批量提取多段音频的MFCC特征，返回 (特征列表, 帧数数组)"""
+        if self.backend != 'numpy':
+            mfccs_list = [self.extract_mfcc(audio, n_mfcc, n_fft, hop_length) for audio in audios]
+            return mfccs_list, np.array([mfccs.shape[1] for mfccs in mfccs_list], dtype=np.int64)
+        plan = get_feature_plan(self.sample_rate, n_fft, hop_length, n_mfcc=n_mfcc,
+                                dtype=self.dtype)
+        mfccs_list, lengths = plan.mfcc_batch(audios)
+        return [mfccs.T for mfccs in mfccs_list], lengths
+    
+    def create_streaming_extractor(self, n_mfcc=13, **kwargs):
+        """创建流式MFCC提取器（分帧、加窗、梅尔参数与 extract_mfcc 一致）"""
+        kwargs.setdefault('dtype', self.dtype)
+        return StreamingMFCCExtractor(sample_rate=self.sample_rate, n_mfcc=n_mfcc, **kwargs)
+    
+    def stream_mfcc(self, duration=3, block_size=1024, on_features=None):
+        """边录音边提取MFCC，每凑满新帧就交给 on_features 回调"""
+        sd = sounddevice()
+        extractor = self.create_streaming_extractor()
+        blocks = []
+        features = []
+        
+        print(f"开始流式录音，请说话... ({duration}秒)")
+        with sd.InputStream(samplerate=self.sample_rate, channels=1,
+                            blocksize=block_size, dtype=self.dtype.name) as stream:
+            for _ in range(int(np.ceil(duration * self.sample_rate / block_size))):
+                block, _ = stream.read(block_size)
+                blocks.append(block[:, 0].copy())
+                new_features = extractor.process(block)
+                if len(new_features):
+                    features.append(new_features)
+                    if on_features is not None:
+                        on_features(new_features)
+        # 录音结束，右侧补零取出最后几帧
+        new_features = extractor.flush()
+        if len(new_features):
+            features.append(new_features)
+            if on_features is not None:
+                on_features(new_features)
+        print("录音完成!")
+        
+        self.audio_data = np.concatenate(blocks)
+        if not features:
+            return np.empty((0, extractor.n_mfcc), dtype=self.dtype)
+        return np.vstack(features)
+    
     def plot_waveform(self, audio, title="音频波形"):
         """绘制音频波形图"""
+        if is_headless():
+            return
+        plt = pyplot()
         plt.figure(figsize=(12, 4))
         # 简化字体设置，避免中文显示问题
         plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
@@ -96,14 +160,23 @@ class VoicePreprocessing:
         plt.tight_layout()
         plt.show()
     
-    def plot_spectrogram(self, audio, title="频谱图"):
+    def analyze(self, audio):
+        """创建频谱分析对象（只做一次STFT，各种频谱结果按需计算并缓存）"""
+        return SpectralAnalysis(audio, self.sample_rate, dtype=self.dtype)
+    
+    def plot_spectrogram(self, audio, title="频谱图", analysis=None):
         """绘制频谱图"""
+        if is_headless():
+            return
+        plt, specshow = pyplot(), librosa_display().specshow
+        if analysis is None:
+            analysis = self.analyze(audio)
         plt.figure(figsize=(12, 4))
         # 简化字体设置，避免中文显示问题
         plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
         plt.rcParams['axes.unicode_minus'] = False
-        D = librosa.amplitude_to_db(np.abs(librosa.stft(audio)), ref=np.max)
-        librosa.display.specshow(D, sr=self.sample_rate, x_axis='time', y_axis='hz')
+        D = analysis.db
+        specshow(D, sr=self.sample_rate, x_axis='time', y_axis='hz')
         plt.colorbar(format='%+2.0f dB')
         plt.title(title)
         plt.tight_layout()
@@ -111,17 +184,20 @@ class VoicePreprocessing:
     
     def plot_mfcc(self, mfccs, title="MFCC特征"):
         """绘制MFCC特征图"""
+        if is_headless():
+            return
+        plt, specshow = pyplot(), librosa_display().specshow
         plt.figure(figsize=(12, 4))
         # 简化字体设置，避免中文显示问题
         plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
         plt.rcParams['axes.unicode_minus'] = False
-        librosa.display.specshow(mfccs, sr=self.sample_rate, x_axis='time')
+        specshow(mfccs, sr=self.sample_rate, x_axis='time')
         plt.colorbar()
         plt.title(title)
         plt.tight_layout()
         plt.show()
     
-    def compare_preemphasis(self):
+    def compare_preemphasis(self, analysis=None):
         """比较预加重前后的效果"""
         if self.audio_data is None:
             print("请先加载或录制音频!")
@@ -129,8 +205,17 @@ class VoicePreprocessing:
         
         # 应用预加重
         audio_pre = self.preemphasis(self.audio_data)
+        self.preprocessed_data = audio_pre
+        
+        # 原始音频的分析结果可由调用方传入复用，预加重后的结果保存下来供后续步骤使用
+        if analysis is None:
+            analysis = self.analyze(self.audio_data)
+        self.preprocessed_analysis = self.analyze(audio_pre)
+        if is_headless():
+            return audio_pre
         
         # 绘制对比图
+        plt, specshow = pyplot(), librosa_display().specshow
         plt.figure(figsize=(15, 10))
         # 简化字体设置，避免中文显示问题
         plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
@@ -151,22 +236,22 @@ class VoicePreprocessing:
         
         # 原始音频频谱
         plt.subplot(3, 2, 3)
-        D_orig = librosa.amplitude_to_db(np.abs(librosa.stft(self.audio_data)), ref=np.max)
-        librosa.display.specshow(D_orig, sr=self.sample_rate, x_axis='time', y_axis='hz')
+        D_orig = analysis.db
+        specshow(D_orig, sr=self.sample_rate, x_axis='time', y_axis='hz')
         plt.colorbar(format='%+2.0f dB')
         plt.title("原始音频频谱")
         
         # 预加重后频谱
         plt.subplot(3, 2, 4)
-        D_pre = librosa.amplitude_to_db(np.abs(librosa.stft(audio_pre)), ref=np.max)
-        librosa.display.specshow(D_pre, sr=self.sample_rate, x_axis='time', y_axis='hz')
+        D_pre = self.preprocessed_analysis.db
+        specshow(D_pre, sr=self.sample_rate, x_axis='time', y_axis='hz')
         plt.colorbar(format='%+2.0f dB')
         plt.title("预加重后频谱")
         
         # 频谱对比（高频区域）
         plt.subplot(3, 2, 5)
-        f, Pxx_orig = signal.welch(self.audio_data, self.sample_rate, nperseg=1024)
-        f, Pxx_pre = signal.welch(audio_pre, self.sample_rate, nperseg=1024)
+        f, Pxx_orig = analysis.psd
+        f, Pxx_pre = self.preprocessed_analysis.psd
         plt.semilogy(f, Pxx_orig, label='原始')
         plt.semilogy(f, Pxx_pre, label='预加重')
         plt.xlim(0, 5000)  # 聚焦在0-5kHz范围
@@ -189,8 +274,11 @@ class VoicePreprocessing:
         
         # 应用汉明窗
         windowed_frames = self.apply_window(frames)
+        if is_headless():
+            return frames, windowed_frames
         
         # 绘制对比
+        plt, specshow = pyplot(), librosa_display().specshow
         plt.figure(figsize=(15, 6))
         # 简化字体设置，避免中文显示问题
         plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
@@ -211,14 +299,14 @@ class VoicePreprocessing:
         
         # 频谱对比
         plt.subplot(2, 2, 3)
-        D_frame = librosa.amplitude_to_db(np.abs(librosa.stft(frames[10])), ref=np.max)
-        librosa.display.specshow(D_frame, sr=self.sample_rate)
+        D_frame = self.analyze(frames[10]).db
+        specshow(D_frame, sr=self.sample_rate)
         plt.colorbar(format='%+2.0f dB')
         plt.title("原始帧频谱")
         
         plt.subplot(2, 2, 4)
-        D_windowed = librosa.amplitude_to_db(np.abs(librosa.stft(windowed_frames[10])), ref=np.max)
-        librosa.display.specshow(D_windowed, sr=self.sample_rate)
+        D_windowed = self.analyze(windowed_frames[10]).db
+        specshow(D_windowed, sr=self.sample_rate)
         plt.colorbar(format='%+2.0f dB')
         plt.title("加窗后帧频谱")
         
@@ -237,20 +325,26 @@ class VoicePreprocessing:
             self.load_example_audio()
         
         print("=== 播放原始音频 ===")
-        ipd.display(ipd.Audio(self.audio_data, rate=self.sample_rate))
+        display_audio(self.audio_data, self.sample_rate)
         
         print("=== 绘制原始音频波形和频谱 ===")
+        analysis = self.analyze(self.audio_data)
         self.plot_waveform(self.audio_data, "原始音频波形")
-        self.plot_spectrogram(self.audio_data, "原始音频频谱")
+        self.plot_spectrogram(self.audio_data, "原始音频频谱", analysis=analysis)
         
         print("=== 预加重处理 ===")
-        audio_pre = self.compare_preemphasis()
+        audio_pre = self.compare_preemphasis(analysis=analysis)
         
         print("=== 分帧和加窗演示 ===")
         frames, windowed_frames = self.demonstrate_framing_window(audio_pre)
         
         print("=== 提取MFCC特征 ===")
-        self.mfcc_features = self.extract_mfcc(audio_pre)
+        # 默认配置下直接由预加重对比时已算好的STFT得到MFCC；
+        # 指定了其他后端或特征缓存时仍走 extract_mfcc，以便使用对应后端并读写缓存
+        if self.backend == 'numpy' and self.feature_cache is None:
+            self.mfcc_features = self.preprocessed_analysis.mfcc
+        else:
+            self.mfcc_features = self.extract_mfcc(audio_pre)
         print(f"MFCC特征形状: {self.mfcc_features.shape}")
         
         print("=== 显示MFCC特征 ===")
@@ -273,19 +367,22 @@ def compare_different_voices():
     print("请录制第二段语音（例如说'咿'）")
     vp2.record_audio(duration=2)
     mfcc2 = vp2.extract_mfcc(vp2.audio_data)
+    if is_headless():
+        return
     
     # 绘制对比
+    plt, specshow = pyplot(), librosa_display().specshow
     plt.figure(figsize=(15, 6))
     # 简化字体设置，避免中文显示问题
     plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
     plt.rcParams['axes.unicode_minus'] = False
     plt.subplot(1, 2, 1)
-    librosa.display.specshow(mfcc1, sr=vp1.sample_rate, x_axis='time')
+    specshow(mfcc1, sr=vp1.sample_rate, x_axis='time')
     plt.colorbar()
     plt.title("第一段语音的MFCC ('啊')")
     
     plt.subplot(1, 2, 2)
-    librosa.display.specshow(mfcc2, sr=vp2.sample_rate, x_axis='time')
+    specshow(mfcc2, sr=vp2.sample_rate, x_axis='time')
     plt.colorbar()
     plt.title("第二段语音的MFCC ('咿')")
     
@@ -294,9 +391,9 @@ def compare_different_voices():
     
     # 播放两段音频用于对比
     print("播放第一段音频:")
-    ipd.display(ipd.Audio(vp1.audio_data, rate=vp1.sample_rate))
+    display_audio(vp1.audio_data, vp1.sample_rate)
     print("播放第二段音频:")
-    ipd.display(ipd.Audio(vp2.audio_data, rate=vp2.sample_rate))
+    display_audio(vp2.audio_data, vp2.sample_rate)
 
 # 实时环境噪声分析
 def analyze_environment_noise():
@@ -308,36 +405,39 @@ def analyze_environment_noise():
     
     print("录制3秒带语音的音频（请在安静后说话）...")
     speech = vp.record_audio(duration=3)
+    if is_headless():
+        return
     
     # 分析噪声和语音的频谱差异
+    plt, specshow = pyplot(), librosa_display().specshow
     plt.figure(figsize=(15, 8))
     # 简化字体设置，避免中文显示问题
     plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
     plt.rcParams['axes.unicode_minus'] = False
     # 噪声频谱
     plt.subplot(2, 2, 1)
-    D_noise = librosa.amplitude_to_db(np.abs(librosa.stft(noise)), ref=np.max)
-    librosa.display.specshow(D_noise, sr=vp.sample_rate, x_axis='time', y_axis='hz')
+    D_noise = vp.analyze(noise).db
+    specshow(D_noise, sr=vp.sample_rate, x_axis='time', y_axis='hz')
     plt.colorbar(format='%+2.0f dB')
     plt.title("环境噪声频谱")
     
     # 语音频谱
     plt.subplot(2, 2, 2)
-    D_speech = librosa.amplitude_to_db(np.abs(librosa.stft(speech)), ref=np.max)
-    librosa.display.specshow(D_speech, sr=vp.sample_rate, x_axis='time', y_axis='hz')
+    D_speech = vp.analyze(speech).db
+    specshow(D_speech, sr=vp.sample_rate, x_axis='time', y_axis='hz')
     plt.colorbar(format='%+2.0f dB')
     plt.title("带噪语言频谱")
     
     # MFCC对比
     plt.subplot(2, 2, 3)
     mfcc_noise = vp.extract_mfcc(noise)
-    librosa.display.specshow(mfcc_noise, sr=vp.sample_rate, x_axis='time')
+    specshow(mfcc_noise, sr=vp.sample_rate, x_axis='time')
     plt.colorbar()
     plt.title("噪声MFCC")
     
     plt.subplot(2, 2, 4)
     mfcc_speech = vp.extract_mfcc(speech)
-    librosa.display.specshow(mfcc_speech, sr=vp.sample_rate, x_axis='time')
+    specshow(mfcc_speech, sr=vp.sample_rate, x_axis='time')
     plt.colorbar()
     plt.title("带噪语音MFCC")
     
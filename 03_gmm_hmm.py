@@ -1,101 +1,531 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import librosa
-import librosa.display
-import sounddevice as sd
-import soundfile as sf
-from scipy import signal
 import os
-from datetime import datetime
-import IPython.display as ipd
-from hmmlearn import hmm
-from sklearn.mixture import GaussianMixture
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 import pickle
-import urllib.request
-import zipfile
+import time
 import warnings
+import zlib
+from feature_extraction import (get_feature_plan, preemphasis, resolve_dtype, compute_mfcc,
+                                add_deltas, StreamingDeltas, OnlineCMVN,
+                                StreamingMFCCExtractor)
+from feature_cache import FeatureCache
+from feature_store import FeatureStore
+from synthetic_corpus import SyntheticCorpus
+from acoustic_scoring import (StackedHMMScorer, StackedGMMScorer, ShortlistScorer,
+                              evaluate_shortlist, select_candidates, stack_gmms,
+                              gmms_from_arrays)
+from dataset_manifest import DatasetManifest
+from decoder import PhoneLoopDecoder
+from model_format import save_arrays, load_arrays, is_model_file, MODEL_EXTENSION
+# 绘图、录音、播放以及 hmmlearn/sklearn 等较重的库都在用到时才导入
+from audio_loading import load_audio, iter_load_audio
+from lazy_imports import is_headless, pyplot, librosa_display, sounddevice, display_audio
 warnings.filterwarnings('ignore')
 
+def load_audio_file(filepath, sr=22050):
+    """加载音频文件并转为单声道，采样率不同时才重采样"""
+    return load_audio(filepath, sample_rate=sr)
+
+def _phoneme_seed(random_state, phoneme):
+    """由基础种子和音素名得到确定的随机种子，与训练顺序和进程无关"""
+    if random_state is None:
+        return None
+    return zlib.crc32(f'{random_state}:{phoneme}'.encode())
+
+def _train_phoneme_worker(model, phoneme, features_combined, lengths, seed, blas_threads):
+    """进程池中训练一个音素，限制BLAS线程数以免多个进程争抢CPU"""
+    from threadpoolctl import threadpool_limits
+    with threadpool_limits(limits=blas_threads):
+        return phoneme, model._train_phoneme(features_combined, lengths, seed)
+
+def _train_store_phoneme_worker(model, phoneme, store_path, seed, blas_threads):
+    """进程池中训练特征存储里的一个音素，特征由子进程直接内存映射"""
+    from threadpoolctl import threadpool_limits
+    features_combined, lengths = FeatureStore(store_path).phoneme_slice(phoneme)
+    with threadpool_limits(limits=blas_threads):
+        return phoneme, model._train_phoneme(features_combined, lengths, seed)
+
+def _map_means(means, posteriors, features, relevance):
+    """
+    MAP 均值更新：posteriors 为 (帧数, 分量数) 的后验，
+    新均值 = (后验加权和 + r * 原均值) / (后验帧数 + r)
+    """
+    counts = posteriors.sum(axis=0)
+    weighted_sum = posteriors.T @ features
+    return (weighted_sum + relevance * means) / (counts + relevance)[:, None]
+
+class _TrainingMonitor:
+    """
+    HMM训练的收敛监视器（替换 hmmlearn 模型的 monitor_）
+    对数似然的相对变化小于 tol、迭代满 n_iter 次或用时超过 time_budget 秒时停止，
+    并记录每次迭代的对数似然
+    """
+    
+    def __init__(self, tol, n_iter, time_budget=None):
+        self.tol = tol
+        self.n_iter = n_iter
+        self.time_budget = time_budget
+        self.verbose = False
+        self._reset()
+    
+    def _reset(self):
+        self.iter = 0
+        self.history = []
+        self.stop_reason = None
+        self._start = time.perf_counter()
+    
+    def report(self, log_prob):
+        self.history.append(float(log_prob))
+        self.iter += 1
+    
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._start
+    
+    @property
+    def converged(self):
+        if len(self.history) >= 2:
+            previous, current = self.history[-2], self.history[-1]
+            if abs(current - previous) <= self.tol * abs(previous):
+                self.stop_reason = 'converged'
+        if self.stop_reason is None and self.iter >= self.n_iter:
+            self.stop_reason = 'max_iter'
+        if (self.stop_reason is None and self.time_budget is not None
+                and self.elapsed >= self.time_budget):
+            self.stop_reason = 'time_budget'
+        return self.stop_reason is not None
+
+def _uniform_state_labels(lengths, n_states):
+    """把每段语音平均切成 n_states 段，依次标为各状态"""
+    return np.concatenate([np.arange(n) * n_states // n for n in lengths])
+
+def _gmm_state_labels(gmm, features_combined, lengths):
+    """
+    用GMM的分量给每帧打标签，分量按其帧在语音中的平均相对位置排序，
+    使状态编号大致对应时间顺序；返回 (每帧的状态, 排好序的分量下标)
+    """
+    components = gmm.predict(features_combined)
+    positions = np.concatenate([np.arange(n) / max(n - 1, 1) for n in lengths])
+    counts = np.bincount(components, minlength=gmm.n_components)
+    mean_positions = (np.bincount(components, weights=positions, minlength=gmm.n_components)
+                      / np.maximum(counts, 1))
+    mean_positions[counts == 0] = 1.0
+    order = np.argsort(mean_positions, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[components], order
+
+def _hmm_transitions_from_labels(lengths, labels, n_states):
+    """由每帧的状态标签统计HMM的 (startprob, transmat)，计数加1平滑"""
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    startprob = np.bincount(labels[starts], minlength=n_states) + 1.0
+    # 语音内部相邻帧之间的状态转移
+    within = np.ones(len(labels) - 1, dtype=bool)
+    within[starts[1:] - 1] = False
+    pairs = labels[:-1][within] * n_states + labels[1:][within]
+    transmat = np.bincount(pairs, minlength=n_states ** 2).reshape(n_states, n_states) + 1.0
+    return startprob / startprob.sum(), transmat / transmat.sum(axis=1, keepdims=True)
+
+def _state_stats_from_labels(features_combined, labels, n_states, min_covar=1e-3,
+                             chunk_size=65536):
+    """
+    由每帧的状态标签统计各状态的 (means, covars)
+    按块转成 float64 累加一阶、二阶统计量，不复制整个特征矩阵（可能是特征存储的内存映射）
+    """
+    n_features = features_combined.shape[1]
+    counts = np.bincount(labels, minlength=n_states).astype(np.float64)
+    sums = np.zeros((n_states, n_features))
+    squares = np.zeros((n_states, n_features))
+    states = np.arange(n_states)[:, None]
+    for start in range(0, len(labels), chunk_size):
+        chunk = np.asarray(features_combined[start:start + chunk_size], dtype=np.float64)
+        onehot = (labels[start:start + chunk_size] == states).astype(np.float64)
+        sums += onehot @ chunk
+        squares += onehot @ (chunk * chunk)
+    # 没有分到帧的状态用全部数据的统计量
+    empty = counts == 0
+    counts[empty] = counts.sum()
+    sums[empty] = sums.sum(axis=0)
+    squares[empty] = squares.sum(axis=0)
+    means = sums / counts[:, None]
+    covars = np.maximum(squares / counts[:, None] - means ** 2, min_covar)
+    return means, covars
+
 class AcousticModel:
-    def __init__(self, n_components=3, n_mfcc=13):
+    def __init__(self, n_components=3, n_mfcc=13, feature_cache=None, dtype=None,
+                 backend='numpy', delta_order=0, delta_width=2,
+                 shortlist_top_k=None, shortlist_margin=None,
+                 hmm_init='gmm', hmm_tol=1e-4, hmm_max_iter=100, hmm_time_budget=None,
+                 cmvn_mode='global', cmvn_window=300):
         self.n_components = n_components  # HMM状态数
         self.n_mfcc = n_mfcc  # MFCC特征维度
+        self.delta_order = delta_order  # 差分阶数：0 只用静态MFCC，2 为静态+一阶+二阶差分
+        self.delta_width = delta_width  # 差分回归窗的半宽（帧）
         self.models = {}  # 存储每个音素的HMM模型
         self.gmms = {}  # 存储每个音素的GMM模型
-        self.scaler = StandardScaler()
+        # 增量式CMVN，逐段累积统计量，不需要把整个语料拼成一个数组；
+        # cmvn_mode 为 'utterance' 或 'sliding'（窗长 cmvn_window 帧）时按段或滑动窗归一化，
+        # 适合实时输入
+        self.cmvn_mode = cmvn_mode
+        self.cmvn_window = cmvn_window
+        self.scaler = OnlineCMVN(cmvn_mode, cmvn_window)
         self.is_trained = False
+        self._scorer = None  # 由 self.models 打包的批量打分器，模型变化后重建
+        self._gmm_scorer = None  # 由 self.gmms 打包的GMM打分器
+        # GMM预筛选：先用GMM挑出前 top_k 个（或与最高分相差不超过 margin 的）候选音素，
+        # 只对候选做HMM打分；都为 None 时对所有音素做HMM打分
+        self.shortlist_top_k = shortlist_top_k
+        self.shortlist_margin = shortlist_margin
+        self.feature_cache = feature_cache  # 可选的特征磁盘缓存（FeatureCache）
+        self.dtype = resolve_dtype(dtype)  # 特征提取使用的数据类型（默认float32）
+        self.backend = backend  # MFCC计算后端：'numpy'（默认，无需librosa）或 'librosa'
+        # HMM训练：初始化方式（'gmm' 用该音素GMM的分量，分量数与状态数不同时退回 'uniform'；
+        # 'uniform' 把每段语音平均分给各状态；'kmeans' 为 hmmlearn 默认的随机初始化），
+        # 对数似然相对变化小于 hmm_tol、迭代 hmm_max_iter 次或单个模型用时超过
+        # hmm_time_budget 秒时停止
+        self.hmm_init = hmm_init
+        self.hmm_tol = hmm_tol
+        self.hmm_max_iter = hmm_max_iter
+        self.hmm_time_budget = hmm_time_budget
+        # 每个音素HMM训练的过程：{音素: {'log_likelihood': 每次迭代的对数似然列表,
+        #                               'iterations', 'stop_reason', 'time'}}
+        self.training_curves = {}
         
-    def extract_features(self, audio, sr=22050):
-        """提取MFCC特征"""
+    def _feature_config(self, sr):
+        """特征提取配置，作为缓存键的一部分"""
+        return {'sr': sr, 'n_mfcc': self.n_mfcc, 'n_fft': 2048,
+                'hop_length': 512, 'preemphasis': 0.97, 'dtype': self.dtype.name,
+                'backend': self.backend}
+    
+    @property
+    def n_features(self):
+        """模型输入的特征维度（静态MFCC加各阶差分）"""
+        return self.n_mfcc * (self.delta_order + 1)
+    
+    def extract_features(self, audio, sr=22050, out=None):
+        """提取MFCC及差分特征（out 为可选的预分配数组，形状 (时间帧数, n_features)）"""
+        if self.feature_cache is not None:
+            # 缓存只保存静态MFCC，差分计算很快，不同差分配置可共用缓存
+            mfccs = self.feature_cache.get_or_compute(
+                audio, self._feature_config(sr),
+                lambda: self._compute_features(audio, sr))
+        elif self.delta_order == 0:
+            return self._compute_features(audio, sr, out=out)
+        else:
+            mfccs = self._compute_features(audio, sr)
+        return self.add_deltas(mfccs, out=out)
+    
+    def add_deltas(self, mfccs, out=None):
+        """在静态MFCC后拼接差分特征，直接写入一个预分配数组"""
+        if self.delta_order == 0 and out is None:
+            return mfccs
+        return add_deltas(mfccs, self.delta_order, self.delta_width, out=out)
+    
+    def create_streaming_extractor(self, sr=22050):
+        """创建流式MFCC提取器（预加重、分帧与 extract_features 一致），实时识别时逐块输入音频"""
+        return StreamingMFCCExtractor(sr, self.n_mfcc, 2048, 512, alpha=0.97, dtype=self.dtype)
+    
+    def create_streaming_deltas(self):
+        """创建流式差分计算器，实时识别时逐块输入MFCC帧"""
+        return StreamingDeltas(self.n_mfcc, self.delta_order, self.delta_width, self.dtype)
+    
+    def _compute_features(self, audio, sr, out=None):
         # 预加重
-        audio_pre = np.append(audio[0], audio[1:] - 0.97 * audio[:-1])
+        audio_pre = preemphasis(audio, 0.97, dtype=self.dtype)
+        
+        # 提取MFCC特征（numpy 后端复用缓存的计算方案，直接得到 (时间帧数, 特征维度)）
+        return compute_mfcc(audio_pre, sr, self.n_mfcc, 2048, 512,
+                            backend=self.backend, dtype=self.dtype, out=out)
+    
+    def extract_features_batch(self, audios, sr=22050, keys=None):
+        """批量提取多段音频的MFCC及差分特征，返回 (特征列表, 帧数数组)"""
+        mfccs_list, lengths = self.extract_mfcc_batch(audios, sr, keys)
+        return [self.add_deltas(mfccs) for mfccs in mfccs_list], lengths
+    
+    def extract_mfcc_batch(self, audios, sr=22050, keys=None):
+        """
+        批量提取多段音频的静态MFCC特征，返回 (特征列表, 帧数数组)
+        keys: 可选的缓存键列表（如 file_cache_key 的结果），默认由音频内容计算
+        """
+        features_list = [None] * len(audios)
+        if self.feature_cache is not None:
+            if keys is None:
+                config = self._feature_config(sr)
+                keys = [self.feature_cache.make_key(audio, config) for audio in audios]
+            for i, key in enumerate(keys):
+                features_list[i] = self.feature_cache.get(key)
+        
+        # 只对未命中缓存的音频做批量提取
+        missing = [i for i, features in enumerate(features_list) if features is None]
+        if missing and self.backend != 'numpy':
+            for i in missing:
+                features_list[i] = self._compute_features(audios[i], sr)
+                if self.feature_cache is not None:
+                    self.feature_cache.put(keys[i], features_list[i])
+        elif missing:
+            audios_pre = [preemphasis(audios[i], 0.97, dtype=self.dtype) for i in missing]
+            plan = get_feature_plan(sr, 2048, 512, n_mfcc=self.n_mfcc, dtype=self.dtype)
+            computed, _ = plan.mfcc_batch(audios_pre)
+            for i, features in zip(missing, computed):
+                features_list[i] = features
+                if self.feature_cache is not None:
+                    self.feature_cache.put(keys[i], features)
         
-        # 提取MFCC特征
-        mfccs = librosa.feature.mfcc(y=audio_pre, sr=sr, n_mfcc=self.n_mfcc, 
-                                   n_fft=2048, hop_length=512)
-        return mfccs.T  # 转置为 (时间帧数, 特征维度)
+        lengths = np.array([len(features) for features in features_list], dtype=np.int64)
+        return features_list, lengths
     
-    def train_gmm(self, features, n_mixtures=3):
+    def file_cache_key(self, content_hash, sr=22050):
+        """由音频文件内容哈希得到特征缓存键；没有缓存时返回 None"""
+        if self.feature_cache is None:
+            return None
+        return self.feature_cache.make_file_key(content_hash, self._feature_config(sr))
+    
+    def train_gmm(self, features, n_mixtures=3, random_state=None):
         """训练GMM模型"""
-        gmm = GaussianMixture(n_components=n_mixtures, covariance_type='diag')
+        from sklearn.mixture import GaussianMixture
+        gmm = GaussianMixture(n_components=n_mixtures, covariance_type='diag',
+                              random_state=random_state)
         gmm.fit(features)
         return gmm
     
-    def train_hmm(self, features_list, n_components=3):
-        """训练HMM模型"""
+    def train_hmm(self, features_list, n_components=3, random_state=42, gmm=None):
+        """训练HMM模型（gmm 为该音素已训练的GMM，用于初始化）"""
         # 计算所有特征序列的长度
         lengths = [len(features) for features in features_list]
         
         # 合并所有特征
         features_combined = np.vstack(features_list)
+        model, _ = self._fit_hmm(features_combined, lengths, n_components, random_state, gmm)
+        return model
+    
+    def _fit_hmm(self, features_combined, lengths, n_components=3, random_state=42, gmm=None):
+        """
+        在已合并的特征 (总帧数, 特征维度) 和各段长度上训练HMM
+        返回 (模型, 训练过程 {'log_likelihood', 'iterations', 'stop_reason', 'time'})
+        """
+        from hmmlearn import hmm
+        from hmmlearn.base import ConvergenceMonitor
+        lengths = np.asarray(lengths, dtype=np.int64)
+        init = self.hmm_init
+        if init == 'gmm' and (gmm is None or gmm.n_components != n_components
+                              or gmm.covariance_type != 'diag'):
+            init = 'uniform'
         
         # 创建并训练HMM模型
         model = hmm.GaussianHMM(
             n_components=n_components,
             covariance_type="diag",
-            n_iter=100,
-            random_state=42
+            n_iter=self.hmm_max_iter,
+            random_state=random_state,
+            init_params='stmc' if init == 'kmeans' else ''
         )
+        if init == 'gmm':
+            labels, order = _gmm_state_labels(gmm, features_combined, lengths)
+            # 均值、方差直接取GMM的分量，标签只用来统计初始和转移概率
+            startprob, transmat = _hmm_transitions_from_labels(lengths, labels, n_components)
+            means, covars = gmm.means_[order], np.maximum(gmm.covariances_[order],
+                                                         model.min_covar)
+        elif init == 'uniform':
+            labels = _uniform_state_labels(lengths, n_components)
+            startprob, transmat = _hmm_transitions_from_labels(lengths, labels, n_components)
+            means, covars = _state_stats_from_labels(features_combined, labels, n_components,
+                                                     model.min_covar)
+        elif init != 'kmeans':
+            raise ValueError(f"未知的HMM初始化方式: {init}")
+        if init != 'kmeans':
+            model.startprob_, model.transmat_ = startprob, transmat
+            model.means_, model.covars_ = means, covars
         
+        monitor = _TrainingMonitor(self.hmm_tol, self.hmm_max_iter, self.hmm_time_budget)
+        model.monitor_ = monitor
         model.fit(features_combined, lengths)
-        return model
+        
+        # 换回 hmmlearn 自带的监视器，保存的模型不依赖本模块
+        model.monitor_ = ConvergenceMonitor(model.tol, model.n_iter, False)
+        model.monitor_.iter = monitor.iter
+        model.monitor_.history.extend(monitor.history[-2:])
+        curve = {'log_likelihood': monitor.history, 'iterations': monitor.iter,
+                 'stop_reason': monitor.stop_reason, 'time': monitor.elapsed}
+        return model, curve
+    
+    def _train_phoneme(self, features_combined, lengths, seed):
+        """
+        训练一个音素的GMM和HMM，features_combined 为该音素所有语音标准化后的合并特征
+        返回 (GMM, HMM, HMM训练过程)
+        """
+        gmm = self.train_gmm(features_combined, random_state=seed)
+        hmm_model, curve = self._fit_hmm(features_combined, lengths, self.n_components,
+                                         random_state=seed, gmm=gmm)
+        return gmm, hmm_model, curve
+    
+    def _record_training(self, phoneme, gmm, hmm_model, curve):
+        """保存一个音素的训练结果并报告HMM训练过程"""
+        self.gmms[phoneme], self.models[phoneme] = gmm, hmm_model
+        self.training_curves[phoneme] = curve
+        log_likelihood = curve['log_likelihood'][-1] if curve['log_likelihood'] else float('nan')
+        reasons = {'converged': '已收敛', 'max_iter': '达到迭代上限', 'time_budget': '达到时间上限'}
+        print(f"音素 '{phoneme}' 的模型训练完成: {curve['iterations']} 次迭代, "
+              f"对数似然 {log_likelihood:.1f}, {reasons.get(curve['stop_reason'], '')}, "
+              f"用时 {curve['time']:.2f} 秒")
+    
+    def _normalize_phoneme(self, features_list):
+        """标准化一个音素的所有语音，直接写入一个合并数组，返回 (合并特征, 各段长度)"""
+        lengths = [len(features) for features in features_list]
+        features_combined = np.empty((sum(lengths), features_list[0].shape[1]),
+                                     dtype=features_list[0].dtype)
+        start = 0
+        for features, length in zip(features_list, lengths):
+            if isinstance(self.scaler, OnlineCMVN):
+                self.scaler.transform(features, out=features_combined[start:start + length])
+            else:
+                # 旧版 .pkl 模型的 StandardScaler 不支持 out 参数
+                features_combined[start:start + length] = self.scaler.transform(features)
+            start += length
+        return features_combined, lengths
     
-    def train_models(self, training_data):
-        """训练所有音素的GMM-HMM模型"""
+    def train_models(self, training_data, n_jobs=1, blas_threads=1, random_state=42):
+        """
+        训练所有音素的GMM-HMM模型
+        
+        training_data: {音素: 特征列表}，或 FeatureStore（各音素的特征直接以
+                       内存映射视图交给训练，不做拼接复制；以 writable=True 打开且尚未
+                       标准化的存储会被原地标准化）
+        n_jobs: 并行训练的进程数，1 为逐个音素训练，-1 为使用全部CPU核
+        blas_threads: 并行时每个进程允许的BLAS线程数，避免进程数×线程数超过核数
+        random_state: 基础随机种子，每个音素的种子由它和音素名确定，
+                      因此串行和并行训练的结果完全相同
+        """
         print("开始训练声学模型...")
         
-        # 收集所有特征用于标准化
-        all_features = []
-        for phoneme, features_list in training_data.items():
-            for features in features_list:
-                all_features.append(features)
+        # 旧版 .pkl 模型加载后 scaler 是 sklearn 的 StandardScaler，重新训练时换成增量式CMVN
+        if not isinstance(self.scaler, OnlineCMVN):
+            self.scaler = OnlineCMVN(self.cmvn_mode, self.cmvn_window)
         
-        # 标准化特征
-        all_features_combined = np.vstack(all_features)
-        self.scaler.fit(all_features_combined)
+        store = training_data if isinstance(training_data, FeatureStore) else None
+        if store is None:
+            # 一遍扫描累积所有语音的均值和方差
+            self.scaler.fit(features for features_list in training_data.values()
+                            for features in features_list)
+            phonemes = list(training_data)
+        else:
+            self._prepare_store(store)
+            phonemes = store.phonemes
         
-        # 为每个音素训练模型
-        for phoneme, features_list in training_data.items():
-            print(f"训练音素 '{phoneme}' 的模型...")
-            
-            # 标准化特征
-            normalized_features_list = []
-            for features in features_list:
-                normalized_features = self.scaler.transform(features)
-                normalized_features_list.append(normalized_features)
-            
-            # 训练GMM
-            features_combined = np.vstack(normalized_features_list)
-            self.gmms[phoneme] = self.train_gmm(features_combined)
-            
-            # 训练HMM
-            self.models[phoneme] = self.train_hmm(normalized_features_list)
+        def phoneme_data(phoneme):
+            if store is None:
+                return self._normalize_phoneme(training_data[phoneme])
+            if store.normalization is None:
+                return self._normalize_phoneme(store.utterances(phoneme))
+            return store.phoneme_slice(phoneme)
+        
+        if n_jobs is None or n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        n_jobs = min(n_jobs, len(phonemes))
+        
+        if n_jobs <= 1:
+            # 为每个音素训练模型
+            for phoneme in phonemes:
+                print(f"训练音素 '{phoneme}' 的模型...")
+                features_combined, lengths = phoneme_data(phoneme)
+                self._record_training(phoneme, *self._train_phoneme(
+                    features_combined, lengths, _phoneme_seed(random_state, phoneme)))
+        else:
+            from collections import deque
+            from concurrent.futures import ProcessPoolExecutor
+            print(f"使用 {n_jobs} 个进程并行训练 {len(phonemes)} 个音素...")
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                # 同时提交的任务不超过进程数，音素特征在提交前才标准化，
+                # 内存中只有正在训练的几个音素的特征矩阵；
+                # 按提交顺序收集结果，音素顺序（打分矩阵的列、模型文件布局）与串行训练一致
+                def collect(future):
+                    phoneme, result = future.result()
+                    self._record_training(phoneme, *result)
+                
+                pending = deque()
+                for phoneme in phonemes:
+                    if len(pending) >= n_jobs:
+                        collect(pending.popleft())
+                    if store is not None and store.normalization is not None:
+                        # 子进程自己映射存储文件，不经过进程间传递特征
+                        pending.append(executor.submit(
+                            _train_store_phoneme_worker, self, phoneme, store.path,
+                            _phoneme_seed(random_state, phoneme), blas_threads))
+                        continue
+                    features_combined, lengths = phoneme_data(phoneme)
+                    pending.append(executor.submit(
+                        _train_phoneme_worker, self, phoneme, features_combined, lengths,
+                        _phoneme_seed(random_state, phoneme), blas_threads))
+                    del features_combined, lengths
+                while pending:
+                    collect(pending.popleft())
         
+        self._scorer = None
+        self._gmm_scorer = None
         self.is_trained = True
         print("模型训练完成!")
     
+    def _prepare_store(self, store):
+        """
+        为特征存储准备标准化：已标准化的存储直接恢复当时的统计量；
+        可写的存储拟合统计量后原地标准化；只读的存储只拟合统计量，训练时逐音素标准化
+        """
+        if store.normalization is not None:
+            norm = store.normalization
+            self.scaler = OnlineCMVN.from_stats(norm['mean'], norm['var'], norm['n_samples'],
+                                                norm['mode'], norm['window'],
+                                                norm['norm_vars'])
+            return
+        self.scaler.fit(features for _, features in store.iter_utterances())
+        if store.writable:
+            store.normalize(self.scaler)
+    
+    def adapt(self, features_by_phoneme, relevance=16.0, adapt_weights=False):
+        """
+        用少量新数据对已训练的模型做MAP自适应（不重新训练）
+        
+        features_by_phoneme: {音素: [特征序列, ...]}，特征与 train_models 的输入相同（未标准化），
+                             标准化仍使用训练时的统计量
+        relevance: 相关因子 r，某个高斯分量累计的后验帧数为 n 时，
+                   新均值 = n/(n+r) * 新数据均值 + r/(n+r) * 原均值；数据越少越接近原模型
+        adapt_weights: 是否同时自适应GMM的混合权重（HMM每个状态只有一个高斯，没有权重）
+        
+        每次自适应都以当前模型为先验，因此可以随新数据不断重复调用。返回 {音素: 使用的帧数}
+        """
+        if not self.is_trained:
+            raise ValueError("模型尚未训练，请先调用train_models方法")
+        if not self.models:
+            raise ValueError("模型文件加载时未还原 hmmlearn/sklearn 对象，"
+                             "请使用 load_models(filepath, estimators=True)")
+        
+        used_frames = {}
+        for phoneme, features_list in features_by_phoneme.items():
+            if phoneme not in self.models or not features_list:
+                continue
+            features, lengths = self._normalize_phoneme(features_list)
+            features = features.astype(np.float64, copy=False)
+            
+            # HMM：由前向-后向算法得到每帧的状态后验，更新各状态均值
+            hmm_model = self.models[phoneme]
+            posteriors = hmm_model.predict_proba(features, lengths)
+            hmm_model.means_ = _map_means(hmm_model.means_, posteriors, features, relevance)
+            
+            # GMM：由分量后验更新均值（以及可选的混合权重）
+            gmm = self.gmms.get(phoneme)
+            if gmm is not None:
+                posteriors = gmm.predict_proba(features)
+                counts = posteriors.sum(axis=0)
+                gmm.means_ = _map_means(gmm.means_, posteriors, features, relevance)
+                if adapt_weights:
+                    alpha = counts / (counts + relevance)
+                    weights = alpha * counts / len(features) + (1 - alpha) * gmm.weights_
+                    gmm.weights_ = weights / weights.sum()
+            used_frames[phoneme] = len(features)
+        
+        # 参数已变化，打包的打分器需要重建
+        self._scorer = None
+        self._gmm_scorer = None
+        print(f"模型自适应完成: {', '.join(f'{p}({n}帧)' for p, n in used_frames.items())}")
+        return used_frames
+    
     def predict(self, audio, sr=22050):
         """使用训练好的模型进行预测"""
         if not self.is_trained:
@@ -106,20 +536,242 @@ class AcousticModel:
         features = self.scaler.transform(features)
         
         # 计算每个模型的分数
+        scores = self.score_features(features)
+        
+        # 返回分数最高的音素
+        best_phoneme = max(scores, key=scores.get)
+        return best_phoneme, scores
+    
+    def predict_batch(self, audios, sr=22050, n_workers=None, chunk_size=32):
+        """
+        批量预测多段音频
+        所有音频一起提取特征、一次性标准化，再按 chunk_size 段一组在线程池中打分
+        （每组的发射概率只需一次矩阵乘法，前向算法对组内各段同时进行）。
+        
+        返回与输入顺序一致的列表 [(最佳音素, {音素: 分数}, 耗时秒)]，
+        耗时为该段按帧数分摊的特征提取时间加上其所在组按帧数分摊的打分时间
+        """
+        if not self.is_trained:
+            raise ValueError("模型尚未训练，请先调用train_models方法")
+        from concurrent.futures import ThreadPoolExecutor
+        
+        start_time = time.perf_counter()
+        features_list, lengths = self.extract_features_batch(audios, sr)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        total_frames = int(offsets[-1])
+        
+        # 拼成一个数组后一次标准化（按段统计的CMVN仍逐段处理）
+        dtype = features_list[0].dtype if features_list else self.dtype
+        features = np.empty((total_frames, self.n_features), dtype=dtype)
+        for i, item in enumerate(features_list):
+            features[offsets[i]:offsets[i + 1]] = item
+        if not isinstance(self.scaler, OnlineCMVN):
+            features = self.scaler.transform(features)
+        elif self.scaler.mode == 'global':
+            self.scaler.transform(features, out=features)
+        else:
+            for i in range(len(features_list)):
+                segment = features[offsets[i]:offsets[i + 1]]
+                self.scaler.transform(segment, out=segment)
+        prepare_time = time.perf_counter() - start_time
+        
+        # 配置了GMM预筛选时各段的候选不同，逐段打分
+        scorer = None if self._get_shortlist_scorer() is not None else self._get_scorer()
+        phonemes = self.phonemes
+        
+        def score_chunk(start):
+            end = min(start + chunk_size, len(features_list))
+            chunk_start = time.perf_counter()
+            if scorer is not None:
+                chunk_scores = scorer.score_batch(features[offsets[start]:offsets[end]],
+                                                  lengths[start:end])
+                chunk_scores = [dict(zip(phonemes, row.tolist())) for row in chunk_scores]
+            else:
+                chunk_scores = [self.score_features(features[offsets[i]:offsets[i + 1]])
+                                for i in range(start, end)]
+            return chunk_scores, time.perf_counter() - chunk_start
+        
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            chunks = list(executor.map(score_chunk, range(0, len(features_list), chunk_size)))
+        
+        results = []
+        for chunk_index, (chunk_scores, chunk_time) in enumerate(chunks):
+            start = chunk_index * chunk_size
+            chunk_lengths = lengths[start:start + len(chunk_scores)]
+            chunk_frames = max(int(chunk_lengths.sum()), 1)
+            for scores, length in zip(chunk_scores, chunk_lengths):
+                elapsed = (prepare_time * length / max(total_frames, 1) +
+                           chunk_time * length / chunk_frames)
+                results.append((max(scores, key=scores.get), scores, elapsed))
+        return results
+    
+    def evaluate_shortlist(self, audios, labels=None, sr=22050, top_ks=(1, 2, 3, 5),
+                           margins=()):
+        """
+        评估GMM预筛选在不同 top_k / margin 下的准确率与加速比，打印并返回结果表
+        labels 为可选的真实音素列表，给出时同时报告识别准确率
+        """
+        scorer, gmm_scorer = self._get_scorer(), self._get_gmm_scorer()
+        if scorer is None or gmm_scorer is None:
+            raise ValueError("GMM预筛选需要对角协方差的GMM和HMM模型")
+        features_list = [self.scaler.transform(self.extract_features(audio, sr))
+                         for audio in audios]
+        rows = evaluate_shortlist(scorer, gmm_scorer, features_list, labels, top_ks, margins)
+        
+        print("GMM预筛选评估:")
+        for row in rows:
+            if row['top_k'] is None and row['margin'] is None:
+                setting = '完整HMM打分'
+            elif row['top_k'] is not None:
+                setting = f"top_k={row['top_k']}"
+            else:
+                setting = f"margin={row['margin']}"
+            line = (f"  {setting:<14} 平均候选数 {row['mean_candidates']:.1f}  "
+                    f"与完整打分一致 {row['agreement']:.1%}  加速 {row['speedup']:.2f}x")
+            if labels is not None:
+                line += f"  准确率 {row['accuracy']:.1%}"
+            print(line)
+        return rows
+    
+    def decode(self, audio, sr=22050, beam=60.0, max_active=500, insertion_penalty=10.0):
+        """
+        连续音素识别：在所有音素HMM构成的音素环上做束剪枝 Viterbi 解码
+        返回 [(音素, 起始时间秒, 结束时间秒)]
+        """
+        if not self.is_trained:
+            raise ValueError("模型尚未训练，请先调用train_models方法")
+        scorer = self._get_scorer()
+        if scorer is None:
+            raise ValueError("连续识别只支持对角协方差的高斯HMM")
+        
+        features = self.scaler.transform(self.extract_features(audio, sr))
+        decoder = PhoneLoopDecoder(scorer, beam, max_active, insertion_penalty)
+        segments, _ = decoder.decode(features)
+        
+        # 特征按 hop_length=512 居中分帧，第 t 帧覆盖 [t*hop, (t+1)*hop) 附近
+        hop = 512 / sr
+        return [(phoneme, start * hop, (end + 1) * hop) for phoneme, start, end in segments]
+    
+    def _get_scorer(self):
+        """所有音素HMM打包成的批量打分器，不支持的模型类型返回 None"""
+        # 从模型文件加载且未还原 hmmlearn 对象时 self.models 为空，直接使用加载的打分器
+        if self.models and (self._scorer is None or
+                            self._scorer.phonemes != list(self.models)):
+            try:
+                self._scorer = StackedHMMScorer(self.models)
+            except ValueError:
+                self._scorer = None
+        return self._scorer
+    
+    def _get_gmm_scorer(self):
+        """所有音素GMM打包成的打分器，没有GMM或类型不支持时返回 None"""
+        if self.gmms and (self._gmm_scorer is None or
+                          self._gmm_scorer.phonemes != list(self.gmms)):
+            try:
+                self._gmm_scorer = StackedGMMScorer.from_gmms(self.gmms)
+            except ValueError:
+                self._gmm_scorer = None
+        return self._gmm_scorer
+    
+    def _get_shortlist_scorer(self):
+        """按 shortlist_top_k / shortlist_margin 配置的两阶段打分器，未配置时返回 None"""
+        if self.shortlist_top_k is None and self.shortlist_margin is None:
+            return None
+        scorer, gmm_scorer = self._get_scorer(), self._get_gmm_scorer()
+        if scorer is None or gmm_scorer is None:
+            return None
+        return ShortlistScorer(scorer, gmm_scorer, self.shortlist_top_k, self.shortlist_margin)
+    
+    def score_features(self, features):
+        """计算标准化后的特征在每个音素模型下的对数似然，返回 {音素: 分数}"""
+        shortlist = self._get_shortlist_scorer()
+        if shortlist is not None:
+            # 未入选GMM候选的音素分数为 -inf
+            return shortlist.score_dict(features)
+        
+        scorer = self._get_scorer()
+        if scorer is not None:
+            # 一次矩阵乘法加一次向量化前向算法，对所有音素同时打分
+            return scorer.score_dict(features)
+        
+        # 模型类型不能打包时逐个用 hmmlearn 打分；配置了预筛选时只对GMM候选打分
+        candidates = self._shortlist_candidates(features)
         scores = {}
         for phoneme, model in self.models.items():
+            if candidates is not None and phoneme not in candidates:
+                scores[phoneme] = -np.inf
+                continue
             try:
-                score = model.score(features)
-                scores[phoneme] = score
+                scores[phoneme] = model.score(features)
             except:
                 scores[phoneme] = -np.inf
-        
-        # 返回分数最高的音素
-        best_phoneme = max(scores, key=scores.get)
-        return best_phoneme, scores
+        return scores
+    
+    def _shortlist_candidates(self, features):
+        """GMM预筛选出的候选音素集合；未配置预筛选或没有可用的GMM时返回 None"""
+        if self.shortlist_top_k is None and self.shortlist_margin is None:
+            return None
+        gmm_scorer = self._get_gmm_scorer()
+        if gmm_scorer is None or set(gmm_scorer.phonemes) != set(self.models):
+            return None
+        selected = select_candidates(gmm_scorer.score(features), self.shortlist_top_k,
+                                     self.shortlist_margin)
+        return {gmm_scorer.phonemes[i] for i in selected}
+    
+    @property
+    def phonemes(self):
+        """模型包含的音素列表"""
+        if self.models:
+            return list(self.models)
+        return [] if self._scorer is None else list(self._scorer.phonemes)
     
     def save_models(self, filepath):
-        """保存训练好的模型"""
+        """
+        保存训练好的模型
+        默认保存为可内存映射的模型文件（见 model_format.py），
+        文件名以 .pkl 结尾时按旧格式保存整个 sklearn/hmmlearn 对象
+        """
+        if filepath.endswith('.pkl'):
+            self._save_pickle(filepath)
+            return
+        
+        scorer = self._get_scorer()
+        if scorer is None or not isinstance(self.scaler, OnlineCMVN):
+            raise ValueError("模型文件只支持对角协方差的GMM/HMM和 OnlineCMVN，"
+                             "请使用 .pkl 格式保存")
+        arrays = {f'hmm_{name}': array for name, array in scorer.to_arrays().items()}
+        metadata = {
+            'phonemes': scorer.phonemes,
+            'n_components': self.n_components,
+            'n_mfcc': self.n_mfcc,
+            'delta_order': self.delta_order,
+            'delta_width': self.delta_width,
+            'dtype': self.dtype.name,
+            'backend': self.backend,
+            'is_trained': self.is_trained,
+            'cmvn': {'mode': self.scaler.mode, 'window': self.scaler.window,
+                     'norm_vars': self.scaler.norm_vars,
+                     'n_samples': self.scaler.n_samples_seen_},
+        }
+        # 按段或滑动窗归一化的 scaler 可能没有累积全局统计量
+        if self.scaler.mean_ is not None:
+            arrays['cmvn_mean'] = self.scaler.mean_
+            arrays['cmvn_var'] = self.scaler.var_
+        if self.gmms:
+            metadata['gmm_phonemes'] = list(self.gmms)
+            gmm_arrays = stack_gmms(self.gmms)
+        elif self._gmm_scorer is not None:
+            # 从模型文件加载（未还原 sklearn 对象）的模型，GMM参数只在打分器中
+            metadata['gmm_phonemes'] = self._gmm_scorer.phonemes
+            gmm_arrays = self._gmm_scorer.to_arrays()
+        else:
+            metadata['gmm_phonemes'] = []
+            gmm_arrays = {}
+        arrays.update({f'gmm_{name}': array for name, array in gmm_arrays.items()})
+        save_arrays(filepath, arrays, metadata)
+        print(f"模型已保存到 {filepath}")
+    
+    def _save_pickle(self, filepath):
         with open(filepath, 'wb') as f:
             pickle.dump({
                 'models': self.models,
@@ -127,27 +779,77 @@ class AcousticModel:
                 'scaler': self.scaler,
                 'n_components': self.n_components,
                 'n_mfcc': self.n_mfcc,
+                'delta_order': self.delta_order,
+                'delta_width': self.delta_width,
                 'is_trained': self.is_trained
             }, f)
         print(f"模型已保存到 {filepath}")
     
-    def load_models(self, filepath):
-        """加载训练好的模型"""
+    def load_models(self, filepath, estimators=False):
+        """
+        加载训练好的模型
+        模型文件通过内存映射加载，多个进程共享同一份数据，且不需要导入 sklearn/hmmlearn；
+        estimators=True 时另外还原 hmmlearn/sklearn 对象（继续训练或自适应时需要）
+        """
+        if not is_model_file(filepath):
+            self._load_pickle(filepath)
+            return
+        
+        metadata, arrays = load_arrays(filepath)
+        self._scorer = StackedHMMScorer.from_arrays(
+            metadata['phonemes'],
+            {name[4:]: array for name, array in arrays.items() if name.startswith('hmm_')})
+        cmvn = metadata['cmvn']
+        self.scaler = OnlineCMVN.from_stats(arrays.get('cmvn_mean'), arrays.get('cmvn_var'),
+                                            cmvn['n_samples'], cmvn['mode'],
+                                            cmvn['window'], cmvn['norm_vars'])
+        self.cmvn_mode, self.cmvn_window = cmvn['mode'], cmvn['window']
+        self.n_components = metadata['n_components']
+        self.n_mfcc = metadata['n_mfcc']
+        self.delta_order = metadata['delta_order']
+        self.delta_width = metadata['delta_width']
+        self.dtype = resolve_dtype(metadata['dtype'])
+        self.backend = metadata['backend']
+        self.is_trained = metadata['is_trained']
+        
+        gmm_arrays = {name[4:]: array for name, array in arrays.items()
+                      if name.startswith('gmm_')}
+        self._gmm_scorer = (StackedGMMScorer(metadata['gmm_phonemes'], gmm_arrays)
+                            if gmm_arrays else None)
+        if estimators:
+            self.models = self._scorer.to_hmms()
+            self.gmms = (gmms_from_arrays(metadata['gmm_phonemes'], gmm_arrays)
+                         if gmm_arrays else {})
+        else:
+            self.models = {}
+            self.gmms = {}
+        print(f"模型已从 {filepath} 加载")
+    
+    def _load_pickle(self, filepath):
         with open(filepath, 'rb') as f:
             data = pickle.load(f)
         
         self.models = data['models']
+        self._scorer = None
+        self._gmm_scorer = None
         self.gmms = data['gmms']
         self.scaler = data['scaler']
         self.n_components = data['n_components']
         self.n_mfcc = data['n_mfcc']
+        # 旧版本保存的模型只使用静态MFCC
+        self.delta_order = data.get('delta_order', 0)
+        self.delta_width = data.get('delta_width', 2)
         self.is_trained = data['is_trained']
         print(f"模型已从 {filepath} 加载")
 
 class SpeechProject:
     def __init__(self):
         self.preprocessor = VoicePreprocessing()
-        self.acoustic_model = AcousticModel()
+        # 特征缓存：语料未变化时重复训练无需重新提取特征
+        # 使用静态MFCC加一阶、二阶差分（39维），让模型看到频谱的动态变化
+        self.acoustic_model = AcousticModel(feature_cache=FeatureCache('cache/features'),
+                                            delta_order=2)
+        self.manifest = None  # 语料清单（DatasetManifest），首次加载训练数据时建立
         self.dataset_loaded = False
         
     def download_timit_dataset(self):
@@ -167,67 +869,94 @@ class SpeechProject:
         self.dataset_loaded = True
     
     def _generate_sample_data(self):
-        """生成用于演示的示例音素数据"""
-        # 定义几个基本音素
-        phonemes = ['aa', 'iy', 'uw', 'eh', 'ah']
-        
-        # 为每个音素生成一些示例音频
-        sr = 22050
-        duration = 0.5  # 0.5秒
-        
-        for i, phoneme in enumerate(phonemes):
-            phoneme_dir = f'data/timit_sample/{phoneme}'
-            os.makedirs(phoneme_dir, exist_ok=True)
-            
-            # 为每个音素生成5个变体
-            for j in range(5):
-                # 生成不同频率的音频来模拟不同音素
-                base_freq = 200 + i * 100  # 每个音素有不同的基础频率
-                t = np.linspace(0, duration, int(sr * duration))
-                
-                # 生成包含基频和泛音的音频
-                audio = 0.5 * np.sin(2 * np.pi * base_freq * t)
-                audio += 0.3 * np.sin(2 * np.pi * base_freq * 2 * t)
-                audio += 0.2 * np.sin(2 * np.pi * base_freq * 3 * t)
-                
-                # 添加一些噪声模拟真实语音
-                noise = 0.05 * np.random.randn(len(audio))
-                audio += noise
-                
-                # 保存音频文件
-                filename = f'{phoneme_dir}/{phoneme}_{j:02d}.wav'
-                sf.write(filename, audio, sr)
+        """生成用于演示的示例音素数据（每个音素5段0.5秒的合成音频，结果固定）"""
+        # 定义几个基本音素，每个音素有不同的基频和谐波分布
+        corpus = SyntheticCorpus(units=['aa', 'iy', 'uw', 'eh', 'ah'], utterances_per_unit=5,
+                                 duration=0.5, snr_db=20.0, sample_rate=22050)
+        # 沿用原来的文件名 <音素>_<两位编号>.wav，已有的示例数据目录不会混入另一套文件；
+        # 已存在的文件不再重写，语料清单和特征缓存保持有效
+        corpus.write_wav('data/timit_sample', n_workers=1, overwrite=False,
+                         name_format='{unit}_{index:02d}.wav')
     
-    def load_training_data(self):
-        """加载训练数据"""
+    def load_training_data(self, n_workers=None, chunk_size=32):
+        """加载训练数据，返回 {音素: 特征列表}"""
+        training_data = {}
+        for phoneme, features in self.iter_training_data(n_workers, chunk_size):
+            training_data.setdefault(phoneme, []).append(features)
+        return training_data
+    
+    def iter_training_data(self, n_workers=None, chunk_size=32):
+        """
+        逐个产出训练样本 (音素, 特征)
+        文件列表来自语料清单，只有新增或修改的文件需要重新读文件头和计算哈希；
+        特征缓存以文件内容哈希为键，命中时连音频都不解码。
+        其余音频在线程池中并行解码，每凑满 chunk_size 段就批量提取一次特征；
+        产出顺序与文件顺序一致，训练结果可复现
+        """
         if not self.dataset_loaded:
             self.download_timit_dataset()
         
-        training_data = {}
+        manifest = self.update_manifest(n_workers)
+        model = self.acoustic_model
+        jobs = []
+        for phoneme, relpaths in sorted(manifest.by_phoneme().items()):
+            for relpath in relpaths:
+                key = model.file_cache_key(manifest.entries[relpath]['hash'], sr=22050)
+                jobs.append((phoneme, manifest.abspath(relpath), key))
         
-        # 遍历所有音素目录
-        phoneme_dirs = [d for d in os.listdir('data/timit_sample') 
-                       if os.path.isdir(os.path.join('data/timit_sample', d))]
+        cache = model.feature_cache
+        cached = [cache is not None and key in cache for _, _, key in jobs]
+        stream = iter_load_audio([path for (_, path, _), hit in zip(jobs, cached) if not hit],
+                                 sample_rate=22050, n_workers=n_workers)
+        chunk = []
+        for (phoneme, path, key), hit in zip(jobs, cached):
+            audio = None if hit else next(stream)[1]
+            chunk.append((phoneme, path, audio, key))
+            if len(chunk) >= chunk_size:
+                yield from self._featurize_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._featurize_chunk(chunk)
+    
+    def update_manifest(self, n_workers=None):
+        """增量更新语料清单并保存"""
+        if self.manifest is None:
+            self.manifest = DatasetManifest('data/timit_sample')
+        changes = self.manifest.update(n_workers)
+        if changes['added'] or changes['modified'] or changes['removed']:
+            print(f"语料清单更新: 新增 {len(changes['added'])}, 修改 {len(changes['modified'])}, "
+                  f"删除 {len(changes['removed'])}, 未变 {changes['unchanged']}")
+            self.manifest.save()
+        return self.manifest
+    
+    def _featurize_chunk(self, chunk):
+        """批量提取一组 (音素, 路径, 音频, 缓存键) 的特征，音频为 None 的直接读缓存"""
+        model = self.acoustic_model
+        features_list = [None] * len(chunk)
+        for i, (_, _, audio, key) in enumerate(chunk):
+            if audio is None:
+                mfccs = model.feature_cache.get(key)
+                if mfccs is not None:
+                    features_list[i] = model.add_deltas(mfccs)
         
-        for phoneme in phoneme_dirs:
-            phoneme_path = f'data/timit_sample/{phoneme}'
-            audio_files = [f for f in os.listdir(phoneme_path) if f.endswith('.wav')]
-            
-            features_list = []
-            for audio_file in audio_files:
-                filepath = os.path.join(phoneme_path, audio_file)
-                audio, sr = librosa.load(filepath, sr=22050)
-                
-                # 提取特征
-                features = self.acoustic_model.extract_features(audio, sr)
-                features_list.append(features)
-            
-            training_data[phoneme] = features_list
+        # 缓存条目可能已被其他进程淘汰，此时补读音频
+        missing = [i for i, features in enumerate(features_list) if features is None]
+        if missing:
+            audios = [chunk[i][2] for i in missing]
+            for j, i in enumerate(missing):
+                if audios[j] is None:
+                    audios[j], _ = load_audio_file(chunk[i][1], sr=22050)
+            keys = None if model.feature_cache is None else [chunk[i][3] for i in missing]
+            computed, _ = model.extract_features_batch(audios, sr=22050, keys=keys)
+            for i, features in zip(missing, computed):
+                features_list[i] = features
         
-        return training_data
+        for (phoneme, _, _, _), features in zip(chunk, features_list):
+            yield phoneme, features
     
     def demonstrate_gmm(self):
         """演示GMM的工作原理"""
+        from sklearn.mixture import GaussianMixture
         print("=== GMM演示 ===")
         
         # 生成模拟的MFCC特征数据（二维以便可视化）
@@ -251,50 +980,52 @@ class SpeechProject:
         gmm.fit(X)
         
         # 可视化
-        plt.figure(figsize=(15, 5))
-        # 设置中文字体
-        plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
-        plt.rcParams['axes.unicode_minus'] = False
-        # 原始数据
-        plt.subplot(1, 3, 1)
-        plt.scatter(data1[:, 0], data1[:, 1], alpha=0.6, label='类别1')
-        plt.scatter(data2[:, 0], data2[:, 1], alpha=0.6, label='类别2')
-        plt.scatter(data3[:, 0], data3[:, 1], alpha=0.6, label='类别3')
-        plt.title('原始数据分布')
-        plt.xlabel('MFCC系数1')
-        plt.ylabel('MFCC系数2')
-        plt.legend()
-        
-        # GMM预测结果
-        plt.subplot(1, 3, 2)
-        labels = gmm.predict(X)
-        colors = ['red', 'blue', 'green']
-        for i in range(3):
-            plt.scatter(X[labels == i, 0], X[labels == i, 1], 
-                       alpha=0.6, color=colors[i], label=f'GMM类别{i+1}')
-        plt.title('GMM分类结果')
-        plt.xlabel('MFCC系数1')
-        plt.ylabel('MFCC系数2')
-        plt.legend()
-        
-        # GMM概率分布
-        plt.subplot(1, 3, 3)
-        x = np.linspace(-1, 6, 100)
-        y = np.linspace(-1, 6, 100)
-        X_grid, Y_grid = np.meshgrid(x, y)
-        XX = np.array([X_grid.ravel(), Y_grid.ravel()]).T
-        Z = gmm.score_samples(XX)
-        Z = Z.reshape(X_grid.shape)
-        
-        plt.contourf(X_grid, Y_grid, Z, levels=20, cmap='viridis', alpha=0.6)
-        plt.colorbar(label='对数概率密度')
-        plt.scatter(X[:, 0], X[:, 1], alpha=0.3, color='white', s=10)
-        plt.title('GMM概率密度分布')
-        plt.xlabel('MFCC系数1')
-        plt.ylabel('MFCC系数2')
-        
-        plt.tight_layout()
-        plt.show()
+        if not is_headless():
+            plt = pyplot()
+            plt.figure(figsize=(15, 5))
+            # 设置中文字体
+            plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
+            plt.rcParams['axes.unicode_minus'] = False
+            # 原始数据
+            plt.subplot(1, 3, 1)
+            plt.scatter(data1[:, 0], data1[:, 1], alpha=0.6, label='类别1')
+            plt.scatter(data2[:, 0], data2[:, 1], alpha=0.6, label='类别2')
+            plt.scatter(data3[:, 0], data3[:, 1], alpha=0.6, label='类别3')
+            plt.title('原始数据分布')
+            plt.xlabel('MFCC系数1')
+            plt.ylabel('MFCC系数2')
+            plt.legend()
+            
+            # GMM预测结果
+            plt.subplot(1, 3, 2)
+            labels = gmm.predict(X)
+            colors = ['red', 'blue', 'green']
+            for i in range(3):
+                plt.scatter(X[labels == i, 0], X[labels == i, 1], 
+                           alpha=0.6, color=colors[i], label=f'GMM类别{i+1}')
+            plt.title('GMM分类结果')
+            plt.xlabel('MFCC系数1')
+            plt.ylabel('MFCC系数2')
+            plt.legend()
+            
+            # GMM概率分布
+            plt.subplot(1, 3, 3)
+            x = np.linspace(-1, 6, 100)
+            y = np.linspace(-1, 6, 100)
+            X_grid, Y_grid = np.meshgrid(x, y)
+            XX = np.array([X_grid.ravel(), Y_grid.ravel()]).T
+            Z = gmm.score_samples(XX)
+            Z = Z.reshape(X_grid.shape)
+            
+            plt.contourf(X_grid, Y_grid, Z, levels=20, cmap='viridis', alpha=0.6)
+            plt.colorbar(label='对数概率密度')
+            plt.scatter(X[:, 0], X[:, 1], alpha=0.3, color='white', s=10)
+            plt.title('GMM概率密度分布')
+            plt.xlabel('MFCC系数1')
+            plt.ylabel('MFCC系数2')
+            
+            plt.tight_layout()
+            plt.show()
         
         print("GMM参数:")
         print(f"权重: {gmm.weights_}")
@@ -303,6 +1034,7 @@ class SpeechProject:
     
     def demonstrate_hmm(self):
         """演示HMM的工作原理"""
+        from hmmlearn import hmm
         print("=== HMM演示 ===")
         
         # 生成模拟的语音特征序列
@@ -348,31 +1080,33 @@ class SpeechProject:
         test_sequence = sequences[0]
         decoded_states = model.predict(test_sequence)
         
-        plt.figure(figsize=(15, 5))
-        # 设置中文字体
-        plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
-        plt.rcParams['axes.unicode_minus'] = False
-        # 原始序列
-        plt.subplot(1, 2, 1)
-        plt.plot(test_sequence[:, 0], test_sequence[:, 1], 'o-', alpha=0.7)
-        plt.title('特征序列')
-        plt.xlabel('特征维度1')
-        plt.ylabel('特征维度2')
-        
-        # 状态序列
-        plt.subplot(1, 2, 2)
-        colors = ['red', 'blue', 'green']
-        for i in range(n_states):
-            mask = decoded_states == i
-            plt.plot(np.where(mask)[0], test_sequence[mask, 0], 
-                    'o', color=colors[i], label=f'状态{i+1}')
-        plt.title('HMM解码状态序列')
-        plt.xlabel('时间帧')
-        plt.ylabel('特征维度1')
-        plt.legend()
-        
-        plt.tight_layout()
-        plt.show()
+        if not is_headless():
+            plt = pyplot()
+            plt.figure(figsize=(15, 5))
+            # 设置中文字体
+            plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
+            plt.rcParams['axes.unicode_minus'] = False
+            # 原始序列
+            plt.subplot(1, 2, 1)
+            plt.plot(test_sequence[:, 0], test_sequence[:, 1], 'o-', alpha=0.7)
+            plt.title('特征序列')
+            plt.xlabel('特征维度1')
+            plt.ylabel('特征维度2')
+            
+            # 状态序列
+            plt.subplot(1, 2, 2)
+            colors = ['red', 'blue', 'green']
+            for i in range(n_states):
+                mask = decoded_states == i
+                plt.plot(np.where(mask)[0], test_sequence[mask, 0], 
+                        'o', color=colors[i], label=f'状态{i+1}')
+            plt.title('HMM解码状态序列')
+            plt.xlabel('时间帧')
+            plt.ylabel('特征维度1')
+            plt.legend()
+            
+            plt.tight_layout()
+            plt.show()
         
         print("HMM参数:")
         print(f"初始状态概率: {model.startprob_}")
@@ -383,21 +1117,22 @@ class SpeechProject:
         """训练演示用的声学模型"""
         print("=== 训练声学模型 ===")
         
-        # 加载训练数据
-        training_data = self.load_training_data()
+        # 加载训练数据：特征边提取边写入特征存储，不在内存中保留全部特征
+        store = FeatureStore.build('cache/feature_store', self.iter_training_data(),
+                                   writable=True)
         
-        # 训练模型
-        self.acoustic_model.train_models(training_data)
+        # 训练模型（各音素相互独立，用多个进程并行训练，子进程直接映射特征存储）
+        self.acoustic_model.train_models(store, n_jobs=-1)
         
         # 保存模型
-        self.acoustic_model.save_models('models/acoustic_model.pkl')
+        self.acoustic_model.save_models('models/acoustic_model' + MODEL_EXTENSION)
     
     def test_recognition(self):
         """测试语音识别"""
         if not self.acoustic_model.is_trained:
             print("模型未训练，正在加载预训练模型...")
             try:
-                self.acoustic_model.load_models('models/acoustic_model.pkl')
+                self.acoustic_model.load_models('models/acoustic_model' + MODEL_EXTENSION)
             except:
                 print("找不到预训练模型，请先运行训练...")
                 return
@@ -410,7 +1145,7 @@ class SpeechProject:
         
         # 播放录制的音频
         print("播放录制的音频:")
-        ipd.display(ipd.Audio(audio, rate=22050))
+        display_audio(audio, 22050)
         
         # 进行识别
         phoneme, scores = self.acoustic_model.predict(audio)
@@ -420,17 +1155,25 @@ class SpeechProject:
         for p, score in scores.items():
             print(f"  {p}: {score:.2f}")
         
+        # 连续音素识别，适用于包含多个音素的录音
+        print("连续音素识别结果:")
+        for p, start, end in self.acoustic_model.decode(audio):
+            print(f"  {start:.2f}s - {end:.2f}s: {p}")
+        
         # 可视化MFCC特征
         features = self.acoustic_model.extract_features(audio)
-        plt.figure(figsize=(10, 4))
-        # 设置中文字体
-        plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
-        plt.rcParams['axes.unicode_minus'] = False
-        librosa.display.specshow(features.T, sr=22050, x_axis='time')
-        plt.colorbar()
-        plt.title(f'MFCC特征 - 识别结果: {phoneme}')
-        plt.tight_layout()
-        plt.show()
+        if not is_headless():
+            plt = pyplot()
+            plt.figure(figsize=(10, 4))
+            # 设置中文字体
+            plt.rcParams['font.family'] = ['DejaVu Sans', 'Arial', 'sans-serif', 'SimHei']
+            plt.rcParams['axes.unicode_minus'] = False
+            n_mfcc = self.acoustic_model.n_mfcc
+            librosa_display().specshow(features[:, :n_mfcc].T, sr=22050, x_axis='time')
+            plt.colorbar()
+            plt.title(f'MFCC特征 - 识别结果: {phoneme}')
+            plt.tight_layout()
+            plt.show()
 
 # 整合之前的语音预处理类
 class VoicePreprocessing:
@@ -440,6 +1183,7 @@ class VoicePreprocessing:
         
     def record_audio(self, duration=3, sample_rate=22050):
         """录制音频"""
+        sd = sounddevice()
         print(f"开始录音，请说话... ({duration}秒)")
         self.sample_rate = sample_rate
         self.audio_data = sd.rec(int(duration * sample_rate), 
@@ -452,7 +1196,7 @@ class VoicePreprocessing:
     
     def load_audio(self, filepath):
         """加载音频文件"""
-        self.audio_data, self.sample_rate = librosa.load(filepath, sr=self.sample_rate)
+        self.audio_data, self.sample_rate = load_audio_file(filepath, sr=self.sample_rate)
         return self.audio_data
 
 # 主程序
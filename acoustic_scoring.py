@@ -0,0 +1,364 @@
+"""
+声学模型批量打分
+把所有音素的对角协方差高斯HMM参数打包成连续数组：
+一次矩阵乘法算出所有模型所有状态的发射对数似然，再对所有模型同时做对数域前向算法，
+结果与逐个调用 hmmlearn 的 model.score 一致，但模型越多越划算
+"""
+
+import numpy as np
+
+
+class StackedHMMScorer:
+    """
+    多个 GaussianHMM（covariance_type='diag'）的批量打分器
+
+    状态数不同的模型补齐到最大状态数，补齐的状态起始概率和转移概率都为0，
+    发射对数似然为 -inf，不影响前向概率。
+    """
+
+    # 保存/加载模型时需要的数组名称
+    ARRAY_NAMES = ('n_states', 'means', 'variances', 'startprob', 'transmat',
+                   'log_startprob', 'weights', 'bias')
+
+    def __init__(self, models):
+        self.phonemes = list(models)
+        if not self.phonemes:
+            raise ValueError("至少需要一个模型")
+        hmms = [models[phoneme] for phoneme in self.phonemes]
+        for phoneme, model in zip(self.phonemes, hmms):
+            if getattr(model, 'covariance_type', None) != 'diag':
+                raise ValueError(f"音素 '{phoneme}' 的模型不是对角协方差高斯HMM")
+
+        n_models = len(hmms)
+        n_states = max(model.n_components for model in hmms)
+        n_features = hmms[0].means_.shape[1]
+
+        self.n_states_per_model = np.array([model.n_components for model in hmms])
+        self.means = np.zeros((n_models, n_states, n_features))
+        # 补齐的状态方差取1，保证求逆和取对数有意义（其发射概率另行置为0）
+        self.variances = np.ones((n_models, n_states, n_features))
+        self.startprob = np.zeros((n_models, n_states))
+        self.transmat = np.zeros((n_models, n_states, n_states))
+        for m, model in enumerate(hmms):
+            k = model.n_components
+            # covars_ 对 diag 模型返回 (状态数, D, D) 的对角阵，取对角线
+            self.variances[m, :k] = np.diagonal(model.covars_, axis1=1, axis2=2)
+            self.means[m, :k] = model.means_
+            self.startprob[m, :k] = model.startprob_
+            self.transmat[m, :k, :k] = model.transmat_
+        self._precompute()
+
+    def _precompute(self):
+        """由模型参数计算打分用的权重矩阵、偏置和对数起始概率"""
+        n_models, n_states, n_features = self.means.shape
+        self.n_models, self.n_states, self.n_features = n_models, n_states, n_features
+        valid = np.arange(n_states) < self.n_states_per_model[:, None]
+        inv_vars = 1.0 / self.variances
+        log_dets = np.log(self.variances).sum(axis=2)
+        with np.errstate(divide='ignore'):
+            self.log_startprob = np.log(self.startprob)
+
+        # log N(x; mu, var) = x^2 @ (-iv/2) + x @ (mu*iv) + bias
+        # 权重按 [x^2, x] 拼接，所有模型的所有状态排成一列，只需一次矩阵乘法
+        n_total = n_models * n_states
+        self.weights = np.concatenate([
+            -0.5 * inv_vars.reshape(n_total, n_features).T,
+            (self.means * inv_vars).reshape(n_total, n_features).T,
+        ])
+        bias = -0.5 * (n_features * np.log(2 * np.pi) + log_dets +
+                       np.sum(self.means ** 2 * inv_vars, axis=2))
+        bias[~valid] = -np.inf
+        self.bias = bias.reshape(n_total)
+
+    def to_arrays(self):
+        """导出打包后的参数（含预计算结果），用于写入模型文件"""
+        return {'n_states': self.n_states_per_model, 'means': self.means,
+                'variances': self.variances, 'startprob': self.startprob,
+                'transmat': self.transmat, 'log_startprob': self.log_startprob,
+                'weights': self.weights, 'bias': self.bias}
+
+    @classmethod
+    def from_arrays(cls, phonemes, arrays):
+        """由 to_arrays 导出的数组直接构造（数组可以是内存映射，不复制也不重新计算）"""
+        scorer = cls.__new__(cls)
+        scorer.phonemes = list(phonemes)
+        scorer.n_states_per_model = arrays['n_states']
+        for name in cls.ARRAY_NAMES[1:]:
+            setattr(scorer, name, arrays[name])
+        scorer.n_models, scorer.n_states, scorer.n_features = scorer.means.shape
+        return scorer
+
+    def to_hmms(self):
+        """还原为 hmmlearn 的 GaussianHMM 对象，返回 {音素: 模型}"""
+        from hmmlearn import hmm
+        models = {}
+        for m, phoneme in enumerate(self.phonemes):
+            k = int(self.n_states_per_model[m])
+            model = hmm.GaussianHMM(n_components=k, covariance_type='diag')
+            model.n_features = self.n_features
+            model.startprob_ = np.array(self.startprob[m, :k])
+            model.transmat_ = np.array(self.transmat[m, :k, :k])
+            model.means_ = np.array(self.means[m, :k])
+            model.covars_ = np.array(self.variances[m, :k])
+            models[phoneme] = model
+        return models
+
+    def _select(self, models):
+        """取出指定模型子集的打分参数，models 为模型编号数组，None 表示全部"""
+        if models is None:
+            return self.weights, self.bias, self.log_startprob, self.transmat
+        models = np.asarray(models, dtype=np.int64)
+        columns = (models[:, None] * self.n_states + np.arange(self.n_states)).reshape(-1)
+        return (self.weights[:, columns], self.bias[columns],
+                self.log_startprob[models], self.transmat[models])
+
+    def log_likelihoods(self, features, models=None):
+        """各模型各状态的发射对数似然，形状 (帧数, 模型数, 状态数)；models 可只取部分模型"""
+        weights, bias, _, _ = self._select(models)
+        features = np.asarray(features, dtype=np.float64)
+        stacked = np.concatenate([features ** 2, features], axis=1)
+        log_b = stacked @ weights
+        log_b += bias
+        return log_b.reshape(len(features), -1, self.n_states)
+
+    def score(self, features, models=None):
+        """返回每个模型对整段特征的对数似然 log P(X | 模型)，形状 (模型数,)"""
+        return self.score_batch(features, [len(features)], models)[0]
+
+    def score_batch(self, features, lengths, models=None):
+        """
+        对多段拼接在一起的特征同时打分
+        features: 各段特征按顺序拼接 (总帧数, 特征维度)，lengths: 各段帧数
+        models: 只对这些编号的模型打分（None 表示全部）
+        返回形状 (段数, 模型数) 的对数似然
+        """
+        _, _, log_startprob, transmat = self._select(models)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        scores = np.zeros((len(lengths), len(log_startprob)))
+        if not lengths.any():
+            return scores
+        # 所有段所有帧的发射概率只需一次矩阵乘法
+        log_b = self.log_likelihoods(features, models)
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+        # 按长度从长到短排列，第 t 帧时仍未结束的段正好是前若干个
+        order = np.flatnonzero(lengths)
+        order = order[np.argsort(-lengths[order], kind='stable')]
+        seg_starts, seg_lengths = starts[order], lengths[order]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_alpha = log_startprob + log_b[seg_starts]
+            for t in range(1, seg_lengths[0]):
+                n_active = np.searchsorted(-seg_lengths, -t)
+                active = log_alpha[:n_active]
+                # 每个模型先减去自身的最大值再转回概率域做转移，避免下溢
+                shift = active.max(axis=2, keepdims=True)
+                shift[~np.isfinite(shift)] = 0.0
+                alpha = np.exp(active - shift)
+                active = np.log(np.einsum('nms,msj->nmj', alpha, transmat))
+                active += shift + log_b[seg_starts[:n_active] + t]
+                log_alpha[:n_active] = active
+
+            shift = log_alpha.max(axis=2, keepdims=True)
+            shift[~np.isfinite(shift)] = 0.0
+            scores[order] = np.log(np.exp(log_alpha - shift).sum(axis=2)) + shift[:, :, 0]
+        return scores
+
+    def score_dict(self, features):
+        """返回 {音素: 对数似然}"""
+        return dict(zip(self.phonemes, self.score(features).tolist()))
+
+
+class StackedGMMScorer:
+    """
+    多个对角协方差 GMM 的批量打分器（参数来自 stack_gmms）
+
+    与 StackedHMMScorer 相同，一次矩阵乘法得到所有模型所有分量的对数似然，
+    再在各模型内部对分量做 logsumexp，计算量远小于HMM前向算法
+    """
+
+    ARRAY_NAMES = ('n_components', 'weights', 'means', 'variances')
+
+    def __init__(self, phonemes, arrays):
+        self.phonemes = list(phonemes)
+        # 保留打包前的参数（加载模型文件时为只读视图），重新保存时原样写出
+        self._arrays = {name: arrays[name] for name in self.ARRAY_NAMES}
+        weights = np.asarray(arrays['weights'], dtype=np.float64)
+        means = np.asarray(arrays['means'], dtype=np.float64)
+        variances = np.asarray(arrays['variances'], dtype=np.float64)
+        self.n_models, self.n_components, self.n_features = means.shape
+
+        inv_vars = 1.0 / variances
+        with np.errstate(divide='ignore'):
+            # 补齐分量的权重为0，对数权重为 -inf
+            log_weights = np.log(weights)
+        bias = log_weights - 0.5 * (self.n_features * np.log(2 * np.pi) +
+                                    np.log(variances).sum(axis=2) +
+                                    np.sum(means ** 2 * inv_vars, axis=2))
+
+        # 列按 (分量, 模型) 排列：对分量求 logsumexp 时沿中间轴归约，最内层是连续的模型维，
+        # 比在长度只有几的最内层轴上归约快得多
+        n_total = self.n_models * self.n_components
+        self.weights = np.concatenate([
+            -0.5 * inv_vars.transpose(1, 0, 2).reshape(n_total, self.n_features).T,
+            (means * inv_vars).transpose(1, 0, 2).reshape(n_total, self.n_features).T,
+        ])
+        self.bias = bias.T.reshape(n_total)
+
+    @classmethod
+    def from_gmms(cls, gmms):
+        """由 {音素: GaussianMixture} 构造"""
+        return cls(list(gmms), stack_gmms(gmms))
+
+    def to_arrays(self):
+        """导出打包的GMM参数（与 stack_gmms 的结果相同），用于写入模型文件"""
+        return dict(self._arrays)
+
+    def frame_log_likelihoods(self, features):
+        """每帧在每个GMM下的对数似然，形状 (帧数, 模型数)"""
+        features = np.asarray(features, dtype=np.float64)
+        stacked = np.concatenate([features ** 2, features], axis=1)
+        log_p = stacked @ self.weights
+        log_p += self.bias
+        log_p = log_p.reshape(len(features), self.n_components, self.n_models)
+        peak = log_p.max(axis=1)
+        log_p -= peak[:, None, :]
+        np.exp(log_p, out=log_p)
+        return np.log(log_p.sum(axis=1)) + peak
+
+    def score(self, features):
+        """整段特征在每个GMM下的对数似然（各帧之和），形状 (模型数,)"""
+        return self.frame_log_likelihoods(features).sum(axis=0)
+
+
+def select_candidates(scores, top_k=None, margin=None):
+    """
+    按分数挑选候选模型，返回按分数从高到低排列的编号
+    top_k: 最多保留的个数；margin: 只保留与最高分相差不超过 margin 的模型；都为 None 时保留全部
+    """
+    order = np.argsort(-scores, kind='stable')
+    if margin is not None:
+        order = order[scores[order] >= scores[order[0]] - margin]
+    if top_k is not None:
+        order = order[:top_k]
+    return order
+
+
+class ShortlistScorer:
+    """
+    两阶段打分：先用 GMM 的帧级似然挑出候选音素，只对候选音素做HMM前向算法
+    未入选的音素分数为 -inf
+    """
+
+    def __init__(self, hmm_scorer, gmm_scorer, top_k=3, margin=None):
+        if set(gmm_scorer.phonemes) != set(hmm_scorer.phonemes):
+            raise ValueError("GMM与HMM的音素集合不一致")
+        self.hmm_scorer = hmm_scorer
+        self.gmm_scorer = gmm_scorer
+        self.top_k = top_k
+        self.margin = margin
+        # GMM 编号 -> HMM 编号
+        hmm_index = {phoneme: i for i, phoneme in enumerate(hmm_scorer.phonemes)}
+        self._gmm_to_hmm = np.array([hmm_index[p] for p in gmm_scorer.phonemes])
+
+    def candidates(self, features):
+        """候选音素在 HMM 打分器中的编号"""
+        gmm_scores = self.gmm_scorer.score(features)
+        return self._gmm_to_hmm[select_candidates(gmm_scores, self.top_k, self.margin)]
+
+    def score(self, features):
+        """返回 (模型数,) 的对数似然，只有候选音素经过HMM打分"""
+        candidates = self.candidates(features)
+        scores = np.full(self.hmm_scorer.n_models, -np.inf)
+        scores[candidates] = self.hmm_scorer.score(features, candidates)
+        return scores
+
+    def score_dict(self, features):
+        return dict(zip(self.hmm_scorer.phonemes, self.score(features).tolist()))
+
+
+def evaluate_shortlist(hmm_scorer, gmm_scorer, features_list, labels=None,
+                       top_ks=(1, 2, 3, 5), margins=()):
+    """
+    评估不同 top_k / margin 设置下准确率与加速比的取舍
+    features_list: 已标准化的特征列表；labels: 可选的真实音素列表
+    返回每种设置一行的字典列表，agreement 为与完整HMM打分结果相同的比例
+    """
+    import time
+
+    start = time.perf_counter()
+    full_best = [hmm_scorer.phonemes[int(np.argmax(hmm_scorer.score(features)))]
+                 for features in features_list]
+    full_time = time.perf_counter() - start
+
+    def summarize(setting, predictions, n_candidates, elapsed):
+        row = dict(setting)
+        row['mean_candidates'] = float(np.mean(n_candidates))
+        row['agreement'] = float(np.mean([a == b for a, b in zip(predictions, full_best)]))
+        row['time'] = elapsed
+        row['speedup'] = full_time / elapsed if elapsed > 0 else float('inf')
+        if labels is not None:
+            row['accuracy'] = float(np.mean([p == y for p, y in zip(predictions, labels)]))
+        return row
+
+    rows = [summarize({'top_k': None, 'margin': None}, full_best,
+                      [hmm_scorer.n_models] * len(features_list), full_time)]
+    settings = [{'top_k': k, 'margin': None} for k in top_ks]
+    settings += [{'top_k': None, 'margin': m} for m in margins]
+    for setting in settings:
+        scorer = ShortlistScorer(hmm_scorer, gmm_scorer, **setting)
+        predictions, n_candidates = [], []
+        start = time.perf_counter()
+        for features in features_list:
+            candidates = scorer.candidates(features)
+            scores = hmm_scorer.score(features, candidates)
+            predictions.append(hmm_scorer.phonemes[int(candidates[np.argmax(scores)])])
+            n_candidates.append(len(candidates))
+        rows.append(summarize(setting, predictions, n_candidates,
+                              time.perf_counter() - start))
+    return rows
+
+
+def stack_gmms(gmms):
+    """
+    把多个对角协方差 GaussianMixture 的参数打包成连续数组，用于写入模型文件
+    分量数不同的模型补齐到最大分量数，补齐分量的权重为0
+    """
+    mixtures = list(gmms.values())
+    n_models = len(mixtures)
+    n_components = max(gmm.n_components for gmm in mixtures)
+    n_features = mixtures[0].means_.shape[1]
+    arrays = {
+        'n_components': np.array([gmm.n_components for gmm in mixtures]),
+        'weights': np.zeros((n_models, n_components)),
+        'means': np.zeros((n_models, n_components, n_features)),
+        'variances': np.ones((n_models, n_components, n_features)),
+    }
+    for m, gmm in enumerate(mixtures):
+        if gmm.covariance_type != 'diag':
+            raise ValueError("只支持对角协方差的GMM")
+        k = gmm.n_components
+        arrays['weights'][m, :k] = gmm.weights_
+        arrays['means'][m, :k] = gmm.means_
+        arrays['variances'][m, :k] = gmm.covariances_
+    return arrays
+
+
+def gmms_from_arrays(phonemes, arrays):
+    """由 stack_gmms 的数组还原 sklearn 的 GaussianMixture 对象，返回 {音素: 模型}"""
+    from sklearn.mixture import GaussianMixture
+    gmms = {}
+    for m, phoneme in enumerate(phonemes):
+        k = int(arrays['n_components'][m])
+        gmm = GaussianMixture(n_components=k, covariance_type='diag')
+        gmm.weights_ = np.array(arrays['weights'][m, :k])
+        gmm.means_ = np.array(arrays['means'][m, :k])
+        gmm.covariances_ = np.array(arrays['variances'][m, :k])
+        gmm.precisions_cholesky_ = 1.0 / np.sqrt(gmm.covariances_)
+        gmm.precisions_ = 1.0 / gmm.covariances_
+        gmm.converged_ = True
+        gmm.n_iter_ = 0
+        gmm.lower_bound_ = -np.inf
+        gmm.n_features_in_ = gmm.means_.shape[1]
+        gmms[phoneme] = gmm
+    return gmms
@@ -1,11 +1,5 @@
-# 导入必要的库
-import torch
-import torchaudio
-import speechbrain as sb
-from speechbrain.inference import EncoderDecoderASR
+# 导入必要的库（torch/speechbrain 较重，只在加载真实模型时导入）
 import os
-import requests
-import urllib.request
 
 def setup_minimal_asr():
     """
@@ -73,6 +67,7 @@ def load_asr_model():
     print("🚀 初始化语音识别模型...")
     
     # 在实际完整版中，这里会加载真实的预训练模型
+    # from speechbrain.inference import EncoderDecoderASR
     # asr_model = EncoderDecoderASR.from_hparams(
     #     source="speechbrain/asr-crdnn-commonvoice-fr",
     #     savedir="./pretrained_models"
@@ -1,13 +1,13 @@
 # 真实可运行的语音识别演示
 # 首次运行会自动安装依赖，无需手动下载
 
-import speech_recognition as sr
-import pyaudio
 import requests
 import os
 import sys
 import subprocess
 
+from lazy_imports import pyaudio
+
 def install_dependencies():
     """自动安装必要的依赖包"""
     print("🔧 检查并安装必要的依赖...")
@@ -34,6 +34,8 @@ def real_time_speech_recognition():
     类比：打造一个能听懂你说话的智能助手
     """
     print("🎤 初始化语音识别系统...")
+    import speech_recognition as sr
+    pyaudio()  # sr.Microphone 依赖 PyAudio，缺少 PortAudio 时提前给出明确提示
     
     # 创建识别器实例
     recognizer = sr.Recognizer()
@@ -131,6 +133,7 @@ def file_speech_recognition(audio_file_path=None):
     类比：让系统"阅读"录音文件
     """
     print("\n📁 文件语音识别模式")
+    import speech_recognition as sr
     
     recognizer = sr.Recognizer()
     
@@ -2,13 +2,13 @@
 import os
 import wave
 import numpy as np
-from vosk import Model, KaldiRecognizer
-import pyaudio
 import threading
 import time
 import subprocess
 import sys
 
+from lazy_imports import pyaudio
+
 def install_offline_dependencies():
     """安装离线语音识别所需的依赖"""
     print("🔧 安装离线语音识别组件...")
@@ -95,15 +95,17 @@ def offline_speech_recognition(model_path):
         return simulate_recognition()
     
     print("🎤 初始化离线语音识别系统...")
+    from vosk import Model, KaldiRecognizer
+    pa = pyaudio()
     
     # 加载Vosk模型
     model = Model(model_path)
     recognizer = KaldiRecognizer(model, 16000)
     
     # 初始化音频输入
-    audio = pyaudio.PyAudio()
+    audio = pa.PyAudio()
     stream = audio.open(
-        format=pyaudio.paInt16,
+        format=pa.paInt16,
         channels=1,
         rate=16000,
         input=True,
@@ -286,6 +288,7 @@ def file_based_recognition(model_path, audio_file=None):
     
     try:
         # 使用Vosk进行文件识别
+        from vosk import Model, KaldiRecognizer
         model = Model(model_path)
         wf = wave.open(audio_file, 'rb')
         
@@ -0,0 +1,37 @@
+"""
+原子写文件
+先写入同一目录下的临时文件，写完后重命名为目标文件：其他进程要么读到旧文件，
+要么读到完整的新文件，写到一半中断时也不会留下残缺的文件
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+# mkstemp 创建的文件权限固定为 0600，重命名前改成与 open() 新建文件相同的权限。
+# 读取 umask 只能先设置再恢复，在导入时做一次，避免与其他线程创建文件交错
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def atomic_write(path, mode='wb', encoding=None):
+    """
+    以原子方式写入 path，用法与 open() 相同：
+
+        with atomic_write(path) as f:
+            np.save(f, array)
+
+    正常退出时替换目标文件，出错时删除临时文件并抛出原来的异常
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
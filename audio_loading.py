@@ -0,0 +1,64 @@
+"""
+音频文件读取
+用 soundfile 解码（比 librosa.load 轻得多），采样率已经符合要求时不做重采样，
+否则用多相滤波（scipy.signal.resample_poly）按整数比重采样；
+批量读取时在线程池中并行解码，并按输入顺序逐个返回
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from math import gcd
+
+import numpy as np
+
+
+def resample(audio, orig_sr, target_sr):
+    """多相滤波重采样，采样率相同时原样返回"""
+    if orig_sr == target_sr:
+        return audio
+    from scipy.signal import resample_poly
+    factor = gcd(int(orig_sr), int(target_sr))
+    resampled = resample_poly(audio, target_sr // factor, orig_sr // factor)
+    return resampled.astype(audio.dtype, copy=False)
+
+
+def load_audio(path, sample_rate=22050, dtype=np.float32):
+    """
+    读取音频并转为单声道，返回 (音频, 采样率)
+    sample_rate 为 None 时保持原采样率；soundfile 无法解码的格式退回 librosa
+    """
+    import soundfile as sf
+
+    try:
+        audio, sr = sf.read(path, dtype=np.dtype(dtype).name, always_2d=True)
+    except (sf.LibsndfileError, RuntimeError):
+        import librosa
+        return librosa.load(path, sr=sample_rate, dtype=dtype)
+    audio = audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+    if sample_rate is None:
+        return audio, sr
+    return resample(audio, sr, sample_rate), sample_rate
+
+
+def iter_load_audio(paths, sample_rate=22050, n_workers=None, prefetch=None, dtype=np.float32):
+    """
+    在线程池中并行读取多个音频文件，按输入顺序逐个返回 (路径, 音频)
+    最多提前解码 prefetch 个文件（默认为线程数的4倍），内存占用不随文件数增长
+    """
+    n_workers = n_workers or min(8, os.cpu_count() or 1)
+    prefetch = prefetch or 4 * n_workers
+    paths = iter(paths)
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append((path, executor.submit(load_audio, path, sample_rate, dtype)))
+            if len(pending) >= prefetch:
+                break
+        while pending:
+            path, future = pending.popleft()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path,
+                                executor.submit(load_audio, next_path, sample_rate, dtype)))
+            yield path, future.result()[0]
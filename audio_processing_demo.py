@@ -1,16 +1,11 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import librosa
-import librosa.display
-import sounddevice as sd
 import soundfile as sf
-from scipy import signal
 import os
-import requests
 import tempfile
-import IPython.display as ipd
 from urllib.parse import urlparse
 import warnings
+# librosa、scipy、requests 以及绘图、录音、播放相关的库都在用到时才导入
+from lazy_imports import is_headless, pyplot, librosa_display, sounddevice, display_audio
 warnings.filterwarnings('ignore')
 
 class AudioProcessingDemo:
@@ -22,6 +17,8 @@ class AudioProcessingDemo:
         
     def download_audio_from_url(self, url, max_duration=10):
         """从URL下载音频文件"""
+        import librosa
+        import requests
         try:
             print(f"正在从URL下载音频: {url}")
             
@@ -61,6 +58,7 @@ class AudioProcessingDemo:
     
     def load_example_audio(self):
         """加载内置示例音频"""
+        import librosa
         try:
             # 使用librosa自带的示例音频
             file_path = librosa.example('trumpet')
@@ -76,7 +74,9 @@ class AudioProcessingDemo:
     def generate_test_audio(self):
         """生成测试音频"""
         duration = 3  # 3秒
-        t = np.linspace(0, duration, int(duration * self.sample_rate))
+        # 直接以 float32 生成，避免先生成 float64 再转换
+        t = np.linspace(0, duration, int(duration * self.sample_rate), dtype=np.float32)
+        noise = np.random.default_rng().standard_normal(len(t), dtype=np.float32)
         
         # 生成包含多个频率的复杂信号
         # 基频 + 谐波 + 噪声
@@ -85,9 +85,8 @@ class AudioProcessingDemo:
             0.7 * np.sin(2 * np.pi * base_freq * t) +           # 基频
             0.3 * np.sin(2 * np.pi * base_freq * 2 * t) +       # 二次谐波
             0.2 * np.sin(2 * np.pi * base_freq * 3 * t) +       # 三次谐波
-            0.1 * np.random.randn(len(t))                       # 噪声
+            0.1 * noise                                         # 噪声
         )
-        self.original_audio = self.original_audio.astype(np.float32)
         self.audio_duration = duration
         
         print("生成测试音频成功")
@@ -95,6 +94,7 @@ class AudioProcessingDemo:
     
     def record_audio(self, duration=5):
         """录制音频"""
+        sd = sounddevice()
         print(f"开始录音，请说话... ({duration}秒)")
         audio_data = sd.rec(int(duration * self.sample_rate), 
                            samplerate=self.sample_rate, 
@@ -107,11 +107,13 @@ class AudioProcessingDemo:
     
     def apply_pitch_shift(self, audio, n_steps=4):
         """音高变换（产生明显听觉差异）"""
+        import librosa
         print(f"应用音高变换: {n_steps} 个半音")
         return librosa.effects.pitch_shift(audio, sr=self.sample_rate, n_steps=n_steps)
     
     def apply_time_stretch(self, audio, rate=1.5):
         """时间拉伸（产生明显听觉差异）"""
+        import librosa
         print(f"应用时间拉伸: {rate}x 速度")
         return librosa.effects.time_stretch(audio, rate=rate)
     
@@ -129,6 +131,7 @@ class AudioProcessingDemo:
     
     def apply_lowpass_filter(self, audio, cutoff_freq=1000):
         """应用低通滤波器（让声音变闷）"""
+        from scipy import signal
         print(f"应用低通滤波器: 截止频率 {cutoff_freq}Hz")
         nyquist = self.sample_rate / 2
         normal_cutoff = cutoff_freq / nyquist
@@ -137,6 +140,7 @@ class AudioProcessingDemo:
     
     def apply_highpass_filter(self, audio, cutoff_freq=2000):
         """应用高通滤波器（让声音变尖）"""
+        from scipy import signal
         print(f"应用高通滤波器: 截止频率 {cutoff_freq}Hz")
         nyquist = self.sample_rate / 2
         normal_cutoff = cutoff_freq / nyquist
@@ -158,6 +162,7 @@ class AudioProcessingDemo:
     
     def apply_noise_reduction(self, audio, reduction_strength=0.8):
         """应用噪声抑制（谱减法）"""
+        import librosa
         print(f"应用噪声抑制，强度: {reduction_strength}")
         
         # 使用谱减法进行噪声抑制
@@ -181,6 +186,7 @@ class AudioProcessingDemo:
     
     def apply_voice_enhancement(self, audio, enhancement_factor=1.5):
         """应用语音增强（提升语音频率）"""
+        from scipy import signal
         print(f"应用语音增强，增强因子: {enhancement_factor}")
         
         # 使用带通滤波器增强语音频率范围（300-3400Hz）
@@ -268,13 +274,13 @@ class AudioProcessingDemo:
         self.noisy_audio = noisy_audio
         
         print("\n🎵 播放原始音频...")
-        ipd.display(ipd.Audio(self.original_audio, rate=self.sample_rate))
+        display_audio(self.original_audio, self.sample_rate)
         
         print("🎵 播放带噪音频（模拟嘈杂环境）...")
-        ipd.display(ipd.Audio(self.noisy_audio, rate=self.sample_rate))
+        display_audio(self.noisy_audio, self.sample_rate)
         
         print("🎵 播放清理后的音频...")
-        ipd.display(ipd.Audio(self.processed_audio, rate=self.sample_rate))
+        display_audio(self.processed_audio, self.sample_rate)
         
         # 分析效果
         self.analyze_noise_cleaning_effect()
@@ -291,6 +297,7 @@ class AudioProcessingDemo:
     
     def analyze_noise_cleaning_effect(self):
         """分析噪声清理效果"""
+        import librosa
         # 确保音频长度一致（截取到最短长度）
         min_length = min(len(self.original_audio), len(self.noisy_audio), len(self.processed_audio))
         orig_audio = self.original_audio[:min_length]
@@ -330,6 +337,12 @@ class AudioProcessingDemo:
     
     def plot_noise_cleaning_comparison(self):
         """绘制噪声清理对比图"""
+        if is_headless():
+            return
+        plt = pyplot()
+        specshow = librosa_display().specshow
+        import librosa
+        from scipy import signal
         # 确保音频长度一致（截取到最短长度）
         min_length = min(len(self.original_audio), len(self.noisy_audio), len(self.processed_audio))
         orig_audio = self.original_audio[:min_length]
@@ -368,21 +381,21 @@ class AudioProcessingDemo:
         # 2. 频谱对比
         plt.subplot(3, 3, 4)
         D_orig = librosa.amplitude_to_db(np.abs(librosa.stft(orig_audio)), ref=np.max)
-        librosa.display.specshow(D_orig, sr=self.sample_rate, x_axis='time', y_axis='hz')
+        specshow(D_orig, sr=self.sample_rate, x_axis='time', y_axis='hz')
         plt.colorbar(format='%+2.0f dB')
         plt.title('原始音频频谱')
         plt.ylim(0, 8000)
         
         plt.subplot(3, 3, 5)
         D_noisy = librosa.amplitude_to_db(np.abs(librosa.stft(noisy_audio)), ref=np.max)
-        librosa.display.specshow(D_noisy, sr=self.sample_rate, x_axis='time', y_axis='hz')
+        specshow(D_noisy, sr=self.sample_rate, x_axis='time', y_axis='hz')
         plt.colorbar(format='%+2.0f dB')
         plt.title('带噪音频频谱')
         plt.ylim(0, 8000)
         
         plt.subplot(3, 3, 6)
         D_clean = librosa.amplitude_to_db(np.abs(librosa.stft(clean_audio)), ref=np.max)
-        librosa.display.specshow(D_clean, sr=self.sample_rate, x_axis='time', y_axis='hz')
+        specshow(D_clean, sr=self.sample_rate, x_axis='time', y_axis='hz')
         plt.colorbar(format='%+2.0f dB')
         plt.title('清理后音频频谱')
         plt.ylim(0, 8000)
@@ -406,7 +419,7 @@ class AudioProcessingDemo:
         # 4. 噪声谱对比
         plt.subplot(3, 3, 8)
         noise_spectrum = np.abs(librosa.stft(noisy_audio - orig_audio))
-        librosa.display.specshow(librosa.amplitude_to_db(noise_spectrum, ref=np.max), 
+        specshow(librosa.amplitude_to_db(noise_spectrum, ref=np.max), 
                                 sr=self.sample_rate, x_axis='time', y_axis='hz')
         plt.colorbar(format='%+2.0f dB')
         plt.title('原始噪声谱')
@@ -414,7 +427,7 @@ class AudioProcessingDemo:
         
         plt.subplot(3, 3, 9)
         clean_noise_spectrum = np.abs(librosa.stft(clean_audio - orig_audio))
-        librosa.display.specshow(librosa.amplitude_to_db(clean_noise_spectrum, ref=np.max), 
+        specshow(librosa.amplitude_to_db(clean_noise_spectrum, ref=np.max), 
                                 sr=self.sample_rate, x_axis='time', y_axis='hz')
         plt.colorbar(format='%+2.0f dB')
         plt.title('残留噪声谱')
@@ -459,16 +472,17 @@ class AudioProcessingDemo:
         print("="*50)
         
         print("🎵 播放原始音频...")
-        ipd.display(ipd.Audio(self.original_audio, rate=self.sample_rate))
+        display_audio(self.original_audio, self.sample_rate)
         
         print("🎵 播放处理后的音频...")
-        ipd.display(ipd.Audio(self.processed_audio, rate=self.sample_rate))
+        display_audio(self.processed_audio, self.sample_rate)
         
         # 计算一些音频特征用于对比
         self.analyze_audio_differences()
     
     def analyze_audio_differences(self):
         """分析音频差异"""
+        import librosa
         orig_rms = np.sqrt(np.mean(self.original_audio**2))
         proc_rms = np.sqrt(np.mean(self.processed_audio**2))
         
@@ -490,6 +504,12 @@ class AudioProcessingDemo:
     
     def plot_comprehensive_comparison(self):
         """绘制全面的音频对比图"""
+        if is_headless():
+            return
+        plt = pyplot()
+        specshow = librosa_display().specshow
+        import librosa
+        from scipy import signal
         if self.original_audio is None or self.processed_audio is None:
             print("请先加载音频并应用处理!")
             return
@@ -520,14 +540,14 @@ class AudioProcessingDemo:
         # 2. 频谱对比
         plt.subplot(3, 2, 3)
         D_orig = librosa.amplitude_to_db(np.abs(librosa.stft(self.original_audio)), ref=np.max)
-        librosa.display.specshow(D_orig, sr=self.sample_rate, x_axis='time', y_axis='hz')
+        specshow(D_orig, sr=self.sample_rate, x_axis='time', y_axis='hz')
         plt.colorbar(format='%+2.0f dB')
         plt.title('原始音频频谱')
         plt.ylim(0, 8000)
         
         plt.subplot(3, 2, 4)
         D_proc = librosa.amplitude_to_db(np.abs(librosa.stft(self.processed_audio)), ref=np.max)
-        librosa.display.specshow(D_proc, sr=self.sample_rate, x_axis='time', y_axis='hz')
+        specshow(D_proc, sr=self.sample_rate, x_axis='time', y_axis='hz')
         plt.colorbar(format='%+2.0f dB')
         plt.title('处理后音频频谱')
         plt.ylim(0, 8000)
@@ -549,7 +569,7 @@ class AudioProcessingDemo:
         # 4. MFCC特征对比（分别显示）
         plt.subplot(3, 2, 6)
         mfcc_orig = librosa.feature.mfcc(y=self.original_audio, sr=self.sample_rate, n_mfcc=13)
-        librosa.display.specshow(mfcc_orig, sr=self.sample_rate, x_axis='time')
+        specshow(mfcc_orig, sr=self.sample_rate, x_axis='time')
         plt.colorbar()
         plt.title('原始音频MFCC')
         
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+批量特征提取脚本
+遍历音频目录，用 VoicePreprocessing 的流程（预加重 → MFCC）在多进程中提取特征，
+每个输入文件输出一个 .npy 特征文件（形状 (帧数, n_mfcc)），已是最新的输出会被跳过
+
+用法示例:
+    python batch_featurize.py corpus/ features/ --workers 32
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from atomic_write import atomic_write
+from audio_loading import load_audio
+from lazy_imports import set_headless
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg')
+CONFIG_FILENAME = 'featurize_config.json'
+
+# 每个工作进程各自持有的预处理对象
+_preprocessor = None
+_config = None
+
+
+def _load_preprocessing_class():
+    """从 02_mfcc.py 加载 VoicePreprocessing（文件名以数字开头，不能直接 import）"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '02_mfcc.py')
+    spec = importlib.util.spec_from_file_location('mfcc_preprocessing', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.VoicePreprocessing
+
+
+def find_audio_files(input_dir, extensions=AUDIO_EXTENSIONS):
+    """递归查找目录下的音频文件，返回排好序的路径列表"""
+    paths = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(extensions):
+                paths.append(os.path.join(root, name))
+    return paths
+
+
+def output_path_for(input_path, input_dir, output_dir):
+    """输入文件对应的特征文件路径（保持相对目录结构）"""
+    relative = os.path.relpath(input_path, input_dir)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + '.npy')
+
+
+def is_up_to_date(input_path, output_path):
+    """输出文件存在且不比输入文件旧"""
+    try:
+        return os.stat(output_path).st_mtime_ns >= os.stat(input_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def _init_preprocessor(config):
+    """创建预处理对象，之后每个文件都复用它"""
+    global _preprocessor, _config
+    _config = config
+    _preprocessor = _load_preprocessing_class()(sample_rate=config['sample_rate'])
+
+
+def _init_worker(config):
+    """工作进程初始化：工作进程不绘图也不访问音频设备，开启无界面模式"""
+    set_headless(True)
+    _init_preprocessor(config)
+
+
+def _featurize_file(job):
+    """提取单个文件的特征并写盘，返回 (输入路径, 音频时长, 错误信息)"""
+    input_path, output_path = job
+    try:
+        audio, _ = load_audio(input_path, _config['sample_rate'])
+        emphasized = _preprocessor.preemphasis(audio, _config['alpha'], out=audio)
+        mfccs = _preprocessor.extract_mfcc(emphasized, _config['n_mfcc'],
+                                           _config['n_fft'], _config['hop_length'])
+
+        # 先写临时文件再重命名，中断时不会留下半个特征文件
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with atomic_write(output_path) as f:
+            np.save(f, np.ascontiguousarray(mfccs.T))
+        return input_path, len(audio) / _config['sample_rate'], None
+    except Exception as e:
+        return input_path, 0.0, f"{type(e).__name__}: {e}"
+
+
+def _read_config(output_dir):
+    try:
+        with open(os.path.join(output_dir, CONFIG_FILENAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def featurize_directory(input_dir, output_dir, workers=None, sample_rate=22050, n_mfcc=13,
+                        n_fft=2048, hop_length=512, alpha=0.97, force=False, verbose=True):
+    """批量提取目录下所有音频的MFCC特征，返回统计信息字典"""
+    config = {'sample_rate': sample_rate, 'n_mfcc': n_mfcc, 'n_fft': n_fft,
+              'hop_length': hop_length, 'alpha': alpha}
+    workers = workers or os.cpu_count() or 1
+
+    # 特征参数变化时，旧的输出全部视为过期
+    os.makedirs(output_dir, exist_ok=True)
+    if _read_config(output_dir) != config:
+        force = True
+
+    jobs = []
+    skipped = 0
+    for input_path in find_audio_files(input_dir):
+        output_path = output_path_for(input_path, input_dir, output_dir)
+        if not force and is_up_to_date(input_path, output_path):
+            skipped += 1
+        else:
+            jobs.append((input_path, output_path))
+    # 大文件先处理，避免最后只剩一个进程在处理长音频
+    jobs.sort(key=lambda job: os.path.getsize(job[0]), reverse=True)
+
+    if verbose:
+        print(f"待处理 {len(jobs)} 个文件，跳过 {skipped} 个已是最新的文件，"
+              f"工作进程数: {workers}")
+
+    start = time.perf_counter()
+    audio_seconds = 0.0
+    failures = []
+    if workers == 1 or len(jobs) <= 1:
+        # 在调用方的进程中处理，不改变其无界面模式设置
+        _init_preprocessor(config)
+        results = map(_featurize_file, jobs)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(config,))
+        chunksize = max(1, min(16, len(jobs) // (workers * 4)))
+        results = executor.map(_featurize_file, jobs, chunksize=chunksize)
+    try:
+        for done, (input_path, duration, error) in enumerate(results, 1):
+            if error is None:
+                audio_seconds += duration
+            else:
+                failures.append((input_path, error))
+                if verbose:
+                    print(f"❌ {input_path}: {error}")
+            if verbose and done % 100 == 0:
+                print(f"已完成 {done}/{len(jobs)}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    elapsed = time.perf_counter() - start
+
+    # 记录本次的特征参数；失败的文件没有输出，下次运行时会重新处理
+    with open(os.path.join(output_dir, CONFIG_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+    processed = len(jobs) - len(failures)
+    stats = {
+        'processed': processed,
+        'skipped': skipped,
+        'failed': len(failures),
+        'failures': failures,
+        'audio_seconds': audio_seconds,
+        'elapsed': elapsed,
+        'files_per_second': processed / elapsed if elapsed > 0 else 0.0,
+        'realtime_factor': audio_seconds / elapsed if elapsed > 0 else 0.0,
+    }
+    if verbose:
+        print(f"✅ 完成: 处理 {processed} 个文件（{audio_seconds / 3600:.2f} 小时音频），"
+              f"失败 {len(failures)} 个，耗时 {elapsed:.1f} 秒")
+        print(f"吞吐量: {stats['files_per_second']:.1f} 文件/秒，"
+              f"{stats['realtime_factor']:.1f} 倍实时")
+    return stats
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="批量提取音频目录的MFCC特征")
+    parser.add_argument("input_dir", help="音频文件所在目录（递归查找）")
+    parser.add_argument("output_dir", help="特征文件输出目录")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数（默认CPU核数）")
+    parser.add_argument("--sample-rate", type=int, default=22050, help="采样率")
+    parser.add_argument("--n-mfcc", type=int, default=13, help="MFCC系数个数")
+    parser.add_argument("--n-fft", type=int, default=2048, help="FFT点数")
+    parser.add_argument("--hop-length", type=int, default=512, help="帧移（采样点）")
+    parser.add_argument("--alpha", type=float, default=0.97, help="预加重系数")
+    parser.add_argument("--force", action="store_true", help="忽略已有输出，全部重新提取")
+
+    args = parser.parse_args()
+    set_headless(True)
+
+    stats = featurize_directory(args.input_dir, args.output_dir, workers=args.workers,
+                                sample_rate=args.sample_rate, n_mfcc=args.n_mfcc,
+                                n_fft=args.n_fft, hop_length=args.hop_length,
+                                alpha=args.alpha, force=args.force)
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+声学模型性能测试
+在合成语料上按语料规模、音素数、HMM状态数和MFCC维度组合测试 AcousticModel 各阶段：
+特征提取（逐段 / 批量）、训练、识别、保存和加载，记录耗时、每秒帧数、实时倍数和内存峰值，
+结果写成JSON；给出基准结果时逐项比较，耗时变慢超过阈值的标记为性能回退（返回码1）
+
+用法示例:
+    python benchmark_acoustic_model.py --utterances 20 50 --phonemes 5 20 --output bench.json
+    python benchmark_acoustic_model.py --baseline bench.json --output new.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from lazy_imports import set_headless
+from synthetic_corpus import SyntheticCorpus
+
+HOP_LENGTH = 512
+
+
+def _load_acoustic_model_class():
+    """从 03_gmm_hmm.py 加载 AcousticModel（文件名以数字开头，不能直接 import）"""
+    if 'gmm_hmm' not in sys.modules:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '03_gmm_hmm.py')
+        spec = importlib.util.spec_from_file_location('gmm_hmm', path)
+        module = importlib.util.module_from_spec(spec)
+        # 注册模块名，训练时进程池才能传递模型对象
+        sys.modules['gmm_hmm'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['gmm_hmm'].AcousticModel
+
+
+def _current_rss():
+    """当前常驻内存（字节），无 /proc 的系统退回进程生命周期内的峰值"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class PeakRSSMonitor:
+    """在后台线程中定时采样常驻内存，记录一个阶段内的峰值"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start_rss = self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, _current_rss())
+
+    def __enter__(self):
+        self.start_rss = self.peak_rss = _current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, _current_rss())
+        return False
+
+
+def _measure(func, frames, audio_seconds, repeat=1, verbose=False):
+    """
+    运行一个阶段 repeat 次，取最短耗时，返回 (结果, 指标字典)
+    frames/audio_seconds 为该阶段处理的特征帧数和音频时长，用于计算吞吐量
+    """
+    best = None
+    result = None
+    peak = start = 0
+    for _ in range(repeat):
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with output, PeakRSSMonitor() as monitor:
+            begin = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - begin
+        best = elapsed if best is None else min(best, elapsed)
+        peak = max(peak, monitor.peak_rss)
+        start = monitor.start_rss
+    return result, {
+        'wall_time': best,
+        'frames': frames,
+        'frames_per_second': frames / best if best > 0 else None,
+        'realtime_factor': audio_seconds / best if best > 0 and audio_seconds else None,
+        'peak_rss_mb': peak / 2 ** 20,
+        'rss_increase_mb': (peak - start) / 2 ** 20,
+    }
+
+
+def run_config(AcousticModel, n_utterances, n_phonemes, n_states, n_mfcc, delta_order=2,
+               n_predict=100, duration=0.5, sample_rate=22050, n_jobs=1, repeat=1, seed=0,
+               verbose=False):
+    """测试一组参数，返回 {'config': 参数, 'stages': {阶段: 指标}, 'accuracy': 识别准确率}"""
+    config = {'utterances_per_phoneme': n_utterances, 'phonemes': n_phonemes,
+              'hmm_states': n_states, 'n_mfcc': n_mfcc, 'delta_order': delta_order,
+              'duration': duration, 'sample_rate': sample_rate, 'n_jobs': n_jobs}
+    corpus_kwargs = dict(units=n_phonemes, duration=duration, duration_spread=0.3,
+                         snr_db=(15.0, 30.0), sample_rate=sample_rate)
+    train = SyntheticCorpus(utterances_per_unit=n_utterances, seed=seed, **corpus_kwargs)
+    train_audio = list(train.iter_units(n_workers=1))
+    per_unit = max(1, -(-n_predict // n_phonemes))
+    test = SyntheticCorpus(utterances_per_unit=per_unit, seed=seed + 1, **corpus_kwargs)
+    test_clips = [(unit, audio) for unit, audios in test.iter_units(n_workers=1)
+                  for audio in audios][:max(n_predict, 1)]
+
+    all_audios = [audio for _, audios in train_audio for audio in audios]
+    train_seconds = sum(len(audio) for audio in all_audios) / sample_rate
+    train_frames = sum(len(audio) // HOP_LENGTH + 1 for audio in all_audios)
+    test_seconds = sum(len(audio) for _, audio in test_clips) / sample_rate
+    test_frames = sum(len(audio) // HOP_LENGTH + 1 for _, audio in test_clips)
+
+    def new_model():
+        return AcousticModel(n_components=n_states, n_mfcc=n_mfcc, delta_order=delta_order)
+
+    stages = {}
+    model = new_model()
+    _, stages['extract_features'] = _measure(
+        lambda: [model.extract_features(audio, sample_rate) for audio in all_audios],
+        train_frames, train_seconds, repeat, verbose)
+
+    def extract_batch():
+        return {unit: model.extract_features_batch(audios, sample_rate)[0]
+                for unit, audios in train_audio}
+    training_data, stages['extract_features_batch'] = _measure(
+        extract_batch, train_frames, train_seconds, repeat, verbose)
+
+    def train_models():
+        trained = new_model()
+        trained.train_models(training_data, n_jobs=n_jobs)
+        return trained
+    model, stages['train_models'] = _measure(train_models, train_frames, train_seconds,
+                                             repeat, verbose)
+
+    predictions, stages['predict'] = _measure(
+        lambda: [model.predict(audio, sample_rate)[0] for _, audio in test_clips],
+        test_frames, test_seconds, repeat, verbose)
+    accuracy = float(np.mean([pred == unit for pred, (unit, _) in zip(predictions, test_clips)]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.acm')
+        _, stages['save_models'] = _measure(lambda: model.save_models(path), 0, 0,
+                                            repeat, verbose)
+        stages['save_models']['file_size_mb'] = os.path.getsize(path) / 2 ** 20
+
+        def load_models():
+            loaded = new_model()
+            loaded.load_models(path)
+            return loaded
+        _, stages['load_models'] = _measure(load_models, 0, 0, repeat, verbose)
+
+    curves = getattr(model, 'training_curves', {}).values()
+    return {'config': config, 'stages': stages, 'accuracy': accuracy,
+            'hmm_iterations': float(np.mean([c['iterations'] for c in curves])) if curves else None,
+            'train_audio_seconds': train_seconds, 'test_audio_seconds': test_seconds}
+
+
+def run_benchmark(utterances=(20,), phonemes=(5,), states=(3,), mfccs=(13,), **kwargs):
+    """按所有参数组合依次测试，返回可写成JSON的结果字典"""
+    AcousticModel = _load_acoustic_model_class()
+    # 训练用到的库只在第一次训练时导入，先导入以免计入第一组参数的训练耗时
+    import hmmlearn.hmm  # noqa: F401
+    import sklearn.mixture  # noqa: F401
+    results = []
+    for n_utterances, n_phonemes, n_states, n_mfcc in itertools.product(
+            utterances, phonemes, states, mfccs):
+        result = run_config(AcousticModel, n_utterances, n_phonemes, n_states, n_mfcc, **kwargs)
+        results.append(result)
+        print_result(result)
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+
+
+def _config_key(config):
+    return json.dumps(config, sort_keys=True)
+
+
+def compare(current, baseline, threshold=0.2, min_seconds=0.005):
+    """
+    与基准结果逐项比较耗时（只比较参数完全相同的组合）
+    变慢超过 threshold（相对）且超过 min_seconds（绝对）的记为回退
+    返回 [{'config', 'stage', 'baseline', 'current', 'change', 'regression'}]
+    """
+    baseline_results = {_config_key(r['config']): r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        reference = baseline_results.get(_config_key(result['config']))
+        if reference is None:
+            continue
+        for stage, metrics in result['stages'].items():
+            if stage not in reference['stages']:
+                continue
+            old = reference['stages'][stage]['wall_time']
+            new = metrics['wall_time']
+            change = (new - old) / old if old > 0 else 0.0
+            rows.append({'config': result['config'], 'stage': stage, 'baseline': old,
+                         'current': new, 'change': change,
+                         'regression': change > threshold and new - old > min_seconds})
+    return rows
+
+
+def _format_config(config):
+    return (f"{config['phonemes']}音素×{config['utterances_per_phoneme']}段 "
+            f"{config['hmm_states']}状态 {config['n_mfcc']}维MFCC")
+
+
+def print_result(result):
+    """打印一组参数各阶段的指标"""
+    print(f"\n{_format_config(result['config'])}（训练音频 {result['train_audio_seconds']:.1f} 秒，"
+          f"识别准确率 {result['accuracy']:.1%}，HMM平均迭代 {result['hmm_iterations'] or 0:.1f} 次）")
+    print(f"{'阶段':<24}{'耗时(秒)':>10}{'帧/秒':>12}{'实时倍数':>10}{'内存峰值(MB)':>14}")
+    for stage, metrics in result['stages'].items():
+        fps = metrics['frames_per_second']
+        rtf = metrics['realtime_factor']
+        print(f"{stage:<24}{metrics['wall_time']:>10.4f}"
+              f"{(f'{fps:.0f}' if fps else '-'):>12}"
+              f"{(f'{rtf:.1f}' if rtf else '-'):>10}"
+              f"{metrics['peak_rss_mb']:>14.1f}")
+
+
+def print_comparison(rows):
+    """打印与基准的比较结果"""
+    if not rows:
+        print("\n基准结果中没有相同参数的组合，无法比较")
+        return
+    print(f"\n{'参数':<36}{'阶段':<24}{'基准(秒)':>10}{'当前(秒)':>10}{'变化':>9}")
+    for row in rows:
+        flag = '  ← 回退' if row['regression'] else ''
+        print(f"{_format_config(row['config']):<36}{row['stage']:<24}{row['baseline']:>10.4f}"
+              f"{row['current']:>10.4f}{row['change']:>+9.1%}{flag}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="声学模型各阶段性能测试")
+    parser.add_argument("--utterances", type=int, nargs='+', default=[20],
+                        help="每个音素的训练语音段数（可给多个）")
+    parser.add_argument("--phonemes", type=int, nargs='+', default=[5], help="音素数（可给多个）")
+    parser.add_argument("--states", type=int, nargs='+', default=[3], help="HMM状态数（可给多个）")
+    parser.add_argument("--mfcc", type=int, nargs='+', default=[13], help="MFCC维度（可给多个）")
+    parser.add_argument("--delta-order", type=int, default=2, help="差分阶数")
+    parser.add_argument("--predict", type=int, default=100, help="识别测试的语音段数")
+    parser.add_argument("--duration", type=float, default=0.5, help="平均语音时长（秒）")
+    parser.add_argument("--jobs", type=int, default=1, help="训练进程数")
+    parser.add_argument("--repeat", type=int, default=1, help="每个阶段重复次数，取最短耗时")
+    parser.add_argument("--output", help="结果JSON文件")
+    parser.add_argument("--baseline", help="基准结果JSON文件，给出时比较并标记回退")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="耗时增加超过该比例视为回退（默认0.2即20%%）")
+    parser.add_argument("--verbose", action="store_true", help="显示模型训练等阶段的输出")
+
+    args = parser.parse_args()
+    set_headless(True)
+
+    report = run_benchmark(args.utterances, args.phonemes, args.states, args.mfcc,
+                           delta_order=args.delta_order, n_predict=args.predict,
+                           duration=args.duration, n_jobs=args.jobs, repeat=args.repeat,
+                           verbose=args.verbose)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.threshold)
+        print_comparison(rows)
+        if any(row['regression'] for row in rows):
+            print("\n发现性能回退!")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+训练语料清单
+记录语料目录下每个音频文件的相对路径、音素标签（所在的一级子目录名）、大小、修改时间、
+内容哈希、采样率和时长，保存为JSON。再次扫描时大小和修改时间都没变的文件直接沿用原记录，
+只对新增或修改的文件读取文件头并计算哈希，因此大语料启动时不需要重新打开所有音频；
+按时长安排任务也只需要读清单
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from atomic_write import atomic_write
+
+# 清单格式版本，字段含义改变时递增，使旧清单整体重建
+MANIFEST_VERSION = 1
+MANIFEST_NAME = '.manifest.json'
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """计算文件内容的哈希"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _audio_info(path):
+    """只读文件头获取 (采样率, 时长秒)，无法识别的格式返回 (None, None)"""
+    import soundfile as sf
+    try:
+        info = sf.info(path)
+    except (sf.LibsndfileError, RuntimeError):
+        return None, None
+    return info.samplerate, info.frames / info.samplerate
+
+
+class DatasetManifest:
+    """
+    语料目录清单
+
+    root: 语料根目录，结构为 root/<音素>/<音频文件>
+    path: 清单文件路径，默认保存在 root/.manifest.json
+    """
+
+    def __init__(self, root, path=None, extensions=('.wav', '.flac', '.ogg')):
+        self.root = root
+        self.path = path or os.path.join(root, MANIFEST_NAME)
+        self.extensions = tuple(extensions)
+        self.entries = {}  # 相对路径 -> 文件记录
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.entries = data['entries']
+
+    def save(self):
+        """写入清单文件（先写临时文件再重命名）"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with atomic_write(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f,
+                      ensure_ascii=False, sort_keys=True)
+
+    def _scan(self, directory='', phoneme=None):
+        """用 os.scandir 递归遍历，产出 (相对路径, 音素, stat)"""
+        with os.scandir(os.path.join(self.root, directory)) as it:
+            for entry in it:
+                relpath = os.path.join(directory, entry.name)
+                if entry.is_dir():
+                    yield from self._scan(relpath, phoneme or entry.name)
+                elif entry.name.lower().endswith(self.extensions):
+                    yield relpath.replace(os.sep, '/'), phoneme, entry.stat()
+
+    def _describe(self, relpath, phoneme, stat):
+        path = self.abspath(relpath)
+        sample_rate, duration = _audio_info(path)
+        return {'phoneme': phoneme, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                'hash': file_hash(path), 'sample_rate': sample_rate, 'duration': duration}
+
+    def update(self, n_workers=None):
+        """
+        重新扫描语料目录，只处理新增和修改的文件
+        返回 {'added': [...], 'modified': [...], 'removed': [...], 'unchanged': 数量}
+        """
+        changed = []
+        seen = set()
+        for relpath, phoneme, stat in self._scan():
+            seen.add(relpath)
+            entry = self.entries.get(relpath)
+            if (entry is None or entry['size'] != stat.st_size
+                    or entry['mtime_ns'] != stat.st_mtime_ns or entry['phoneme'] != phoneme):
+                changed.append((relpath, phoneme, stat))
+
+        # 读文件头和计算哈希主要是I/O，用线程池并行
+        n_workers = n_workers or min(8, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            described = list(executor.map(lambda job: self._describe(*job), changed))
+
+        stats = {'added': [], 'modified': [], 'removed': [], 'unchanged': 0}
+        for (relpath, _, _), entry in zip(changed, described):
+            stats['modified' if relpath in self.entries else 'added'].append(relpath)
+            self.entries[relpath] = entry
+        for relpath in set(self.entries) - seen:
+            del self.entries[relpath]
+            stats['removed'].append(relpath)
+        stats['unchanged'] = len(seen) - len(changed)
+        return stats
+
+    def abspath(self, relpath):
+        return os.path.join(self.root, *relpath.split('/'))
+
+    def by_phoneme(self):
+        """按音素分组的相对路径 {音素: [路径, ...]}（均已排序）"""
+        groups = {}
+        for relpath in sorted(self.entries):
+            phoneme = self.entries[relpath]['phoneme']
+            if phoneme is not None:
+                groups.setdefault(phoneme, []).append(relpath)
+        return groups
+
+    def by_duration(self, relpaths=None):
+        """按时长从长到短排列的相对路径（时长未知的排在最后），用于安排并行任务"""
+        relpaths = sorted(self.entries) if relpaths is None else relpaths
+        return sorted(relpaths, key=lambda p: -(self.entries[p]['duration'] or 0.0))
+
+    @property
+    def total_duration(self):
+        """语料总时长（秒）"""
+        return sum(entry['duration'] or 0.0 for entry in self.entries.values())
+
+    def content_hash(self):
+        """整个语料的内容哈希，任何文件增删改都会改变它，可作为派生数据的版本标识"""
+        digest = hashlib.blake2b(digest_size=20)
+        for relpath in sorted(self.entries):
+            entry = self.entries[relpath]
+            digest.update(f"{relpath}\0{entry['phoneme']}\0{entry['hash']}\n".encode())
+        return digest.hexdigest()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, relpath):
+        return relpath in self.entries
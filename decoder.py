@@ -0,0 +1,132 @@
+"""
+连续音素识别解码器
+用所有音素HMM构成音素环（音素在其最后一个状态结束，之后可以接任一其他音素），
+做令牌传递的 Viterbi 解码，
+输出带时间对齐的音素序列。每帧只保留束宽内、且不超过 max_active 个的活跃状态，
+只对这些状态计算高斯似然，因此计算量与语音长度成线性、受束宽限制
+"""
+
+import numpy as np
+
+
+class PhoneLoopDecoder:
+    """
+    音素环 Viterbi 解码器
+
+    scorer: StackedHMMScorer，提供打包好的HMM参数
+    beam: 束宽（对数似然），得分低于当前最优减 beam 的令牌被剪掉
+    max_active: 直方图剪枝，每帧最多保留的活跃状态数
+    insertion_penalty: 每进入一个新音素扣除的对数得分，越大输出的音素越少
+    """
+
+    def __init__(self, scorer, beam=60.0, max_active=500, insertion_penalty=10.0):
+        self.scorer = scorer
+        self.beam = beam
+        self.max_active = max_active
+        self.insertion_penalty = insertion_penalty
+
+        n_states = scorer.n_states
+        with np.errstate(divide='ignore'):
+            self.log_transmat = np.log(scorer.transmat)
+        log_startprob = np.asarray(scorer.log_startprob).reshape(-1)
+        # 新音素可以从起始概率非零的状态进入（展平后的状态编号 = 模型编号 * 状态数 + 状态）
+        self.entry_states = np.flatnonzero(np.isfinite(log_startprob))
+        self.entry_scores = log_startprob[self.entry_states]
+        self.entry_models = self.entry_states // n_states
+        # 各模型只能从最后一个状态离开
+        self.final_states = np.asarray(scorer.n_states_per_model, dtype=np.int64) - 1
+        self.n_states = n_states
+
+    def decode(self, features):
+        """
+        解码一段已标准化的特征 (帧数, 特征维度)
+        返回 (音素片段列表 [(音素, 起始帧, 结束帧)]（结束帧包含在内）, 总对数得分)
+        """
+        features = np.asarray(features, dtype=np.float64)
+        n_frames = len(features)
+        if n_frames == 0:
+            return [], 0.0
+        stacked = np.concatenate([features ** 2, features], axis=1)
+        weights, bias = self.scorer.weights, self.scorer.bias
+        n_states = self.n_states
+
+        # 音素边界记录：(音素编号, 起始帧, 结束帧, 前一条记录)，每帧最多新增两条
+        links = []
+
+        states = scores = seg_start = prev_link = None
+        for t in range(n_frames):
+            if t == 0:
+                cand_states = self.entry_states
+                cand_scores = self.entry_scores.copy()
+                cand_start = np.zeros(len(cand_states), dtype=np.int64)
+                cand_prev = np.full(len(cand_states), -1, dtype=np.int64)
+            else:
+                # 音素内转移：每个活跃令牌向同一模型内的所有状态传递
+                models, from_states = np.divmod(states, n_states)
+                within = scores[:, None] + self.log_transmat[models, from_states]
+                within_states = (models * n_states)[:, None] + np.arange(n_states)
+                n_succ = n_states
+
+                # 音素间转移：处于最后一个状态的令牌结束当前音素，进入其他音素的起始状态。
+                # 每个模型的最后一个状态至多有一个令牌，取得分最高的两个，
+                # 最优令牌所在的音素改由次优令牌进入，避免同一音素连续出现
+                exits = np.flatnonzero(from_states == self.final_states[models])
+                exits = exits[np.argsort(-scores[exits], kind='stable')[:2]]
+                entry = np.full(len(self.entry_states), -np.inf)
+                entry_prev = np.full(len(self.entry_states), -1, dtype=np.int64)
+                for rank, token in enumerate(exits):
+                    links.append((int(models[token]), int(seg_start[token]), t - 1,
+                                  int(prev_link[token])))
+                    target = (self.entry_models != models[token] if rank == 0
+                              else self.entry_models == models[exits[0]])
+                    entry[target] = scores[token] - self.insertion_penalty
+                    entry_prev[target] = len(links) - 1
+                entry += self.entry_scores
+                cand_states = np.concatenate([within_states.reshape(-1), self.entry_states])
+                cand_scores = np.concatenate([within.reshape(-1), entry])
+                cand_start = np.concatenate([np.repeat(seg_start, n_succ),
+                                             np.full(len(entry), t, dtype=np.int64)])
+                cand_prev = np.concatenate([np.repeat(prev_link, n_succ), entry_prev])
+
+                # 同一状态有多个前驱时只保留得分最高的（Viterbi 取最大）
+                order = np.lexsort((-cand_scores, cand_states))
+                cand_states = cand_states[order]
+                first = np.ones(len(order), dtype=bool)
+                first[1:] = cand_states[1:] != cand_states[:-1]
+                order = order[first]
+                cand_states = cand_states[first]
+                cand_scores = cand_scores[order]
+                cand_start = cand_start[order]
+                cand_prev = cand_prev[order]
+
+            # 计算高斯似然之前先按束宽剪掉明显落后的候选
+            keep = cand_scores >= cand_scores.max() - self.beam
+            cand_states, cand_scores = cand_states[keep], cand_scores[keep]
+            cand_start, cand_prev = cand_start[keep], cand_prev[keep]
+
+            # 只对保留的状态计算发射对数似然
+            cand_scores = cand_scores + stacked[t] @ weights[:, cand_states] + bias[cand_states]
+
+            # 束剪枝 + 直方图剪枝
+            keep = np.flatnonzero(cand_scores >= cand_scores.max() - self.beam)
+            if len(keep) > self.max_active:
+                keep = keep[np.argpartition(-cand_scores[keep], self.max_active - 1)
+                            [:self.max_active]]
+            states, scores = cand_states[keep], cand_scores[keep]
+            seg_start, prev_link = cand_start[keep], cand_prev[keep]
+
+        # 从最后一个状态上得分最高的令牌回溯（都被剪掉时退回所有令牌）
+        models, last_states = np.divmod(states, n_states)
+        final = np.flatnonzero(last_states == self.final_states[models])
+        if len(final) == 0:
+            final = np.arange(len(states))
+        best = int(final[np.argmax(scores[final])])
+        segments = [(int(states[best] // n_states), int(seg_start[best]), n_frames - 1)]
+        link = int(prev_link[best])
+        while link >= 0:
+            model, start, end, link = links[link]
+            segments.append((model, start, end))
+        segments.reverse()
+
+        phonemes = self.scorer.phonemes
+        return [(phonemes[m], start, end) for m, start, end in segments], float(scores[best])
@@ -0,0 +1,143 @@
+"""
+MFCC特征磁盘缓存
+以音频内容和特征配置的哈希为键，把特征保存为可内存映射的 .npy 文件，
+超过容量上限时按最近最少使用（LRU）的顺序淘汰
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from atomic_write import atomic_write
+
+# 缓存格式版本，特征计算方式改变时递增，使旧缓存自动失效
+CACHE_VERSION = 1
+
+
+class FeatureCache:
+    def __init__(self, cache_dir='cache/features', max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # 键 -> 文件大小，按最近使用时间从旧到新排列
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._scan()
+
+    def _scan(self):
+        """扫描缓存目录，按文件修改时间恢复LRU顺序"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.npy'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.npy')
+
+    @staticmethod
+    def make_key(audio, config):
+        """由音频数据和特征配置计算缓存键"""
+        audio = np.ascontiguousarray(audio)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(json.dumps({'version': CACHE_VERSION, **config},
+                                 sort_keys=True).encode())
+        digest.update(f'{audio.dtype.str}{audio.shape}'.encode())
+        digest.update(audio.data)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_file_key(content_hash, config):
+        """由音频文件内容哈希和特征配置计算缓存键，命中时无需解码音频"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(json.dumps({'version': CACHE_VERSION, **config},
+                                 sort_keys=True).encode())
+        digest.update(f'file:{content_hash}'.encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """读取缓存的特征（只读内存映射），不存在时返回 None"""
+        path = self._path(key)
+        try:
+            features = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            self._forget(key)
+            return None
+
+        # 更新修改时间，使下次启动时也能恢复正确的LRU顺序；
+        # 只读或他人共享的缓存目录不允许修改时，仅在内存中更新顺序
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self.hits += 1
+        return features
+
+    def put(self, key, features):
+        """写入特征，必要时淘汰最久未使用的条目"""
+        features = np.ascontiguousarray(features)
+        # 先写临时文件再重命名，避免其他进程读到写了一半的文件
+        with atomic_write(self._path(key)) as f:
+            np.save(f, features)
+
+        self._forget(key)
+        size = os.path.getsize(self._path(key))
+        self._entries[key] = size
+        self._total_bytes += size
+        self._evict()
+
+    def get_or_compute(self, audio, config, compute):
+        """命中缓存时直接返回，否则调用 compute() 计算并写入缓存"""
+        key = self.make_key(audio, config)
+        features = self.get(key)
+        if features is None:
+            features = compute()
+            self.put(key, features)
+        return features
+
+    def _forget(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def clear(self):
+        """删除所有缓存条目"""
+        for key in list(self._entries):
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        self._entries.clear()
+        self._total_bytes = 0
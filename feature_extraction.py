@@ -0,0 +1,777 @@
+"""
+语音特征提取公共模块
+供 02_mfcc.py 和 03_gmm_hmm.py 共用的分帧、加窗、MFCC等前端处理函数
+MFCC默认由纯NumPy实现计算，不依赖 librosa（也就没有 numba 的编译开销）
+"""
+
+from functools import cached_property, lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 分帧时支持的尾部补齐方式（None 表示丢弃不完整的尾帧）
+PAD_MODES = (None, 'constant', 'edge', 'reflect')
+
+# 最多缓存的特征计算方案个数
+PLAN_CACHE_SIZE = 32
+
+# 前端处理的默认数据类型，float32 比 float64 节省一半内存和带宽
+DEFAULT_DTYPE = np.float32
+
+# 可选的MFCC计算后端：numpy 为内置实现，librosa 调用 librosa.feature.mfcc
+MFCC_BACKENDS = ('numpy', 'librosa')
+
+
+def resolve_dtype(dtype=None):
+    """确定前端处理使用的数据类型，None 表示使用默认类型"""
+    return np.dtype(DEFAULT_DTYPE if dtype is None else dtype)
+
+
+def get_window(window_type, frame_length, dtype=None):
+    """生成窗函数"""
+    if window_type == 'hamming':
+        window = np.hamming(frame_length)
+    elif window_type == 'hann':
+        window = np.hanning(frame_length)
+    else:  # rectangular
+        window = np.ones(frame_length)
+    return window.astype(resolve_dtype(dtype), copy=False)
+
+
+def preemphasis(signal, alpha=0.97, out=None, dtype=None):
+    """
+    预加重滤波 y[n] = x[n] - alpha * x[n-1]
+
+    结果按 dtype 策略输出，可通过 out 写入预分配数组（允许与输入为同一数组）。
+    """
+    dtype = resolve_dtype(dtype) if out is None else out.dtype
+    signal = np.asarray(signal, dtype=dtype)
+    if out is None:
+        out = np.empty_like(signal)
+    elif out.shape != signal.shape:
+        raise ValueError(f"输出数组形状应为 {signal.shape}，实际为 {out.shape}")
+    if len(signal) == 0:
+        return out
+
+    if np.shares_memory(out, signal):
+        # 原地计算时需要先保留原始的前一个样本
+        np.subtract(signal[1:], alpha * signal[:-1], out=out[1:])
+    else:
+        out[0] = signal[0]
+        np.multiply(signal[:-1], alpha, out=out[1:])
+        np.subtract(signal[1:], out[1:], out=out[1:])
+    return out
+
+
+def num_frames(signal_length, frame_length, frame_step, pad_mode=None):
+    """计算信号能分出的帧数"""
+    if pad_mode is None:
+        if signal_length < frame_length:
+            return 0
+        return 1 + (signal_length - frame_length) // frame_step
+    if signal_length == 0:
+        return 0
+    if signal_length <= frame_length:
+        return 1
+    # 向上取整，保证尾部不完整的部分也能成为一帧
+    return 1 + -(-(signal_length - frame_length) // frame_step)
+
+
+def frame_signal(signal, frame_length, frame_step, pad_mode=None):
+    """
+    分帧处理（零拷贝）
+
+    返回形状为 (帧数, frame_length) 的只读跨步视图，不复制信号数据。
+    frame_length 和 frame_step 以样本数为单位。
+    pad_mode 为 None 时丢弃不完整的尾帧；为 'constant'、'edge' 或
+    'reflect' 时按 np.pad 的方式补齐尾部，此时需要复制一次信号。
+    """
+    if pad_mode not in PAD_MODES:
+        raise ValueError(f"不支持的补齐方式: {pad_mode}")
+    if frame_length <= 0 or frame_step <= 0:
+        raise ValueError("帧长和帧移必须为正整数")
+
+    signal = np.asarray(signal)
+    n_frames = num_frames(len(signal), frame_length, frame_step, pad_mode)
+    if n_frames == 0:
+        return np.empty((0, frame_length), dtype=signal.dtype)
+
+    pad_length = (n_frames - 1) * frame_step + frame_length - len(signal)
+    if pad_length > 0:
+        signal = np.pad(signal, (0, pad_length), mode=pad_mode)
+
+    # sliding_window_view 默认返回只读视图
+    return sliding_window_view(signal, frame_length)[::frame_step][:n_frames]
+
+
+def frame_and_window(signal, frame_length, frame_step, window, out=None, pad_mode=None):
+    """
+    分帧并加窗
+
+    直接把加窗结果写入一个预分配的二维数组 out，避免先生成帧再复制。
+    """
+    frames = frame_signal(signal, frame_length, frame_step, pad_mode)
+    window = np.asarray(window)
+    if window.shape != (frame_length,):
+        raise ValueError(f"窗函数长度应为 {frame_length}，实际为 {window.shape}")
+
+    if out is None:
+        out = np.empty(frames.shape, dtype=np.result_type(frames.dtype, window.dtype))
+    elif out.shape != frames.shape:
+        raise ValueError(f"输出数组形状应为 {frames.shape}，实际为 {out.shape}")
+
+    np.multiply(frames, window, out=out)
+    return out
+
+
+def periodic_window(window_type, n_fft):
+    """生成用于STFT的周期窗（与 scipy/librosa 的 fftbins=True 一致）"""
+    n = np.arange(n_fft)
+    if window_type == 'hann':
+        return 0.5 - 0.5 * np.cos(2.0 * np.pi * n / n_fft)
+    elif window_type == 'hamming':
+        return 0.54 - 0.46 * np.cos(2.0 * np.pi * n / n_fft)
+    elif window_type in ('rectangular', 'boxcar', 'ones'):
+        return np.ones(n_fft)
+    raise ValueError(f"不支持的窗函数: {window_type}")
+
+
+def hz_to_mel(frequencies):
+    """赫兹转梅尔（Slaney 刻度：1kHz 以下线性，以上对数）"""
+    frequencies = np.asanyarray(frequencies, dtype=np.float64)
+    f_sp = 200.0 / 3
+    mels = frequencies / f_sp
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    log_region = frequencies >= min_log_hz
+    mels = np.where(log_region,
+                    min_log_mel + np.log(np.maximum(frequencies, min_log_hz) / min_log_hz) / logstep,
+                    mels)
+    return mels
+
+
+def mel_to_hz(mels):
+    """梅尔转赫兹（hz_to_mel 的逆变换）"""
+    mels = np.asanyarray(mels, dtype=np.float64)
+    f_sp = 200.0 / 3
+    freqs = f_sp * mels
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    return np.where(mels >= min_log_mel,
+                    min_log_hz * np.exp(logstep * (mels - min_log_mel)),
+                    freqs)
+
+
+def mel_filterbank(sample_rate, n_fft, n_mels=128, fmin=0.0, fmax=None):
+    """
+    梅尔滤波器组，形状为 (n_mels, n_fft//2+1)
+
+    三角滤波器按 Slaney 方式做面积归一化，与 librosa.filters.mel 的默认设置一致。
+    """
+    if fmax is None:
+        fmax = sample_rate / 2.0
+    fft_freqs = np.fft.rfftfreq(n_fft, d=1.0 / sample_rate)
+    mel_freqs = mel_to_hz(np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_mels + 2))
+
+    fdiff = np.diff(mel_freqs)
+    ramps = mel_freqs[:, None] - fft_freqs[None, :]
+    lower = -ramps[:-2] / fdiff[:-1, None]
+    upper = ramps[2:] / fdiff[1:, None]
+    weights = np.maximum(0, np.minimum(lower, upper))
+
+    enorm = 2.0 / (mel_freqs[2:n_mels + 2] - mel_freqs[:n_mels])
+    weights *= enorm[:, None]
+    return weights
+
+
+def dct_matrix(n_input, n_output):
+    """生成正交归一化的 DCT-II 变换矩阵，形状为 (n_input, n_output)"""
+    n = np.arange(n_input)
+    k = np.arange(n_output)
+    basis = np.cos(np.pi / n_input * (n[:, None] + 0.5) * k[None, :])
+    basis *= np.sqrt(2.0 / n_input)
+    basis[:, 0] /= np.sqrt(2.0)
+    return basis
+
+
+class FeaturePlan:
+    """
+    MFCC特征计算方案
+
+    预先构建窗函数、梅尔滤波器组和DCT矩阵，之后每次提取特征都直接复用。
+    计算流程与 librosa.feature.mfcc 的默认设置一致（center=True、零填充、
+    功率谱、power_to_db 的 top_db=80、正交DCT-II），全部由NumPy完成。
+    """
+
+    def __init__(self, sample_rate=22050, n_fft=2048, hop_length=512,
+                 n_mels=128, n_mfcc=13, window='hann', dtype=None):
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.n_mfcc = n_mfcc
+        self.window_type = window
+        self.dtype = resolve_dtype(dtype)
+
+        self.window = periodic_window(window, n_fft).astype(self.dtype)
+        # 转置为 (频点数, 梅尔带数)，便于按 (帧数, 频点数) 的谱直接相乘
+        self.mel_basis = np.ascontiguousarray(
+            mel_filterbank(sample_rate, n_fft, n_mels).T.astype(self.dtype))
+        self.dct_basis = dct_matrix(n_mels, n_mfcc).astype(self.dtype)
+
+        # 方案在多处共享，禁止原地修改
+        for array in (self.window, self.mel_basis, self.dct_basis):
+            array.flags.writeable = False
+
+    @property
+    def key(self):
+        return (self.sample_rate, self.n_fft, self.hop_length,
+                self.n_mels, self.n_mfcc, self.window_type, self.dtype.name)
+
+    def frames(self, audio):
+        """两端各补 n_fft//2 个零后分帧（与 librosa 的 center=True 一致）"""
+        pad = self.n_fft // 2
+        audio = np.asarray(audio, dtype=self.dtype).reshape(-1)
+        padded = np.zeros(len(audio) + 2 * pad, dtype=self.dtype)
+        padded[pad:pad + len(audio)] = audio
+        return frame_signal(padded, self.n_fft, self.hop_length)
+
+    def power_spectrum(self, audio):
+        """计算功率谱，形状为 (帧数, n_fft//2+1)"""
+        spectrum = np.fft.rfft(self.frames(audio) * self.window, n=self.n_fft)
+        return spectrum.real ** 2 + spectrum.imag ** 2
+
+    def mfcc_from_power(self, power, top_db=80.0, amin=1e-10, out=None):
+        """由功率谱计算MFCC，形状为 (帧数, n_mfcc)，可写入预分配的 out"""
+        log_mel = power @ self.mel_basis
+        np.maximum(log_mel, amin, out=log_mel)
+        np.log10(log_mel, out=log_mel)
+        log_mel *= 10.0
+        if top_db is not None and log_mel.size:
+            np.maximum(log_mel, log_mel.max() - top_db, out=log_mel)
+        return np.matmul(log_mel, self.dct_basis, out=out)
+
+    def mfcc(self, audio, top_db=80.0, out=None):
+        """提取MFCC特征，形状为 (帧数, n_mfcc)，可写入预分配的 out"""
+        return self.mfcc_from_power(self.power_spectrum(audio), top_db=top_db, out=out)
+
+    def num_frames(self, n_samples):
+        """两端补零后的帧数"""
+        return 1 + (n_samples + 2 * (self.n_fft // 2) - self.n_fft) // self.hop_length
+
+    def mfcc_batch(self, clips, top_db=80.0, amin=1e-10, max_frames=4096):
+        """
+        批量提取多段音频的MFCC
+
+        把各段音频的加窗帧依次写入同一个帧矩阵（不按最长的一段补齐，长短不一时不浪费计算），
+        每凑满约 max_frames 帧做一次批量 rFFT 和一次梅尔矩阵乘法。
+        返回 (特征列表, 帧数数组)，每段的特征形状为 (帧数, n_mfcc)，
+        与逐段调用 mfcc 的结果一致（top_db 按每段各自的最大值截断）。
+        """
+        clips = [np.asarray(clip).reshape(-1) for clip in clips]
+        if not clips:
+            return [], np.zeros(0, dtype=np.int64)
+
+        lengths = self.num_frames(np.array([len(clip) for clip in clips]))
+        mfccs_list = []
+        start = 0
+        while start < len(clips):
+            # 取若干段组成一批，总帧数不超过 max_frames（单段超过时自成一批）
+            end = start + 1
+            while end < len(clips) and lengths[start:end + 1].sum() <= max_frames:
+                end += 1
+            mfccs_list.extend(self._mfcc_group(clips[start:end], lengths[start:end],
+                                               top_db, amin))
+            start = end
+        return mfccs_list, lengths
+
+    def _mfcc_group(self, clips, lengths, top_db, amin):
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        windowed = np.empty((offsets[-1], self.n_fft), dtype=self.dtype)
+        for i, clip in enumerate(clips):
+            np.multiply(self.frames(clip), self.window, out=windowed[offsets[i]:offsets[i + 1]])
+        spectrum = np.fft.rfft(windowed, n=self.n_fft)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+
+        log_mel = power @ self.mel_basis
+        np.maximum(log_mel, amin, out=log_mel)
+        np.log10(log_mel, out=log_mel)
+        log_mel *= 10.0
+        if top_db is not None:
+            # 每段各自的最大值（每段至少有一帧）
+            peak = np.maximum.reduceat(log_mel.max(axis=1), offsets[:-1])
+            np.maximum(log_mel, np.repeat(peak - top_db, lengths)[:, None], out=log_mel)
+        mfccs = log_mel @ self.dct_basis
+        return [mfccs[offsets[i]:offsets[i + 1]] for i in range(len(clips))]
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _cached_feature_plan(sample_rate, n_fft, hop_length, n_mels, n_mfcc, window, dtype):
+    return FeaturePlan(sample_rate, n_fft, hop_length, n_mels, n_mfcc, window, dtype)
+
+
+def get_feature_plan(sample_rate=22050, n_fft=2048, hop_length=512,
+                     n_mels=128, n_mfcc=13, window='hann', dtype=None):
+    """获取特征计算方案，相同参数的方案只构建一次（LRU缓存）"""
+    # 统一按位置参数调用，避免关键字写法不同导致重复缓存
+    return _cached_feature_plan(int(sample_rate), int(n_fft), int(hop_length),
+                                int(n_mels), int(n_mfcc), window,
+                                resolve_dtype(dtype).name)
+
+
+def _log_mel_from_frames(frames, window, mel_basis, n_fft, amin=1e-10):
+    """
+    由帧矩阵计算对数梅尔谱 (dB)，返回形状为 (帧数, n_mels)
+
+    投影使用 einsum 而不是 BLAS 矩阵乘法：BLAS 的分块方式随行数变化，
+    同一帧在不同批次里的结果可能有末位差异，einsum 则逐行计算、结果与批次大小无关。
+    """
+    spectrum = np.fft.rfft(frames * window, n=n_fft)
+    power = spectrum.real ** 2 + spectrum.imag ** 2
+    mel = np.einsum('ij,jk->ik', power, mel_basis)
+    return 10.0 * np.log10(np.maximum(mel, amin))
+
+
+def compute_mfcc(audio, sample_rate=22050, n_mfcc=13, n_fft=2048, hop_length=512,
+                 backend='numpy', dtype=None, out=None):
+    """
+    按指定后端提取MFCC特征，返回形状 (帧数, n_mfcc)
+
+    numpy 后端使用缓存的 FeaturePlan；librosa 后端在首次调用时才导入 librosa。
+    """
+    if backend == 'numpy':
+        plan = get_feature_plan(sample_rate, n_fft, hop_length, n_mfcc=n_mfcc, dtype=dtype)
+        return plan.mfcc(audio, out=out)
+    elif backend == 'librosa':
+        import librosa
+
+        audio = np.asarray(audio, dtype=resolve_dtype(dtype))
+        mfccs = librosa.feature.mfcc(y=audio, sr=sample_rate, n_mfcc=n_mfcc,
+                                     n_fft=n_fft, hop_length=hop_length).T
+        if out is not None:
+            out[...] = mfccs
+            return out
+        return mfccs
+    raise ValueError(f"不支持的MFCC后端: {backend}，可选: {MFCC_BACKENDS}")
+
+
+class SpectralAnalysis:
+    """
+    单次STFT的频谱分析
+
+    一段信号只做一次短时傅里叶变换，dB频谱图、功率谱密度、频谱质心和MFCC
+    都在首次访问时由同一个功率谱推导并缓存，绘图和对比时重复使用。
+    """
+
+    def __init__(self, audio, sample_rate=22050, n_fft=2048, hop_length=512, n_mfcc=13,
+                 dtype=None):
+        self.plan = get_feature_plan(sample_rate, n_fft, hop_length, n_mfcc=n_mfcc,
+                                     dtype=dtype)
+        self.audio = np.asarray(audio, dtype=self.plan.dtype)
+        self.sample_rate = sample_rate
+
+    @cached_property
+    def power(self):
+        """功率谱，形状为 (帧数, 频点数)"""
+        return self.plan.power_spectrum(self.audio)
+
+    @cached_property
+    def frequencies(self):
+        """各频点对应的频率 (Hz)"""
+        return np.fft.rfftfreq(self.plan.n_fft, d=1.0 / self.sample_rate).astype(self.plan.dtype)
+
+    @cached_property
+    def db(self):
+        """以最大值为参考的dB频谱图，形状为 (频点数, 帧数)，与 librosa.amplitude_to_db 一致"""
+        amin = 1e-10
+        log_power = 10.0 * np.log10(np.maximum(self.power.T, amin))
+        if log_power.size:
+            log_power -= 10.0 * np.log10(max(amin, self.power.max()))
+            np.maximum(log_power, log_power.max() - 80.0, out=log_power)
+        return log_power
+
+    @cached_property
+    def psd(self):
+        """
+        Welch 方法的功率谱密度，返回 (频率, 功率谱密度)
+
+        直接对已有STFT的各帧功率取平均，分段长度和重叠由STFT参数决定。
+        """
+        scale = 1.0 / (self.sample_rate * np.sum(self.plan.window ** 2))
+        density = self.power.mean(axis=0) * scale
+        # 单边谱：除直流和奈奎斯特频点外功率加倍
+        density[1:-1] *= 2
+        return self.frequencies, density
+
+    @cached_property
+    def spectral_centroid(self):
+        """每帧的频谱质心 (Hz)"""
+        magnitude = np.sqrt(self.power)
+        total = magnitude.sum(axis=1)
+        return magnitude @ self.frequencies / np.maximum(total, np.finfo(self.plan.dtype).tiny)
+
+    @cached_property
+    def mfcc(self):
+        """MFCC特征，形状为 (n_mfcc, 帧数)"""
+        return self.plan.mfcc_from_power(self.power).T
+
+
+class StreamingMFCCExtractor:
+    """
+    流式MFCC特征提取器
+
+    分帧、加窗、梅尔滤波器组和DCT与 FeaturePlan 相同（即 VoicePreprocessing.extract_mfcc
+    和 AcousticModel.extract_features 的设置）：流开始时在左侧补 n_fft//2 个零（center=True），
+    按 hop_length 输出新凑满的帧；流结束时调用 flush() 在右侧补零，取出最后几帧，
+    总帧数与离线提取相同。alpha 不为 None 时先做预加重，跨块保留上一个样本。
+
+    top_db 截断只能参考已经到达的帧，按截至当前帧的最大值计算：整段的峰值出现得晚时，
+    之前输出的帧截断得比离线结果少。除此之外分块输入的结果与 extract_offline 逐位一致。
+    """
+
+    def __init__(self, sample_rate=22050, n_mfcc=13, n_fft=2048, hop_length=512,
+                 n_mels=128, window='hann', alpha=None, top_db=80.0, dtype=None):
+        self.sample_rate = sample_rate
+        self.n_mfcc = n_mfcc
+        self.alpha = alpha
+        self.top_db = top_db
+        self.plan = get_feature_plan(sample_rate, n_fft, hop_length, n_mels, n_mfcc,
+                                     window, dtype)
+        self.dtype = self.plan.dtype
+        self.reset()
+
+    def reset(self):
+        """清空跨块状态，开始新的音频流"""
+        self._last_sample = None
+        # 尚未组成完整帧的样本，开头是 center=True 的左侧补零
+        self._buffer = np.zeros(self.plan.n_fft // 2, dtype=self.dtype)
+        self._received = 0
+        self._peak = -np.inf  # 截至目前的对数梅尔谱最大值
+
+    def _empty(self):
+        return np.empty((0, self.n_mfcc), dtype=self.dtype)
+
+    def _preemphasis(self, block, last_sample):
+        """预加重滤波，last_sample 为上一块的最后一个样本"""
+        if self.alpha is None:
+            return block
+        emphasized = preemphasis(block, self.alpha, dtype=self.dtype)
+        if last_sample is not None:
+            emphasized[:1] = block[:1] - self.alpha * last_sample
+        return emphasized
+
+    def _emit(self, samples):
+        """对缓存的样本分帧，输出完整帧的MFCC，剩余样本留到下次"""
+        plan = self.plan
+        frames = frame_signal(samples, plan.n_fft, plan.hop_length)
+        self._buffer = samples[len(frames) * plan.hop_length:].copy()
+        if len(frames) == 0:
+            return self._empty()
+        log_mel = _log_mel_from_frames(frames, plan.window, plan.mel_basis, plan.n_fft)
+        peaks = np.maximum.accumulate(np.maximum(log_mel.max(axis=1), self._peak))
+        self._peak = peaks[-1]
+        if self.top_db is not None:
+            np.maximum(log_mel, (peaks - self.top_db)[:, None], out=log_mel)
+        return np.einsum('ij,jk->ik', log_mel, plan.dct_basis)
+
+    def process(self, block):
+        """输入一块音频，返回新凑满的完整帧的MFCC"""
+        # sd.InputStream 给出 (样本数, 1)
+        block = np.asarray(block, dtype=self.dtype).reshape(-1)
+        if len(block) == 0:
+            return self._empty()
+
+        emphasized = self._preemphasis(block, self._last_sample)
+        self._last_sample = block[-1:].copy()  # 录音回调会复用缓冲区
+        self._received += len(block)
+        return self._emit(np.concatenate([self._buffer, emphasized]))
+
+    def flush(self):
+        """音频流结束：右侧补 n_fft//2 个零，输出剩余的帧，然后开始新的流"""
+        if self._received == 0:
+            return self._empty()
+        padding = np.zeros(self.plan.n_fft // 2, dtype=self.dtype)
+        out = self._emit(np.concatenate([self._buffer, padding]))
+        self.reset()
+        return out
+
+    def extract_offline(self, audio):
+        """对整段信号一次性提取MFCC（top_db 按整段的最大值截断），作为流式结果的对照"""
+        audio = np.asarray(audio, dtype=self.dtype).reshape(-1)
+        if len(audio) == 0:
+            return self._empty()
+        plan = self.plan
+        log_mel = _log_mel_from_frames(plan.frames(self._preemphasis(audio, None)),
+                                       plan.window, plan.mel_basis, plan.n_fft)
+        if self.top_db is not None:
+            np.maximum(log_mel, log_mel.max() - self.top_db, out=log_mel)
+        return np.einsum('ij,jk->ik', log_mel, plan.dct_basis)
+
+
+def _delta_regression(features, width, out=None):
+    """
+    对时间轴做回归窗卷积，只输出不需要补边的部分（长度减少 2*width）
+    d[t] = sum_n n * (c[t+n] - c[t-n]) / (2 * sum_n n^2)
+    """
+    n_valid = len(features) - 2 * width
+    denominator = 2 * sum(n * n for n in range(1, width + 1))
+    if out is None:
+        out = np.zeros((n_valid,) + features.shape[1:], dtype=features.dtype)
+    else:
+        out[...] = 0
+    # 循环只在窗宽上（通常为2），每一步都是整段数组的向量运算
+    for n in range(1, width + 1):
+        out += n * (features[width + n:width + n + n_valid] -
+                    features[width - n:width - n + n_valid])
+    out /= denominator
+    return out
+
+
+def _stack_deltas(padded, n_frames, order, width, out):
+    """
+    padded 为两端各多出 order*width 帧的静态特征，
+    把静态特征及各阶差分依次写入 out 的对应列
+    """
+    n_features = padded.shape[1]
+    context = order * width
+    out[:, :n_features] = padded[context:context + n_frames]
+    current = padded
+    for k in range(1, order + 1):
+        current = _delta_regression(current, width)
+        offset = context - k * width
+        out[:, k * n_features:(k + 1) * n_features] = current[offset:offset + n_frames]
+    return out
+
+
+def add_deltas(features, order=2, width=2, out=None):
+    """
+    在静态特征 (帧数, 特征维度) 后拼接一阶到 order 阶差分特征，
+    结果形状为 (帧数, 特征维度 * (order + 1))，写入一个预先分配的数组。
+
+    各阶差分都直接由静态特征计算（高阶差分等价于与组合后的回归窗卷积），
+    两端按复制首尾帧的方式补边，与 StreamingDeltas 的分块结果逐位一致。
+    """
+    features = np.asarray(features)
+    n_frames, n_features = features.shape
+    if out is None:
+        out = np.empty((n_frames, n_features * (order + 1)), dtype=features.dtype)
+    if n_frames == 0 or order == 0:
+        out[:, :n_features] = features
+        return out
+    context = order * width
+    padded = np.pad(features, ((context, context), (0, 0)), mode='edge')
+    return _stack_deltas(padded, n_frames, order, width, out)
+
+
+class StreamingDeltas:
+    """
+    流式差分特征计算器
+
+    逐块输入静态特征帧，由于差分需要未来的帧，输出比输入滞后 order*width 帧；
+    音频流结束时调用 flush() 取出剩余的帧。分块结果与 add_deltas 逐位一致。
+    """
+
+    def __init__(self, n_features, order=2, width=2, dtype=None):
+        self.n_features = n_features
+        self.order = order
+        self.width = width
+        self.dtype = resolve_dtype(dtype)
+        self.lookahead = order * width
+        self.reset()
+
+    @property
+    def output_dim(self):
+        return self.n_features * (self.order + 1)
+
+    def reset(self):
+        """清空缓存，开始新的特征流"""
+        # 缓存的静态帧（开头已按首帧补边），以及已输出的帧数
+        self._buffer = np.empty((0, self.n_features), dtype=self.dtype)
+        self._buffer_start = 0
+        self._received = 0
+        self._emitted = 0
+
+    def _empty(self):
+        return np.empty((0, self.output_dim), dtype=self.dtype)
+
+    def _emit(self, end):
+        """输出 [已输出帧数, end) 范围内的帧，并丢弃之后不再需要的缓存"""
+        n_frames = end - self._emitted
+        if n_frames <= 0:
+            return self._empty()
+        context = self.lookahead
+        start = self._emitted - context - self._buffer_start
+        window = self._buffer[start:start + n_frames + 2 * context]
+        out = np.empty((n_frames, self.output_dim), dtype=self.dtype)
+        _stack_deltas(window, n_frames, self.order, self.width, out)
+
+        self._emitted = end
+        drop = self._emitted - context - self._buffer_start
+        self._buffer = self._buffer[drop:]
+        self._buffer_start += drop
+        return out
+
+    def process(self, frames):
+        """输入新的静态特征帧 (帧数, 特征维度)，返回已能确定差分的帧"""
+        frames = np.asarray(frames, dtype=self.dtype).reshape(-1, self.n_features)
+        if len(frames) == 0:
+            return self._empty()
+        if self._received == 0:
+            # 流的开头复制首帧补边
+            frames = np.concatenate([np.repeat(frames[:1], self.lookahead, axis=0), frames])
+            self._buffer_start = -self.lookahead
+            self._received -= self.lookahead
+        self._buffer = np.concatenate([self._buffer, frames])
+        self._received += len(frames)
+        return self._emit(self._received - self.lookahead)
+
+    def flush(self):
+        """音频流结束：复制末帧补边，输出剩余的所有帧"""
+        if self._received <= 0:
+            return self._empty()
+        padding = np.repeat(self._buffer[-1:], self.lookahead, axis=0)
+        self._buffer = np.concatenate([self._buffer, padding])
+        out = self._emit(self._received)
+        self.reset()
+        return out
+
+
+# 倒谱均值方差归一化（CMVN）支持的统计方式
+CMVN_MODES = ('global', 'utterance', 'sliding')
+
+
+class OnlineCMVN:
+    """
+    增量式倒谱均值方差归一化
+
+    global: 逐段调用 partial_fit 累积整个语料的充分统计量（Chan 并行合并公式），
+            不需要把所有特征拼成一个大数组，内存只与最长的一段语音有关
+    utterance: 每段语音用自身的均值和方差归一化
+    sliding: 每帧用它之前 window 帧（含当前帧）的统计量归一化，适合实时输入，
+             流式调用 process() 与整段调用 transform() 结果一致
+
+    属性命名与 sklearn 的 StandardScaler 相同（mean_、var_、scale_），可直接替换。
+    """
+
+    def __init__(self, mode='global', window=300, norm_vars=True):
+        if mode not in CMVN_MODES:
+            raise ValueError(f"不支持的归一化方式: {mode}，可选: {CMVN_MODES}")
+        self.mode = mode
+        self.window = window
+        self.norm_vars = norm_vars
+        self.reset()
+
+    def reset(self):
+        """清空累积的统计量和流式状态"""
+        self.n_samples_seen_ = 0
+        self.mean_ = None
+        self._m2 = None  # 与均值的偏差平方和
+        self._history = None  # sliding 模式下保留的最近 window-1 帧
+
+    @classmethod
+    def from_stats(cls, mean, var, n_samples, mode='global', window=300, norm_vars=True):
+        """由已有的均值、方差和帧数恢复（例如从模型文件加载），mean 为 None 时没有统计量"""
+        cmvn = cls(mode, window, norm_vars)
+        if mean is None:
+            return cmvn
+        cmvn.n_samples_seen_ = int(n_samples)
+        cmvn.mean_ = np.asarray(mean, dtype=np.float64)
+        cmvn._m2 = np.asarray(var, dtype=np.float64) * n_samples
+        return cmvn
+
+    def partial_fit(self, features):
+        """累积一段特征 (帧数, 特征维度) 的统计量，统计量用 float64 保存"""
+        features = np.asarray(features)
+        n = len(features)
+        if n == 0:
+            return self
+        mean = features.mean(axis=0, dtype=np.float64)
+        m2 = np.square(features - mean, dtype=np.float64).sum(axis=0)
+
+        if self.mean_ is None:
+            self.n_samples_seen_, self.mean_, self._m2 = n, mean, m2
+        else:
+            total = self.n_samples_seen_ + n
+            delta = mean - self.mean_
+            self.mean_ = self.mean_ + delta * (n / total)
+            self._m2 = self._m2 + m2 + delta ** 2 * (self.n_samples_seen_ * n / total)
+            self.n_samples_seen_ = total
+        return self
+
+    def fit(self, features_list):
+        """对多段特征逐段累积统计量（只遍历一遍，不拼接）"""
+        self.reset()
+        for features in features_list:
+            self.partial_fit(features)
+        return self
+
+    @property
+    def var_(self):
+        return None if self.mean_ is None else self._m2 / self.n_samples_seen_
+
+    @property
+    def scale_(self):
+        return None if self.mean_ is None else _safe_scale(self.var_)
+
+    def _normalize(self, features, mean, scale, out):
+        dtype = features.dtype if features.dtype.kind == 'f' else np.float64
+        if out is None:
+            out = np.empty(features.shape, dtype=dtype)
+        np.subtract(features, mean.astype(out.dtype, copy=False), out=out)
+        if self.norm_vars:
+            np.divide(out, scale.astype(out.dtype, copy=False), out=out)
+        return out
+
+    def transform(self, features, out=None):
+        """归一化一段特征，out 可以是 features 本身（原地计算）"""
+        features = np.asarray(features)
+        if self.mode == 'global':
+            if self.mean_ is None:
+                raise ValueError("CMVN尚未累积统计量，请先调用 fit 或 partial_fit")
+            return self._normalize(features, self.mean_, self.scale_, out)
+        if self.mode == 'utterance':
+            stats = OnlineCMVN().partial_fit(features)
+            if stats.mean_ is None:
+                return self._normalize(features, np.zeros(features.shape[1]),
+                                       np.ones(features.shape[1]), out)
+            return self._normalize(features, stats.mean_, stats.scale_, out)
+        mean, scale = self._sliding_stats(features, None)
+        return self._normalize(features, mean, scale, out)
+
+    def process(self, frames):
+        """流式归一化新到达的帧，sliding 模式跨调用保留历史帧"""
+        frames = np.asarray(frames)
+        if self.mode != 'sliding':
+            return self.transform(frames)
+        mean, scale = self._sliding_stats(frames, self._history)
+        history = frames if self._history is None else np.concatenate([self._history, frames])
+        self._history = history[max(0, len(history) - (self.window - 1)):].copy()
+        return self._normalize(frames, mean, scale, None)
+
+    def _sliding_stats(self, frames, history):
+        """
+        用累积和计算每帧之前 window 帧的均值和标准差
+        history 为之前保留的帧，frames 中第 i 帧的窗口跨越 history 的末尾
+        """
+        n_history = 0 if history is None else len(history)
+        data = frames if history is None else np.concatenate([history, frames])
+        data = data.astype(np.float64)
+        zero = np.zeros((1, data.shape[1]))
+        cumsum = np.concatenate([zero, np.cumsum(data, axis=0)])
+        cumsum_sq = np.concatenate([zero, np.cumsum(data * data, axis=0)])
+
+        ends = np.arange(n_history + 1, len(data) + 1)
+        starts = np.maximum(ends - self.window, 0)
+        counts = (ends - starts)[:, None]
+        mean = (cumsum[ends] - cumsum[starts]) / counts
+        var = np.maximum((cumsum_sq[ends] - cumsum_sq[starts]) / counts - mean ** 2, 0.0)
+        return mean, _safe_scale(var)
+
+
+def _safe_scale(var):
+    """标准差，方差接近0的维度不缩放（与 StandardScaler 相同）"""
+    scale = np.sqrt(var)
+    scale[scale < 10 * np.finfo(np.float64).eps] = 1.0
+    return scale
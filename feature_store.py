@@ -0,0 +1,172 @@
+"""
+训练特征存储
+所有语音的特征按音素分组、首尾相接地存放在一个 float32 矩阵文件中，
+另存每段语音的起始帧和帧数。打开时只做内存映射，某个音素的全部特征是矩阵中连续的一段，
+可以不经复制直接交给 GaussianHMM.fit(X, lengths)；训练数据可以大于内存
+"""
+
+import json
+import os
+
+import numpy as np
+
+STORE_VERSION = 1
+DATA_NAME = 'features.f32'
+INDEX_NAME = 'index.json'
+
+
+class FeatureStore:
+    """
+    打开一个已有的特征存储目录
+
+    path: 存储目录（由 FeatureStore.build 创建）
+    writable: 是否以读写方式映射（原地标准化时需要）
+    """
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        with open(os.path.join(path, INDEX_NAME), encoding='utf-8') as f:
+            index = json.load(f)
+        if index['version'] != STORE_VERSION:
+            raise ValueError(f"{path} 的特征存储版本 {index['version']} 不受支持，请重新生成")
+        self.n_features = index['n_features']
+        self.dtype = np.dtype(index['dtype'])
+        self.phonemes = index['phonemes']
+        self.normalization = index.get('normalization')
+        self.writable = writable
+
+        self.offsets = np.load(os.path.join(path, 'offsets.npy'))
+        self.lengths = np.load(os.path.join(path, 'lengths.npy'))
+        # 每个音素的语音编号范围 [first, last)
+        self._ranges = {p: tuple(r) for p, r in zip(self.phonemes, index['ranges'])}
+        self.n_frames = int(self.lengths.sum())
+        if self.n_frames:
+            self.data = np.memmap(os.path.join(path, DATA_NAME), dtype=self.dtype,
+                                  mode='r+' if writable else 'r',
+                                  shape=(self.n_frames, self.n_features))
+        else:
+            self.data = np.empty((0, self.n_features), dtype=self.dtype)
+
+    @classmethod
+    def build(cls, path, samples, dtype=np.float32, writable=False):
+        """
+        由 (音素, 特征) 序列创建特征存储并打开
+        特征逐段追加写入文件，内存中只保留索引；同一音素的语音不连续时，
+        最后再按音素顺序（首次出现的顺序）重排一遍，同一音素内保持原顺序
+        """
+        dtype = np.dtype(dtype)
+        os.makedirs(path, exist_ok=True)
+        raw_path = os.path.join(path, DATA_NAME + '.tmp')
+        phoneme_ids, lengths, phonemes = [], [], {}
+        n_features = None
+        with open(raw_path, 'wb') as f:
+            for phoneme, features in samples:
+                features = np.ascontiguousarray(features, dtype=dtype)
+                if n_features is None:
+                    n_features = features.shape[1]
+                elif features.shape[1] != n_features:
+                    raise ValueError(f"特征维度不一致: {features.shape[1]} != {n_features}")
+                phoneme_ids.append(phonemes.setdefault(phoneme, len(phonemes)))
+                lengths.append(len(features))
+                f.write(features.tobytes())
+
+        phoneme_ids = np.asarray(phoneme_ids, dtype=np.int64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        raw_offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        order = np.argsort(phoneme_ids, kind='stable')
+        lengths = lengths[order]
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        data_path = os.path.join(path, DATA_NAME)
+        n_frames = int(lengths.sum())
+
+        if np.array_equal(order, np.arange(len(order))) or n_frames == 0:
+            os.replace(raw_path, data_path)
+        else:
+            raw = np.memmap(raw_path, dtype=dtype, mode='r', shape=(n_frames, n_features))
+            grouped = np.memmap(data_path, dtype=dtype, mode='w+', shape=(n_frames, n_features))
+            for src, dst, length in zip(raw_offsets[order], offsets, lengths):
+                grouped[dst:dst + length] = raw[src:src + length]
+            grouped.flush()
+            del raw, grouped
+            os.remove(raw_path)
+
+        counts = np.bincount(phoneme_ids, minlength=len(phonemes))
+        bounds = np.concatenate([[0], np.cumsum(counts)]).tolist()
+        np.save(os.path.join(path, 'offsets.npy'), offsets)
+        np.save(os.path.join(path, 'lengths.npy'), lengths)
+        cls._write_index(path, {
+            'version': STORE_VERSION, 'n_features': n_features or 0, 'dtype': dtype.str,
+            'phonemes': list(phonemes), 'ranges': list(zip(bounds[:-1], bounds[1:])),
+            'normalization': None})
+        return cls(path, writable=writable)
+
+    @classmethod
+    def from_training_data(cls, path, training_data, dtype=np.float32, writable=False):
+        """由 {音素: 特征列表} 创建特征存储"""
+        samples = ((phoneme, features) for phoneme, features_list in training_data.items()
+                   for features in features_list)
+        return cls.build(path, samples, dtype, writable)
+
+    @staticmethod
+    def _write_index(path, index):
+        tmp_path = os.path.join(path, INDEX_NAME + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(path, INDEX_NAME))
+
+    def phoneme_slice(self, phoneme):
+        """某个音素的全部特征（存储矩阵的一个视图，不复制）和各段长度"""
+        first, last = self._ranges[phoneme]
+        if first == last:
+            return self.data[:0], self.lengths[:0]
+        start = self.offsets[first]
+        end = self.offsets[last - 1] + self.lengths[last - 1]
+        return self.data[start:end], self.lengths[first:last]
+
+    def utterances(self, phoneme):
+        """某个音素各段语音的特征视图列表"""
+        first, last = self._ranges[phoneme]
+        return [self.data[o:o + n] for o, n in zip(self.offsets[first:last],
+                                                   self.lengths[first:last])]
+
+    def iter_utterances(self):
+        """按存储顺序产出 (音素, 特征视图)"""
+        for phoneme in self.phonemes:
+            for features in self.utterances(phoneme):
+                yield phoneme, features
+
+    def normalize(self, scaler):
+        """
+        用已拟合的 scaler 原地标准化所有特征，并把统计量记入索引，
+        之后再打开时可以由 normalization 恢复同一个 scaler
+        """
+        if not self.writable:
+            raise ValueError("原地标准化需要以 writable=True 打开特征存储")
+        if self.normalization is not None:
+            raise ValueError("特征存储已经标准化过")
+        for _, features in self.iter_utterances():
+            scaler.transform(features, out=features)
+        if isinstance(self.data, np.memmap):
+            self.data.flush()
+
+        # 按段或滑动窗归一化的 scaler 可能没有累积全局统计量
+        mean, var = scaler.mean_, scaler.var_
+        self.normalization = {'mean': None if mean is None else mean.tolist(),
+                              'var': None if var is None else var.tolist(),
+                              'n_samples': scaler.n_samples_seen_, 'mode': scaler.mode,
+                              'window': scaler.window, 'norm_vars': scaler.norm_vars}
+        with open(os.path.join(self.path, INDEX_NAME), encoding='utf-8') as f:
+            index = json.load(f)
+        index['normalization'] = self.normalization
+        self._write_index(self.path, index)
+
+    def to_dict(self):
+        """转换为 {音素: 特征视图列表}"""
+        return {phoneme: self.utterances(phoneme) for phoneme in self.phonemes}
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __contains__(self, phoneme):
+        return phoneme in self._ranges
+
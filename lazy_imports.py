@@ -0,0 +1,67 @@
+"""
+按需导入绘图、音频设备和 IPython 等重量级库
+无界面模式（headless）下这些库永远不会被加载，适合服务器上的批处理任务
+
+通过环境变量 SPEECH_HEADLESS=1 或调用 set_headless(True) 开启无界面模式
+"""
+
+import os
+
+_headless = os.environ.get('SPEECH_HEADLESS', '').lower() not in ('', '0', 'false', 'no')
+
+
+def is_headless():
+    """当前是否处于无界面模式"""
+    return _headless
+
+
+def set_headless(enabled=True):
+    """开启或关闭无界面模式"""
+    global _headless
+    _headless = bool(enabled)
+
+
+def pyplot():
+    """导入 matplotlib.pyplot"""
+    if _headless:
+        raise RuntimeError("无界面模式下不能绘图")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def librosa_display():
+    """导入 librosa.display（同时会导入 matplotlib）"""
+    if _headless:
+        raise RuntimeError("无界面模式下不能绘图")
+    import librosa.display
+    return librosa.display
+
+
+def sounddevice():
+    """导入 sounddevice，缺少 PortAudio 时给出明确提示"""
+    if _headless:
+        raise RuntimeError("无界面模式下不能使用录音/播放设备")
+    try:
+        import sounddevice as sd
+    except OSError as e:
+        raise RuntimeError(f"无法加载音频设备库（请确认已安装 PortAudio）: {e}") from e
+    return sd
+
+
+def pyaudio():
+    """导入 PyAudio，缺少 PortAudio 时给出明确提示"""
+    if _headless:
+        raise RuntimeError("无界面模式下不能使用录音/播放设备")
+    try:
+        import pyaudio as pa
+    except (ImportError, OSError) as e:
+        raise RuntimeError(f"无法加载 PyAudio（请确认已安装 PortAudio 和 pyaudio）: {e}") from e
+    return pa
+
+
+def display_audio(audio, rate):
+    """在 Jupyter 中显示音频播放控件，无界面模式下直接跳过"""
+    if _headless:
+        return
+    import IPython.display as ipd
+    ipd.display(ipd.Audio(audio, rate=rate))
@@ -0,0 +1,98 @@
+"""
+声学模型文件格式
+单个文件：8字节魔数 + 8字节头部长度 + JSON头部 + 按64字节对齐依次存放的原始数组。
+读取时整个文件只做一次内存映射，各数组都是其中的只读视图，
+多个服务进程可以共享同一份物理内存页，加载几乎不耗时，也不需要导入 sklearn/hmmlearn。
+"""
+
+import json
+import struct
+
+import numpy as np
+
+from atomic_write import atomic_write
+
+MAGIC = b'SPCHAM\x00\x00'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+MODEL_EXTENSION = '.acm'
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def is_model_file(filepath):
+    """文件是否为本格式（检查魔数）"""
+    try:
+        with open(filepath, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def save_arrays(filepath, arrays, metadata=None):
+    """
+    把若干命名数组和元数据写入一个模型文件
+    arrays: {名称: 数组}，metadata: 可序列化为JSON的字典
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise ValueError(f"数组 {name} 的类型为 {array.dtype}，不能写入模型文件")
+    entries = {}
+
+    # 数据起始位置取决于头部长度，而头部里又记录了各数组的偏移，反复计算直到不再变化
+    data_start = _aligned(len(MAGIC) + 8)
+    while True:
+        offset = data_start
+        for name, array in arrays.items():
+            entries[name] = {'dtype': array.dtype.str, 'shape': list(array.shape),
+                             'offset': offset}
+            offset = _aligned(offset + array.nbytes)
+        header = json.dumps({'format_version': FORMAT_VERSION,
+                             'metadata': metadata or {},
+                             'arrays': entries}, ensure_ascii=False).encode('utf-8')
+        if len(MAGIC) + 8 + len(header) <= data_start:
+            break
+        data_start = _aligned(len(MAGIC) + 8 + len(header))
+    header += b' ' * (data_start - len(MAGIC) - 8 - len(header))
+    file_size = offset
+
+    # 先写临时文件再重命名，正在读取旧模型的进程不受影响
+    with atomic_write(filepath) as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(entries[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(file_size)
+
+
+def load_arrays(filepath, mmap=True):
+    """读取模型文件，返回 (元数据, {名称: 只读数组})"""
+    with open(filepath, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{filepath} 不是声学模型文件")
+        (header_length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    if header['format_version'] > FORMAT_VERSION:
+        raise ValueError(f"模型文件版本 {header['format_version']} 高于当前支持的版本 "
+                         f"{FORMAT_VERSION}，请升级程序")
+
+    if mmap:
+        buffer = np.memmap(filepath, dtype=np.uint8, mode='r')
+    else:
+        with open(filepath, 'rb') as f:
+            buffer = np.frombuffer(f.read(), dtype=np.uint8)
+
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        nbytes = dtype.itemsize * int(np.prod(shape))
+        start = entry['offset']
+        # 视图直接指向映射的文件内容，不复制
+        arrays[name] = buffer[start:start + nbytes].view(dtype).reshape(shape)
+    return header['metadata'], arrays
@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+声学模型（03_gmm_hmm.py）测试脚本
+"""
+
+import importlib.util
+import os
+import sys
+from unittest import mock
+
+import numpy as np
+import pytest
+
+import lazy_imports
+
+
+@pytest.fixture(autouse=True)
+def headless():
+    """每个测试都在无界面模式下运行，结束后恢复原来的设置"""
+    previous = lazy_imports.is_headless()
+    lazy_imports.set_headless(True)
+    yield
+    lazy_imports.set_headless(previous)
+
+
+def _load_module():
+    """加载 03_gmm_hmm.py（文件名以数字开头），并注册到 sys.modules 以便进程池传递对象"""
+    if 'gmm_hmm' not in sys.modules:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '03_gmm_hmm.py')
+        spec = importlib.util.spec_from_file_location('gmm_hmm', path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['gmm_hmm'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['gmm_hmm']
+
+
+def _toy_training_data(n_phonemes=4, n_utterances=4, n_features=6, seed=0):
+    """生成每个音素均值不同的随机特征序列"""
+    rng = np.random.default_rng(seed)
+    return {f'p{i}': [(rng.standard_normal((int(rng.integers(20, 40)), n_features)) + i)
+                      .astype(np.float32) for _ in range(n_utterances)]
+            for i in range(n_phonemes)}
+
+
+def _write_legacy_pickle(path, model, training_data):
+    """按旧版格式保存模型（scaler 为 sklearn 的 StandardScaler，没有差分配置）"""
+    import pickle
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler().fit(np.vstack([f for fl in training_data.values() for f in fl]))
+    with open(path, 'wb') as f:
+        pickle.dump({'models': model.models, 'gmms': model.gmms, 'scaler': scaler,
+                     'n_components': model.n_components, 'n_mfcc': model.n_mfcc,
+                     'is_trained': True}, f)
+
+
+def test_retrain_after_loading_legacy_pickle():
+    """测试加载旧版 .pkl 模型后可以重新训练，scaler 换成增量式CMVN"""
+    import tempfile
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data()
+    model = gmm_hmm.AcousticModel()
+    model.train_models(training_data)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'legacy.pkl')
+        _write_legacy_pickle(path, model, training_data)
+        loaded = gmm_hmm.AcousticModel()
+        loaded.load_models(path)
+        assert not isinstance(loaded.scaler, gmm_hmm.OnlineCMVN)
+
+        loaded.train_models(training_data)
+        assert isinstance(loaded.scaler, gmm_hmm.OnlineCMVN)
+        np.testing.assert_array_equal(loaded.scaler.mean_, model.scaler.mean_)
+        for phoneme in training_data:
+            np.testing.assert_array_equal(loaded.models[phoneme].means_,
+                                          model.models[phoneme].means_)
+
+
+def test_adapt_legacy_pickle():
+    """测试旧版 .pkl 模型（StandardScaler）也可以做MAP自适应"""
+    import tempfile
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data()
+    model = gmm_hmm.AcousticModel()
+    model.train_models(training_data)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'legacy.pkl')
+        _write_legacy_pickle(path, model, training_data)
+        loaded = gmm_hmm.AcousticModel()
+        loaded.load_models(path)
+        before = loaded.models['p1'].means_.copy()
+        new_data = {'p1': [f + 1.0 for f in training_data['p1'][:2]]}
+        used = loaded.adapt(new_data)
+        assert used['p1'] == sum(len(f) for f in new_data['p1'])
+        assert not np.allclose(loaded.models['p1'].means_, before)
+
+
+def test_parallel_training_matches_serial():
+    """测试并行训练与串行训练结果完全相同"""
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data()
+
+    serial = gmm_hmm.AcousticModel()
+    serial.train_models(training_data, n_jobs=1)
+
+    # 记录标准化和收集结果的顺序，同时在内存中的标准化矩阵不超过进程数
+    events = []
+    cls = gmm_hmm.AcousticModel
+    normalize, record = cls._normalize_phoneme, cls._record_training
+    parallel = cls()
+    with mock.patch.object(cls, '_normalize_phoneme',
+                           lambda self, *args: events.append(1) or normalize(self, *args)), \
+            mock.patch.object(cls, '_record_training',
+                              lambda self, *args: events.append(-1) or record(self, *args)):
+        parallel.train_models(training_data, n_jobs=2)
+    assert len(events) == 2 * len(training_data)
+    assert max(np.cumsum(events)) == 2
+
+    assert list(parallel.models) == list(serial.models) == list(training_data)
+    assert list(parallel.gmms) == list(serial.gmms) == list(training_data)
+    assert parallel.phonemes == serial.phonemes
+    for phoneme in training_data:
+        np.testing.assert_array_equal(parallel.gmms[phoneme].means_,
+                                      serial.gmms[phoneme].means_)
+        np.testing.assert_array_equal(parallel.models[phoneme].means_,
+                                      serial.models[phoneme].means_)
+        np.testing.assert_array_equal(parallel.models[phoneme].transmat_,
+                                      serial.models[phoneme].transmat_)
+
+
+def test_training_from_feature_store():
+    """测试从特征存储训练（原地标准化、零拷贝切片）与从字典训练结果完全相同"""
+    import tempfile
+    from feature_store import FeatureStore
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data()
+
+    reference = gmm_hmm.AcousticModel()
+    reference.train_models(training_data)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'store')
+        store = FeatureStore.from_training_data(path, training_data, writable=True)
+        serial = gmm_hmm.AcousticModel()
+        serial.train_models(store)
+        assert store.normalization is not None
+
+        # 已标准化的存储以只读方式打开，恢复同一个 scaler，并行训练
+        parallel = gmm_hmm.AcousticModel()
+        parallel.train_models(FeatureStore(path), n_jobs=2)
+
+        for model in (serial, parallel):
+            np.testing.assert_array_equal(model.scaler.mean_, reference.scaler.mean_)
+            np.testing.assert_array_equal(model.scaler.var_, reference.scaler.var_)
+            for phoneme in training_data:
+                np.testing.assert_array_equal(model.gmms[phoneme].means_,
+                                              reference.gmms[phoneme].means_)
+                np.testing.assert_array_equal(model.models[phoneme].means_,
+                                              reference.models[phoneme].means_)
+
+
+def test_hmm_training_budgets():
+    """测试HMM训练记录对数似然曲线，按相对容差、迭代次数和时间预算停止"""
+    import pickle
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data(n_phonemes=2, n_utterances=6)
+
+    for init in ('gmm', 'uniform', 'kmeans'):
+        model = gmm_hmm.AcousticModel(hmm_init=init, hmm_tol=1e-4)
+        model.train_models(training_data)
+        for phoneme, curve in model.training_curves.items():
+            history = curve['log_likelihood']
+            assert curve['stop_reason'] == 'converged'
+            assert len(history) == curve['iterations'] < 100
+            # EM 的对数似然不下降，停止时相对变化小于容差
+            assert np.all(np.diff(history) > -1e-6 * np.abs(history[:-1]))
+            assert abs(history[-1] - history[-2]) <= 1e-4 * abs(history[-2])
+        # 保存的模型不引用训练用的监视器
+        assert b'_TrainingMonitor' not in pickle.dumps(model.models)
+
+    model = gmm_hmm.AcousticModel(hmm_tol=0.0, hmm_max_iter=3)
+    model.train_models(training_data)
+    assert all(c['iterations'] == 3 and c['stop_reason'] == 'max_iter'
+               for c in model.training_curves.values())
+
+    model = gmm_hmm.AcousticModel(hmm_tol=0.0, hmm_time_budget=0.0)
+    model.train_models(training_data)
+    assert all(c['iterations'] == 1 and c['stop_reason'] == 'time_budget'
+               for c in model.training_curves.values())
+
+
+def test_state_stats_from_labels():
+    """测试按块累加的各状态均值、方差与直接计算一致，空状态用全部数据的统计量"""
+    gmm_hmm = _load_module()
+    rng = np.random.default_rng(0)
+    features = (rng.standard_normal((1000, 6)) * 2 + 1).astype(np.float32)
+    labels = rng.integers(0, 3, len(features))
+    means, covars = gmm_hmm._state_stats_from_labels(features, labels, 4, chunk_size=64)
+    for state in range(4):
+        selected = features[labels == state] if state < 3 else features
+        np.testing.assert_allclose(means[state], selected.mean(axis=0, dtype=np.float64))
+        np.testing.assert_allclose(covars[state], selected.var(axis=0, dtype=np.float64))
+
+
+def test_stacked_scorer_matches_hmmlearn():
+    """测试批量打分与逐个调用 hmmlearn 的 score 结果一致（含状态数不同的模型）"""
+    from acoustic_scoring import StackedHMMScorer
+
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data(n_features=13)
+    model = gmm_hmm.AcousticModel()
+    model.train_models(training_data)
+    model.models['extra'] = model.train_hmm(training_data['p1'], n_components=5)
+
+    scorer = StackedHMMScorer(model.models)
+    for features in (training_data['p2'][0], training_data['p0'][1][:1]):
+        features = model.scaler.transform(features)
+        expected = [model.models[phoneme].score(features) for phoneme in scorer.phonemes]
+        np.testing.assert_allclose(scorer.score(features), expected, rtol=1e-10)
+
+    scores = model.score_features(model.scaler.transform(training_data['p3'][0]))
+    assert max(scores, key=scores.get) == 'p3'
+
+
+def test_streaming_features_match_extract_features():
+    """测试流式MFCC加流式差分与 extract_features 的帧数、数值一致，可直接用于打分"""
+    gmm_hmm = _load_module()
+    model = gmm_hmm.AcousticModel(delta_order=2)
+    audio = 0.3 * np.random.default_rng(3).standard_normal(11025).astype(np.float32)
+    expected = model.extract_features(audio, sr=22050)
+
+    extractor = model.create_streaming_extractor(sr=22050)
+    deltas = model.create_streaming_deltas()
+    outputs = [deltas.process(extractor.process(audio[i:i + 1000]))
+               for i in range(0, len(audio), 1000)]
+    outputs.append(deltas.process(extractor.flush()))
+    outputs.append(deltas.flush())
+    streamed = np.vstack(outputs)
+    assert streamed.shape == expected.shape == (22, 39)
+    np.testing.assert_allclose(streamed, expected, rtol=1e-4, atol=1e-3)
+
+
+def test_model_file_roundtrip():
+    """测试模型文件保存后通过内存映射加载，打分结果不变且不需要 hmmlearn 对象"""
+    import tempfile
+
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data(n_features=13)
+    model = gmm_hmm.AcousticModel()
+    model.train_models(training_data)
+    features = training_data['p1'][0]
+    expected = model.score_features(model.scaler.transform(features))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.acm')
+        model.save_models(path)
+
+        loaded = gmm_hmm.AcousticModel()
+        loaded.load_models(path)
+        assert loaded.models == {} and loaded.phonemes == list(training_data)
+        assert isinstance(loaded.scaler.mean_, np.ndarray)
+        assert isinstance(loaded._get_scorer().weights, np.memmap) or \
+            isinstance(loaded._get_scorer().weights.base, np.memmap)
+        scores = loaded.score_features(loaded.scaler.transform(features))
+        for phoneme in training_data:
+            assert np.isclose(scores[phoneme], expected[phoneme], rtol=1e-12)
+
+        # 还原 hmmlearn/sklearn 对象
+        restored = gmm_hmm.AcousticModel()
+        restored.load_models(path, estimators=True)
+        np.testing.assert_array_equal(restored.models['p0'].transmat_,
+                                      model.models['p0'].transmat_)
+        np.testing.assert_allclose(restored.gmms['p2'].score_samples(features),
+                                   model.gmms['p2'].score_samples(features), rtol=1e-5)
+
+
+def test_model_file_resave_keeps_gmms():
+    """测试从模型文件加载后再保存、再加载，GMM预筛选参数不丢失"""
+    import tempfile
+
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data(n_features=13)
+    model = gmm_hmm.AcousticModel(shortlist_top_k=2)
+    model.train_models(training_data)
+    features = model.scaler.transform(training_data['p2'][0])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second = os.path.join(tmp, 'first.acm'), os.path.join(tmp, 'second.acm')
+        model.save_models(first)
+        loaded = gmm_hmm.AcousticModel(shortlist_top_k=2)
+        loaded.load_models(first)
+        assert loaded.gmms == {} and loaded._gmm_scorer is not None
+        loaded.save_models(second)
+
+        reloaded = gmm_hmm.AcousticModel(shortlist_top_k=2)
+        reloaded.load_models(second)
+        assert reloaded._gmm_scorer is not None
+        assert reloaded._gmm_scorer.phonemes == list(training_data)
+        np.testing.assert_array_equal(reloaded._gmm_scorer.frame_log_likelihoods(features),
+                                      loaded._gmm_scorer.frame_log_likelihoods(features))
+        assert reloaded.score_features(features) == loaded.score_features(features)
+
+
+def test_model_file_cmvn_modes():
+    """测试按段/滑动窗归一化的模型可以保存为模型文件，加载后归一化方式不变"""
+    import tempfile
+    from feature_extraction import OnlineCMVN
+    from model_format import save_arrays
+
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data(n_features=13)
+    model = gmm_hmm.AcousticModel(cmvn_mode='utterance')
+    model.train_models(training_data)
+    assert model.scaler.mode == 'utterance'
+    features = training_data['p3'][1]
+    expected = model.score_features(model.scaler.transform(features))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.acm')
+        model.save_models(path)
+        loaded = gmm_hmm.AcousticModel()
+        loaded.load_models(path)
+        assert loaded.scaler.mode == 'utterance' and loaded.cmvn_mode == 'utterance'
+        scores = loaded.score_features(loaded.scaler.transform(features))
+        for phoneme in training_data:
+            assert np.isclose(scores[phoneme], expected[phoneme], rtol=1e-12)
+
+        # 换上没有累积统计量的滑动窗归一化器
+        model.scaler = OnlineCMVN('sliding', window=50)
+        model.save_models(path)
+        loaded.load_models(path)
+        assert loaded.scaler.mode == 'sliding' and loaded.scaler.window == 50
+        assert loaded.scaler.mean_ is None
+        np.testing.assert_array_equal(loaded.scaler.transform(features),
+                                      model.scaler.transform(features))
+
+        try:
+            save_arrays(os.path.join(tmp, 'bad.acm'), {'mean': np.array(None)})
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('object 数组不应写入模型文件')
+        assert not os.path.exists(os.path.join(tmp, 'bad.acm'))
+
+
+def test_load_model_file_without_sklearn():
+    """测试加载模型文件和打分时不会导入 sklearn/hmmlearn"""
+    import subprocess
+    import tempfile
+
+    gmm_hmm = _load_module()
+    model = gmm_hmm.AcousticModel()
+    model.train_models(_toy_training_data(n_features=13))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.acm')
+        model.save_models(path)
+        code = (
+            "import sys, importlib.util, numpy as np\n"
+            "spec = importlib.util.spec_from_file_location('gmm_hmm', '03_gmm_hmm.py')\n"
+            "module = importlib.util.module_from_spec(spec)\n"
+            "spec.loader.exec_module(module)\n"
+            "model = module.AcousticModel()\n"
+            f"model.load_models({path!r})\n"
+            "model.score_features(np.zeros((10, 13)))\n"
+            "assert 'sklearn' not in sys.modules and 'hmmlearn' not in sys.modules\n"
+        )
+        env = dict(os.environ, SPEECH_HEADLESS='1')
+        subprocess.run([sys.executable, '-c', code], check=True, env=env,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def _reference_viterbi(scorer, features, insertion_penalty):
+    """在完整状态空间上做不剪枝的音素环 Viterbi（只能从最后一个状态进入其他音素），只返回最优得分"""
+    n_models, n_states = scorer.n_models, scorer.n_states
+    log_b = scorer.log_likelihoods(features).reshape(len(features), -1)
+    with np.errstate(divide='ignore'):
+        log_trans = np.full((n_models * n_states,) * 2, -np.inf)
+        for m in range(n_models):
+            block = slice(m * n_states, (m + 1) * n_states)
+            log_trans[block, block] = np.log(scorer.transmat[m])
+    log_start = scorer.log_startprob
+    final = np.arange(n_models) * n_states + scorer.n_states_per_model - 1
+    delta = log_start.reshape(-1) + log_b[0]
+    for t in range(1, len(features)):
+        within = (delta[:, None] + log_trans).max(axis=0)
+        exits = delta[final]
+        entry = np.array([np.delete(exits, m).max(initial=-np.inf) for m in range(n_models)])
+        entry = (entry[:, None] - insertion_penalty + log_start).reshape(-1)
+        delta = np.maximum(within, entry) + log_b[t]
+    return delta[final].max()
+
+
+def test_phone_loop_decoder():
+    """测试连续音素解码：不剪枝时与完整 Viterbi 一致，并能按顺序找出拼接的音素"""
+    from decoder import PhoneLoopDecoder
+
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data(n_phonemes=5, n_utterances=6, n_features=13)
+    model = gmm_hmm.AcousticModel()
+    model.train_models(training_data)
+    scorer = model._get_scorer()
+
+    sequence = ['p3', 'p0', 'p4', 'p1']
+    utterances = [training_data[p][k] for k, p in enumerate(sequence)]
+    features = model.scaler.transform(np.vstack(utterances))
+
+    segments, score = PhoneLoopDecoder(scorer, beam=np.inf, max_active=10 ** 6).decode(features)
+    assert np.isclose(score, _reference_viterbi(scorer, features, 10.0))
+
+    segments, _ = PhoneLoopDecoder(scorer).decode(features)
+    assert [p for p, _, _ in segments] == sequence
+    assert segments[0][1] == 0 and segments[-1][2] == len(features) - 1
+    boundaries = np.cumsum([len(u) for u in utterances])[:-1]
+    assert [start for _, start, _ in segments[1:]] == list(boundaries)
+
+    # 不扣插入惩罚时同一音素也不会在片段中间重新进入，相邻片段的音素总不相同
+    utterances = [f for p in ('p2', 'p0', 'p2') for f in training_data[p][:3]]
+    features = model.scaler.transform(np.vstack(utterances))
+    segments, _ = PhoneLoopDecoder(scorer, insertion_penalty=0.0).decode(features)
+    labels = [p for p, _, _ in segments]
+    assert all(a != b for a, b in zip(labels, labels[1:]))
+    assert all(prev[2] + 1 == start for prev, (_, start, _) in zip(segments, segments[1:]))
+    segments, _ = PhoneLoopDecoder(scorer).decode(features)
+    assert [p for p, _, _ in segments] == ['p2', 'p0', 'p2']
+
+
+def test_predict_batch_matches_predict():
+    """测试批量预测与逐段预测结果一致且保持输入顺序"""
+    gmm_hmm = _load_module()
+    rng = np.random.default_rng(1)
+    audios = [(0.3 * rng.standard_normal(n) * (1 + i % 3)).astype(np.float32)
+              for i, n in enumerate(rng.integers(3000, 20000, 12))]
+    model = gmm_hmm.AcousticModel(delta_order=2)
+    model.train_models({f'p{k}': [model.extract_features(audio) for audio in audios[k::3]]
+                        for k in range(3)})
+
+    results = model.predict_batch(audios, n_workers=3, chunk_size=5)
+    assert len(results) == len(audios)
+    for audio, (phoneme, scores, elapsed) in zip(audios, results):
+        expected_phoneme, expected_scores = model.predict(audio)
+        assert phoneme == expected_phoneme and elapsed > 0
+        for p in expected_scores:
+            assert np.isclose(scores[p], expected_scores[p], rtol=1e-10)
+
+
+def test_gmm_shortlist():
+    """测试GMM预筛选：GMM打分与 sklearn 一致，候选足够多时与完整HMM打分结果相同"""
+    from acoustic_scoring import StackedGMMScorer, ShortlistScorer, evaluate_shortlist
+
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data(n_phonemes=6, n_features=13)
+    model = gmm_hmm.AcousticModel()
+    model.train_models(training_data)
+
+    gmm_scorer = StackedGMMScorer.from_gmms(model.gmms)
+    features = model.scaler.transform(training_data['p4'][0])
+    expected = [model.gmms[p].score_samples(features).sum() for p in gmm_scorer.phonemes]
+    np.testing.assert_allclose(gmm_scorer.score(features), expected, rtol=1e-5)
+
+    scorer = model._get_scorer()
+    shortlist = ShortlistScorer(scorer, gmm_scorer, top_k=2)
+    scores = shortlist.score(features)
+    assert np.isfinite(scores).sum() == 2
+    full = scorer.score(features)
+    np.testing.assert_allclose(scores[np.isfinite(scores)], full[np.isfinite(scores)])
+
+    features_list = [model.scaler.transform(f) for p in training_data for f in training_data[p]]
+    labels = [p for p in training_data for _ in training_data[p]]
+    rows = evaluate_shortlist(scorer, gmm_scorer, features_list, labels, top_ks=(1, 6))
+    assert rows[0]['agreement'] == 1.0 and rows[-1]['agreement'] == 1.0
+    assert rows[1]['mean_candidates'] == 1.0
+
+    model.shortlist_top_k = 2
+    scores = model.score_features(features)
+    assert max(scores, key=scores.get) == 'p4'
+    assert sum(np.isfinite(list(scores.values()))) == 2
+
+    # 模型不能打包时逐个用 hmmlearn 打分，同样只对GMM候选调用 score
+    model._get_scorer = lambda: None
+    fallback = model.score_features(features)
+    assert [p for p in fallback if np.isfinite(fallback[p])] == \
+        [p for p in scores if np.isfinite(scores[p])]
+    for phoneme, score in fallback.items():
+        if np.isfinite(score):
+            np.testing.assert_allclose(score, model.models[phoneme].score(features), rtol=1e-5)
+
+
+def test_map_adaptation():
+    """测试MAP自适应：均值向新数据移动且移动量随相关因子减小，新数据上的分数提高"""
+    gmm_hmm = _load_module()
+    training_data = _toy_training_data(n_phonemes=3, n_features=6)
+    rng = np.random.default_rng(3)
+    # 新场景：所有特征整体偏移
+    new_data = {p: [f + 1.5 + 0.1 * rng.standard_normal(f.shape).astype(np.float32)
+                    for f in features_list[:2]]
+                for p, features_list in training_data.items()}
+    test_features = new_data['p1'][0]
+
+    shifts = []
+    for relevance in (1.0, 100.0):
+        model = gmm_hmm.AcousticModel()
+        model.train_models(training_data)
+        before_means = model.models['p1'].means_.copy()
+        before_score = model.score_features(model.scaler.transform(test_features))['p1']
+
+        used = model.adapt(new_data, relevance=relevance, adapt_weights=True)
+        assert used['p1'] == sum(len(f) for f in new_data['p1'])
+        after_score = model.score_features(model.scaler.transform(test_features))['p1']
+        assert after_score > before_score
+        assert np.isclose(model.gmms['p1'].weights_.sum(), 1.0)
+        shifts.append(np.abs(model.models['p1'].means_ - before_means).mean())
+    assert shifts[0] > shifts[1] > 0
+
+
+def main():
+    """主测试函数"""
+    lazy_imports.set_headless(True)
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✓ {name}")
+    print("🎉 所有测试通过!")
+
+
+if __name__ == "__main__":
+    main()
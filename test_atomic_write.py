@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+原子写文件测试
+"""
+
+import os
+import stat
+import tempfile
+
+import numpy as np
+
+from atomic_write import atomic_write
+from model_format import save_arrays
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_atomic_write_permissions_and_cleanup():
+    """测试写出的文件权限与 open() 新建的文件相同，出错时保留旧文件且不留临时文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = os.path.join(tmp, 'reference.txt')
+        with open(reference, 'w') as f:
+            f.write('x')
+
+        path = os.path.join(tmp, 'data.txt')
+        with atomic_write(path, 'w', encoding='utf-8') as f:
+            f.write('旧内容')
+        assert _mode(path) == _mode(reference)
+
+        model_path = os.path.join(tmp, 'model.acm')
+        save_arrays(model_path, {'weights': np.zeros(3)})
+        assert _mode(model_path) == _mode(reference)
+
+        try:
+            with atomic_write(path, 'w', encoding='utf-8') as f:
+                f.write('写了一半')
+                raise KeyboardInterrupt
+        except KeyboardInterrupt:
+            pass
+        with open(path, encoding='utf-8') as f:
+            assert f.read() == '旧内容'
+        assert sorted(os.listdir(tmp)) == ['data.txt', 'model.acm', 'reference.txt']
+
+
+def main():
+    """主测试函数"""
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✓ {name}")
+    print("🎉 所有测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,6 @@
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
 import librosa
 import soundfile as sf
 import tempfile
@@ -94,8 +93,13 @@ def test_audio_analysis():
     
     # 测试图表生成（不显示，只检查是否报错）
     print("2. 测试图表生成...")
+    from lazy_imports import is_headless, pyplot
+    if is_headless():
+        print("- 无界面模式，跳过图表生成")
+        return True
     try:
         # 使用非交互式后端避免显示窗口
+        plt = pyplot()
         plt.switch_backend('Agg')
         demo.plot_comprehensive_comparison()
         plt.close('all')  # 关闭所有图表
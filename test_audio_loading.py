@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+音频读取测试
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from audio_loading import load_audio, iter_load_audio
+
+
+def test_load_audio_resamples_only_when_needed():
+    """测试采样率相同时原样读取，不同时重采样到目标采样率"""
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        same = os.path.join(tmp, 'same.wav')
+        other = os.path.join(tmp, 'other.wav')
+        stereo = os.path.join(tmp, 'stereo.wav')
+        sf.write(same, 0.3 * rng.standard_normal(22050), 22050, subtype='FLOAT')
+        sf.write(other, 0.3 * rng.standard_normal(16000), 16000, subtype='FLOAT')
+        sf.write(stereo, 0.3 * rng.standard_normal((8000, 2)), 22050, subtype='FLOAT')
+
+        audio, sr = load_audio(same, sample_rate=22050)
+        np.testing.assert_array_equal(audio, sf.read(same, dtype='float32')[0])
+        assert sr == 22050 and audio.dtype == np.float32
+
+        audio, sr = load_audio(other, sample_rate=22050)
+        assert sr == 22050 and len(audio) == 22050 and audio.dtype == np.float32
+
+        audio, sr = load_audio(other, sample_rate=None)
+        assert sr == 16000 and len(audio) == 16000
+
+        audio, _ = load_audio(stereo)
+        np.testing.assert_allclose(audio, sf.read(stereo, dtype='float32')[0].mean(axis=1))
+
+
+def test_iter_load_audio_keeps_order():
+    """测试线程池读取按输入顺序返回，且与逐个读取结果相同"""
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(12):
+            path = os.path.join(tmp, f'{i}.wav')
+            sr = 16000 if i % 3 == 0 else 22050
+            sf.write(path, 0.3 * rng.standard_normal(int(rng.integers(2000, 9000))), sr)
+            paths.append(path)
+
+        results = list(iter_load_audio(paths, n_workers=3, prefetch=4))
+        assert [path for path, _ in results] == paths
+        for path, audio in results:
+            np.testing.assert_array_equal(audio, load_audio(path)[0])
+
+
+def main():
+    """主测试函数"""
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✓ {name}")
+    print("🎉 所有测试通过!")
+
+
+if __name__ == "__main__":
+    main()
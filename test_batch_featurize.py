@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+批量特征提取脚本测试
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+import lazy_imports
+from batch_featurize import featurize_directory, _load_preprocessing_class
+
+
+def _write_corpus(root, rng):
+    """生成几个不同采样率和时长的测试音频"""
+    os.makedirs(os.path.join(root, 'a'))
+    os.makedirs(os.path.join(root, 'b', 'c'))
+    files = {
+        os.path.join('a', 'one.wav'): (22050, 0.5),
+        os.path.join('b', 'two.wav'): (22050, 1.2),
+        os.path.join('b', 'c', 'three.flac'): (16000, 0.8),
+    }
+    for name, (sr, seconds) in files.items():
+        audio = 0.3 * rng.standard_normal(int(sr * seconds))
+        sf.write(os.path.join(root, name), audio, sr)
+    return files
+
+
+def test_featurize_directory_matches_pipeline():
+    """测试多进程批量提取结果与 VoicePreprocessing 一致，且第二次运行全部跳过"""
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        input_dir = os.path.join(tmp, 'audio')
+        output_dir = os.path.join(tmp, 'features')
+        files = _write_corpus(input_dir, rng)
+
+        stats = featurize_directory(input_dir, output_dir, workers=2, verbose=False)
+        assert stats['processed'] == 3 and stats['failed'] == 0
+        assert stats['audio_seconds'] > 2.4 and stats['realtime_factor'] > 0
+
+        vp = _load_preprocessing_class()(sample_rate=22050)
+        audio, sr = sf.read(os.path.join(input_dir, 'a', 'one.wav'), dtype='float32')
+        expected = vp.extract_mfcc(vp.preemphasis(audio)).T
+        np.testing.assert_allclose(np.load(os.path.join(output_dir, 'a', 'one.npy')),
+                                   expected, atol=1e-5)
+        for name in files:
+            features = np.load(os.path.join(output_dir, os.path.splitext(name)[0] + '.npy'))
+            assert features.shape[1] == 13 and features.dtype == np.float32
+
+        # 输出已是最新，全部跳过
+        stats = featurize_directory(input_dir, output_dir, workers=2, verbose=False)
+        assert stats['processed'] == 0 and stats['skipped'] == 3
+
+        # 特征参数改变时全部重新提取
+        stats = featurize_directory(input_dir, output_dir, workers=1, n_mfcc=20, verbose=False)
+        assert stats['processed'] == 3
+        assert np.load(os.path.join(output_dir, 'a', 'one.npy')).shape[1] == 20
+
+
+def test_serial_featurize_keeps_headless_setting():
+    """测试单进程提取在调用方进程中运行，不会改变其无界面模式设置"""
+    rng = np.random.default_rng(1)
+    was_headless = lazy_imports.is_headless()
+    lazy_imports.set_headless(False)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            input_dir = os.path.join(tmp, 'audio')
+            _write_corpus(input_dir, rng)
+            stats = featurize_directory(input_dir, os.path.join(tmp, 'features'),
+                                        workers=1, verbose=False)
+            assert stats['processed'] == 3
+            assert not lazy_imports.is_headless()
+    finally:
+        lazy_imports.set_headless(was_headless)
+
+
+def main():
+    """主测试函数"""
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✓ {name}")
+    print("🎉 所有测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+声学模型性能测试脚本的测试
+"""
+
+import copy
+import json
+
+import pytest
+
+import lazy_imports
+from benchmark_acoustic_model import run_benchmark, compare
+
+
+@pytest.fixture(autouse=True)
+def headless():
+    """每个测试都在无界面模式下运行，结束后恢复原来的设置"""
+    previous = lazy_imports.is_headless()
+    lazy_imports.set_headless(True)
+    yield
+    lazy_imports.set_headless(previous)
+
+
+def test_benchmark_report_and_compare():
+    """测试小规模参数组合的结果格式，以及与基准比较时标记回退"""
+    report = run_benchmark(utterances=(4,), phonemes=(3,), states=(2, 3), mfccs=(13,),
+                           n_predict=6, duration=0.3)
+    assert len(report['results']) == 2
+    assert [r['config']['hmm_states'] for r in report['results']] == [2, 3]
+    json.dumps(report)
+    for result in report['results']:
+        stages = result['stages']
+        assert set(stages) == {'extract_features', 'extract_features_batch', 'train_models',
+                               'predict', 'save_models', 'load_models'}
+        assert all(m['wall_time'] > 0 and m['peak_rss_mb'] > 0 for m in stages.values())
+        assert stages['predict']['frames_per_second'] > 0
+        assert stages['predict']['realtime_factor'] > 0
+        assert stages['save_models']['file_size_mb'] > 0
+        assert 0.0 <= result['accuracy'] <= 1.0
+
+    # 与自身比较没有回退；基准耗时减半（当前变慢一倍）时标记回退
+    assert not any(row['regression'] for row in compare(report, report))
+    faster = copy.deepcopy(report)
+    stage = faster['results'][0]['stages']['train_models']
+    stage['wall_time'] /= 2
+    rows = compare(report, faster, threshold=0.2, min_seconds=0.0)
+    flagged = [(row['config']['hmm_states'], row['stage']) for row in rows if row['regression']]
+    assert flagged == [(2, 'train_models')]
+
+
+def main():
+    """主测试函数"""
+    lazy_imports.set_headless(True)
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✓ {name}")
+    print("🎉 所有测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+语料清单测试
+"""
+
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+import soundfile as sf
+
+import dataset_manifest
+from dataset_manifest import DatasetManifest
+
+
+def _write(path, seconds, sr, rng):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sf.write(path, 0.3 * rng.standard_normal(int(sr * seconds)), sr)
+
+
+def test_manifest_incremental_update():
+    """测试清单记录文件信息，再次扫描时只处理新增、修改的文件并发现删除"""
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        _write(os.path.join(tmp, 'aa', '1.wav'), 0.5, 22050, rng)
+        _write(os.path.join(tmp, 'aa', '2.wav'), 1.0, 16000, rng)
+        _write(os.path.join(tmp, 'iy', 'sub', '3.wav'), 0.2, 22050, rng)
+
+        manifest = DatasetManifest(tmp)
+        changes = manifest.update()
+        assert sorted(changes['added']) == ['aa/1.wav', 'aa/2.wav', 'iy/sub/3.wav']
+        assert manifest.by_phoneme() == {'aa': ['aa/1.wav', 'aa/2.wav'],
+                                         'iy': ['iy/sub/3.wav']}
+        entry = manifest.entries['aa/2.wav']
+        assert entry['sample_rate'] == 16000 and np.isclose(entry['duration'], 1.0)
+        assert np.isclose(manifest.total_duration, 1.7)
+        assert manifest.by_duration() == ['aa/2.wav', 'aa/1.wav', 'iy/sub/3.wav']
+        manifest.save()
+        corpus_hash = manifest.content_hash()
+
+        # 重新加载后不变的文件不再读取
+        manifest = DatasetManifest(tmp)
+        with mock.patch.object(dataset_manifest, 'file_hash') as file_hash:
+            changes = manifest.update()
+        file_hash.assert_not_called()
+        assert changes['unchanged'] == 3 and not changes['added']
+        assert manifest.content_hash() == corpus_hash
+
+        _write(os.path.join(tmp, 'aa', '1.wav'), 0.8, 22050, rng)
+        os.remove(os.path.join(tmp, 'iy', 'sub', '3.wav'))
+        _write(os.path.join(tmp, 'uw', '4.wav'), 0.5, 22050, rng)
+        changes = manifest.update()
+        assert changes['modified'] == ['aa/1.wav'] and changes['added'] == ['uw/4.wav']
+        assert changes['removed'] == ['iy/sub/3.wav'] and changes['unchanged'] == 1
+        assert np.isclose(manifest.entries['aa/1.wav']['duration'], 0.8)
+        assert manifest.content_hash() != corpus_hash
+
+
+def main():
+    """主测试函数"""
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✓ {name}")
+    print("🎉 所有测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+MFCC特征磁盘缓存测试脚本
+"""
+
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+import lazy_imports
+from batch_featurize import _load_preprocessing_class
+from feature_cache import FeatureCache
+
+
+def test_cache_hit_and_key():
+    """测试缓存命中以及配置变化时键不同"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = FeatureCache(cache_dir)
+        audio = np.random.randn(1000).astype(np.float32)
+        config = {'n_mfcc': 13, 'n_fft': 2048, 'hop_length': 512, 'preemphasis': 0.97}
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return np.arange(26, dtype=np.float64).reshape(2, 13)
+
+        first = cache.get_or_compute(audio, config, compute)
+        second = cache.get_or_compute(audio, config, compute)
+        assert len(calls) == 1
+        assert isinstance(second, np.memmap)
+        np.testing.assert_array_equal(first, second)
+
+        assert cache.make_key(audio, config) != cache.make_key(audio, {**config, 'n_mfcc': 20})
+        assert cache.make_key(audio, config) != cache.make_key(audio * 2, config)
+
+        # 重新打开目录时能找到已有条目
+        assert len(FeatureCache(cache_dir)) == 1
+
+
+def test_cache_lru_eviction():
+    """测试超过容量上限时淘汰最久未使用的条目"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        features = np.zeros((100, 13))
+        entry_size = features.nbytes + 128  # .npy 头部
+        cache = FeatureCache(cache_dir, max_bytes=int(entry_size * 2.5))
+
+        cache.put('a', features)
+        cache.put('b', features)
+        assert cache.get('a') is not None  # a 变为最近使用
+        cache.put('c', features)
+
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert os.path.exists(os.path.join(cache_dir, 'c.npy'))
+        assert cache.total_bytes <= cache.max_bytes
+
+
+def test_cache_hit_when_mtime_not_writable():
+    """测试无法更新修改时间（只读或共享的缓存目录）时仍能命中缓存并维护LRU顺序"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        features = np.zeros((100, 13))
+        entry_size = features.nbytes + 128  # .npy 头部
+        cache = FeatureCache(cache_dir, max_bytes=int(entry_size * 2.5))
+        cache.put('a', features)
+        cache.put('b', features)
+
+        with mock.patch('os.utime', side_effect=PermissionError):
+            assert cache.get('a') is not None
+        assert cache.hits == 1
+        cache.put('c', features)
+        assert cache.get('b') is None and cache.get('a') is not None
+
+
+def test_full_pipeline_uses_cache():
+    """测试配置了特征缓存时完整流程的MFCC也写入缓存，且与默认流程结果一致"""
+    VoicePreprocessing = _load_preprocessing_class()
+    rng = np.random.default_rng(0)
+    audio = (0.3 * rng.standard_normal(16000)).astype(np.float32)
+
+    def record(self, duration=3, sample_rate=22050):
+        self.audio_data = audio
+        return audio
+
+    was_headless = lazy_imports.is_headless()
+    lazy_imports.set_headless(True)
+    original_record = VoicePreprocessing.record_audio
+    VoicePreprocessing.record_audio = record
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = FeatureCache(cache_dir)
+            cached = VoicePreprocessing(sample_rate=16000, feature_cache=cache).full_pipeline()
+            assert len(cache) == 1 and cache.misses == 1
+            expected = VoicePreprocessing(sample_rate=16000).full_pipeline()
+            np.testing.assert_allclose(cached, expected, rtol=1e-5, atol=1e-4)
+    finally:
+        VoicePreprocessing.record_audio = original_record
+        lazy_imports.set_headless(was_headless)
+
+
+def main():
+    """主测试函数"""
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✓ {name}")
+    print("🎉 所有测试通过!")
+
+
+if __name__ == "__main__":
+    main()
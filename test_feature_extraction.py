@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+语音特征提取公共模块测试脚本
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from feature_extraction import (frame_signal, frame_and_window, get_window, preemphasis,
+                                get_feature_plan, compute_mfcc, mel_filterbank,
+                                SpectralAnalysis, StreamingMFCCExtractor,
+                                add_deltas, StreamingDeltas, OnlineCMVN)
+
+
+def _loop_framing(signal, frame_length, frame_step):
+    """逐帧切片的参考实现（包含最后一个完整帧）"""
+    return np.array([signal[i:i + frame_length]
+                     for i in range(0, len(signal) - frame_length + 1, frame_step)])
+
+
+def test_frame_signal_view():
+    """测试分帧返回只读视图且包含最后一个完整帧"""
+    signal = np.random.randn(1000).astype(np.float32)
+    frames = frame_signal(signal, 200, 100)
+
+    assert frames.shape == (9, 200)
+    np.testing.assert_array_equal(frames, _loop_framing(signal, 200, 100))
+    assert np.shares_memory(frames, signal)
+    assert not frames.flags.writeable
+
+    # 信号短于一帧时返回空数组
+    assert frame_signal(signal[:50], 200, 100).shape == (0, 200)
+
+
+def test_frame_signal_padding():
+    """测试尾部补齐方式"""
+    signal = np.arange(1, 11, dtype=np.float64)
+
+    frames = frame_signal(signal, 4, 4)
+    assert frames.shape == (2, 4)
+
+    frames = frame_signal(signal, 4, 4, pad_mode='constant')
+    assert frames.shape == (3, 4)
+    np.testing.assert_array_equal(frames[-1], [9, 10, 0, 0])
+
+    frames = frame_signal(signal, 4, 4, pad_mode='edge')
+    np.testing.assert_array_equal(frames[-1], [9, 10, 10, 10])
+
+    frames = frame_signal(signal, 4, 4, pad_mode='reflect')
+    np.testing.assert_array_equal(frames[-1], [9, 10, 9, 8])
+
+
+def test_frame_and_window_out():
+    """测试加窗结果写入预分配数组"""
+    signal = np.random.randn(2000)
+    window = get_window('hann', 256)
+    out = np.empty((14, 256))
+
+    result = frame_and_window(signal, 256, 128, window, out=out)
+    assert result is out
+    np.testing.assert_allclose(out, _loop_framing(signal, 256, 128) * window)
+
+
+def test_streaming_mfcc_matches_offline():
+    """测试分块流式提取与整段提取逐位一致，且与 compute_mfcc 的分帧方式相同"""
+    rng = np.random.default_rng(0)
+    extractor = StreamingMFCCExtractor(sample_rate=16000)
+
+    for dtype in (np.float32, np.float64):
+        audio = rng.standard_normal(16000).astype(dtype)
+        offline = extractor.extract_offline(audio)
+        expected = compute_mfcc(audio, 16000, dtype=dtype)
+        assert offline.shape == expected.shape
+        np.testing.assert_allclose(offline, expected, rtol=1e-4, atol=1e-3)
+
+        for block_sizes in ([1] * 997, [160] * 100, rng.integers(1, 2000, 30)):
+            outputs = []
+            start = 0
+            for size in block_sizes:
+                outputs.append(extractor.process(audio[start:start + size]))
+                start += size
+            outputs.append(extractor.process(audio[start:]))
+            outputs.append(extractor.flush())
+            streamed = np.vstack(outputs)
+
+            assert streamed.shape == offline.shape
+            assert np.array_equal(streamed, offline)
+
+    # top_db 按截至当前帧的最大值截断，不参考之后的帧
+    audio = np.concatenate([1e-6 * rng.standard_normal(8000), rng.standard_normal(8000)])
+    streamed = np.vstack([extractor.process(audio[:8000]), extractor.process(audio[8000:]),
+                          extractor.flush()])
+    assert streamed.shape == extractor.extract_offline(audio).shape
+    no_clip = StreamingMFCCExtractor(sample_rate=16000, top_db=None)
+    np.testing.assert_array_equal(streamed[:10], no_clip.extract_offline(audio)[:10])
+
+
+def test_feature_plan_matches_librosa():
+    """测试缓存的计算方案与 librosa.feature.mfcc 结果一致"""
+    import librosa
+
+    audio = 0.3 * np.random.default_rng(1).standard_normal(22050)
+    expected = librosa.feature.mfcc(y=audio, sr=22050, n_mfcc=13,
+                                    n_fft=2048, hop_length=512)
+
+    plan = get_feature_plan(22050, 2048, 512, n_mfcc=13, dtype=np.float64)
+    assert get_feature_plan(sample_rate=22050, n_mfcc=13, dtype='float64') is plan
+    np.testing.assert_allclose(plan.mfcc(audio).T, expected, atol=1e-6)
+
+
+def test_mfcc_batch_matches_single():
+    """测试批量提取与逐段提取结果一致"""
+    rng = np.random.default_rng(2)
+    clips = [0.3 * rng.standard_normal(n) for n in (11025, 700, 4096, 22050)]
+    plan = get_feature_plan(22050, 2048, 512, n_mfcc=13, dtype=np.float64)
+
+    features, lengths = plan.mfcc_batch(clips)
+    assert list(lengths) == [len(f) for f in features]
+    for clip, batch_features in zip(clips, features):
+        np.testing.assert_allclose(batch_features, plan.mfcc(clip), atol=1e-8)
+
+
+def test_spectral_analysis_single_stft():
+    """测试频谱分析结果与 librosa 一致且只计算一次STFT"""
+    import librosa
+
+    audio = 0.3 * np.random.default_rng(3).standard_normal(30000)
+    analysis = SpectralAnalysis(audio, 22050, dtype=np.float64)
+
+    expected_db = librosa.amplitude_to_db(np.abs(librosa.stft(audio)), ref=np.max)
+    np.testing.assert_allclose(analysis.db, expected_db, atol=1e-6)
+    expected_centroid = librosa.feature.spectral_centroid(y=audio, sr=22050)[0]
+    np.testing.assert_allclose(analysis.spectral_centroid, expected_centroid, rtol=1e-6)
+    np.testing.assert_allclose(analysis.mfcc, analysis.plan.mfcc(audio).T)
+
+    # 各结果共用同一个功率谱
+    assert analysis.power is analysis.power
+    assert analysis.psd[1].shape == analysis.frequencies.shape
+
+
+def test_float32_policy():
+    """测试默认 float32 策略下各环节不发生隐式升精度"""
+    import librosa
+
+    audio = (0.3 * np.random.default_rng(4).standard_normal(22050)).astype(np.float32)
+
+    emphasized = preemphasis(audio)
+    assert emphasized.dtype == np.float32
+    np.testing.assert_array_equal(emphasized[1:], audio[1:] - np.float32(0.97) * audio[:-1])
+
+    # 写入预分配数组，以及原地计算
+    out = np.empty_like(audio)
+    assert preemphasis(audio, out=out) is out
+    in_place = audio.copy()
+    preemphasis(in_place, out=in_place)
+    np.testing.assert_array_equal(in_place, emphasized)
+
+    plan = get_feature_plan(22050, 2048, 512, n_mfcc=13)
+    assert plan.dtype == np.float32
+    assert plan.power_spectrum(audio).dtype == np.float32
+    mfccs = np.empty((44, 13), dtype=np.float32)
+    assert plan.mfcc(audio, out=mfccs) is mfccs
+    expected = librosa.feature.mfcc(y=audio, sr=22050, n_mfcc=13, n_fft=2048, hop_length=512)
+    np.testing.assert_allclose(mfccs.T, expected, atol=1e-3)
+
+
+def test_numpy_backend_matches_librosa():
+    """测试纯NumPy后端与 librosa 后端结果一致"""
+    import librosa
+
+    for sr, n_fft, n_mels in ((22050, 2048, 128), (16000, 512, 40)):
+        np.testing.assert_allclose(
+            mel_filterbank(sr, n_fft, n_mels),
+            librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels, dtype=np.float64),
+            atol=1e-12)
+
+    audio = 0.3 * np.random.default_rng(5).standard_normal(22050)
+    np.testing.assert_allclose(
+        compute_mfcc(audio, 22050, backend='numpy', dtype=np.float64),
+        compute_mfcc(audio, 22050, backend='librosa', dtype=np.float64),
+        atol=1e-6)
+
+
+def test_add_deltas():
+    """测试差分特征与 librosa 一致，且流式分块结果与整段计算逐位一致"""
+    import librosa
+
+    rng = np.random.default_rng(6)
+    mfccs = rng.standard_normal((50, 13))
+    stacked = add_deltas(mfccs, order=2, width=2)
+    assert stacked.shape == (50, 39)
+    np.testing.assert_array_equal(stacked[:, :13], mfccs)
+    np.testing.assert_allclose(stacked[:, 13:26],
+                               librosa.feature.delta(mfccs.T, width=5, mode='nearest').T,
+                               atol=1e-12)
+
+    out = np.empty((50, 26))
+    assert add_deltas(mfccs, order=1, out=out) is out
+
+    for n_frames in (1, 4, 37):
+        features = rng.standard_normal((n_frames, 13)).astype(np.float32)
+        offline = add_deltas(features)
+        for block_size in (1, 3, 16):
+            streaming = StreamingDeltas(13)
+            outputs = [streaming.process(features[i:i + block_size])
+                       for i in range(0, n_frames, block_size)]
+            outputs.append(streaming.flush())
+            assert np.array_equal(np.vstack(outputs), offline)
+
+
+def test_online_cmvn():
+    """测试增量CMVN与 StandardScaler 一致，sliding 模式流式与整段结果一致"""
+    import pickle
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(7)
+    utterances = [(3 * rng.standard_normal((n, 39)) + 5).astype(np.float32)
+                  for n in rng.integers(1, 200, 20)]
+    cmvn = OnlineCMVN().fit(iter(utterances))
+    scaler = StandardScaler().fit(np.vstack(utterances))
+    np.testing.assert_allclose(cmvn.mean_, scaler.mean_, rtol=1e-10)
+    np.testing.assert_allclose(cmvn.var_, scaler.var_, rtol=1e-10)
+
+    normalized = cmvn.transform(utterances[0])
+    assert normalized.dtype == np.float32
+    np.testing.assert_allclose(normalized, scaler.transform(utterances[0]), atol=1e-5)
+    restored = pickle.loads(pickle.dumps(cmvn))
+    np.testing.assert_array_equal(restored.transform(utterances[0]), normalized)
+
+    per_utterance = OnlineCMVN('utterance').transform(utterances[1])
+    np.testing.assert_allclose(per_utterance.mean(axis=0), 0, atol=1e-5)
+
+    sliding = OnlineCMVN('sliding', window=50)
+    features = np.vstack(utterances[:5])
+    offline = sliding.transform(features)
+    streamed = np.vstack([sliding.process(features[i:i + 7])
+                          for i in range(0, len(features), 7)])
+    np.testing.assert_allclose(streamed, offline, atol=1e-6)
+
+
+def test_import_does_not_load_librosa():
+    """测试导入特征模块和计算MFCC时不会导入 librosa"""
+    code = ("import sys, numpy as np, feature_extraction as fe; "
+            "fe.compute_mfcc(np.zeros(4096)); "
+            "assert 'librosa' not in sys.modules")
+    subprocess.run([sys.executable, '-c', code], check=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    """主测试函数"""
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✓ {name}")
+    print("🎉 所有测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+训练特征存储测试
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from feature_store import FeatureStore
+
+
+def test_build_groups_by_phoneme():
+    """测试交错输入时按音素重排，音素内保持原顺序，切片不复制数据"""
+    rng = np.random.default_rng(0)
+    samples = [(p, rng.standard_normal((int(rng.integers(3, 9)), 4)).astype(np.float32))
+               for p in ['b', 'a', 'b', 'c', 'a', 'b']]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeatureStore.build(os.path.join(tmp, 'store'), iter(samples))
+        assert store.phonemes == ['b', 'a', 'c'] and len(store) == 6
+        assert store.n_frames == sum(len(f) for _, f in samples)
+
+        for phoneme in store.phonemes:
+            expected = [f for p, f in samples if p == phoneme]
+            X, lengths = store.phoneme_slice(phoneme)
+            np.testing.assert_array_equal(X, np.vstack(expected))
+            assert list(lengths) == [len(f) for f in expected]
+            assert np.shares_memory(X, store.data)
+            for view, features in zip(store.utterances(phoneme), expected):
+                np.testing.assert_array_equal(view, features)
+
+        reopened = FeatureStore(os.path.join(tmp, 'store'))
+        assert isinstance(reopened.data, np.memmap) and not reopened.data.flags.writeable
+        np.testing.assert_array_equal(reopened.data, store.data)
+
+
+
+def test_normalize_without_global_stats():
+    """测试用按段归一化（没有全局统计量）原地标准化后，重新打开能恢复归一化方式"""
+    from feature_extraction import OnlineCMVN
+
+    rng = np.random.default_rng(1)
+    samples = [(p, rng.standard_normal((10, 3)).astype(np.float32) + 5) for p in 'aab']
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeatureStore.build(os.path.join(tmp, 'store'), iter(samples), writable=True)
+        store.normalize(OnlineCMVN('utterance'))
+        reopened = FeatureStore(os.path.join(tmp, 'store'))
+        assert reopened.normalization['mode'] == 'utterance'
+        assert reopened.normalization['mean'] is None
+        for view, (_, features) in zip(reopened.utterances('a'), samples):
+            np.testing.assert_allclose(view, OnlineCMVN('utterance').transform(features),
+                                       atol=1e-6)
+
+def main():
+    """主测试函数"""
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✓ {name}")
+    print("🎉 所有测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+延迟导入与无界面模式测试脚本
+"""
+
+import os
+import subprocess
+import sys
+
+# 无界面的批处理入口不应加载这些库
+HEAVY_MODULES = ('matplotlib', 'sounddevice', 'pyaudio', 'IPython', 'librosa', 'sklearn',
+                 'hmmlearn', 'torch', 'speechbrain', 'speech_recognition', 'vosk')
+
+
+def _run_headless(code):
+    """在开启无界面模式的子进程中执行代码"""
+    env = dict(os.environ, SPEECH_HEADLESS='1')
+    subprocess.run([sys.executable, '-c', code], check=True, env=env,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_entry_points_import_without_heavy_modules():
+    """测试导入各入口脚本时不会加载绘图、音频设备和建模库"""
+    code = (
+        "import sys, importlib.util\n"
+        "for path in ('02_mfcc.py', '03_gmm_hmm.py', 'audio_processing_demo.py',\n"
+        "             'realtime_audio_visualizer.py', 'asr01.py', 'asr02.py', 'asr03.py'):\n"
+        "    spec = importlib.util.spec_from_file_location(path[:-3].lstrip('0123456789_'), path)\n"
+        "    spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+        f"loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "assert not loaded, loaded\n"
+    )
+    _run_headless(code)
+
+
+def test_headless_skips_plotting():
+    """测试无界面模式下绘图直接跳过，设备访问给出明确错误"""
+    code = (
+        "import sys, importlib.util, numpy as np\n"
+        "spec = importlib.util.spec_from_file_location('mfcc', '02_mfcc.py')\n"
+        "module = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(module)\n"
+        "vp = module.VoicePreprocessing(sample_rate=16000)\n"
+        "vp.plot_waveform(np.zeros(1600, dtype=np.float32))\n"
+        "def record(self, duration=3, sample_rate=22050):\n"
+        "    self.audio_data = np.zeros(int(duration * self.sample_rate), dtype=np.float32)\n"
+        "    return self.audio_data\n"
+        "module.VoicePreprocessing.record_audio = record\n"
+        "module.compare_different_voices()\n"
+        "module.analyze_environment_noise()\n"
+        "import lazy_imports\n"
+        "for device in (lazy_imports.sounddevice, lazy_imports.pyaudio):\n"
+        "    try:\n"
+        "        device()\n"
+        "    except RuntimeError:\n"
+        "        pass\n"
+        "    else:\n"
+        "        raise AssertionError('无界面模式下不应加载音频设备库')\n"
+        "assert 'matplotlib' not in sys.modules\n"
+    )
+    _run_headless(code)
+
+
+def main():
+    """主测试函数"""
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✓ {name}")
+    print("🎉 所有测试通过!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+合成语料生成器测试
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+from synthetic_corpus import SyntheticCorpus
+
+
+class _MeanFeaturizer:
+    """把音频切成100点的帧取均值和能量作为特征"""
+
+    def extract_features_batch(self, audios, sr=22050):
+        features_list = []
+        for audio in audios:
+            frames = audio[:len(audio) // 100 * 100].reshape(-1, 100)
+            features_list.append(np.stack([frames.mean(axis=1), (frames ** 2).mean(axis=1)],
+                                          axis=1))
+        return features_list, np.array([len(f) for f in features_list])
+
+
+def test_generation_is_deterministic():
+    """测试结果只取决于参数和种子，与进程数、生成顺序无关，时长在截断范围内"""
+    kwargs = dict(units=4, utterances_per_unit=70, duration=0.3, duration_spread=0.5,
+                  min_duration=0.1, max_duration=0.6, snr_db=(10, 30), sample_rate=16000)
+    corpus = SyntheticCorpus(**kwargs)
+    serial = list(corpus.iter_units(n_workers=1))
+    parallel = list(SyntheticCorpus(**kwargs).iter_units(n_workers=2))
+    assert [unit for unit, _ in serial] == ['u000', 'u001', 'u002', 'u003']
+    for (_, audios), (_, other) in zip(serial, parallel):
+        assert len(audios) == 70
+        for audio, expected in zip(audios, other):
+            np.testing.assert_array_equal(audio, expected)
+    for audio, expected in zip(corpus.generate_unit(2), serial[2][1]):
+        np.testing.assert_array_equal(audio, expected)
+
+    lengths = np.array([len(a) for _, audios in serial for a in audios])
+    assert lengths.min() >= 1600 and lengths.max() <= 9600 and len(set(lengths)) > 50
+    assert all(a.dtype == np.float32 and np.abs(a).max() < 1.5
+               for _, audios in serial for a in audios)
+
+    other_seed = SyntheticCorpus(**dict(kwargs, seed=1)).generate_unit(0)
+    assert not np.array_equal(other_seed[0][:1000], serial[0][1][0][:1000])
+
+
+def test_write_wav_and_feature_store():
+    """测试写WAV文件（可跳过已存在的文件）和直接写入特征存储"""
+    corpus = SyntheticCorpus(units=['aa', 'iy'], utterances_per_unit=3, duration=0.2)
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = corpus.write_wav(tmp, n_workers=1)
+        assert stats['files'] == 6 and stats['written'] == 6
+        assert np.isclose(stats['audio_seconds'], 1.2)
+        audio, sr = sf.read(os.path.join(tmp, 'iy', 'iy_00002.wav'), dtype='float32')
+        assert sr == 22050
+        np.testing.assert_allclose(audio, corpus.generate_unit(1)[2], atol=1 / 32768)
+        assert corpus.write_wav(tmp, n_workers=1, overwrite=False)['written'] == 0
+        # 文件名模板：沿用已有目录的命名时，同名文件保留，不会多出另一套文件
+        short = os.path.join(tmp, 'short')
+        for written in (6, 0):
+            stats = corpus.write_wav(short, n_workers=1, overwrite=False,
+                                     name_format='{unit}_{index:02d}.wav')
+            assert stats['written'] == written
+        assert sorted(os.listdir(os.path.join(short, 'aa'))) == \
+            ['aa_00.wav', 'aa_01.wav', 'aa_02.wav']
+
+        store = corpus.build_feature_store(os.path.join(tmp, 'store'), _MeanFeaturizer(),
+                                           n_workers=1)
+        assert store.phonemes == ['aa', 'iy'] and len(store) == 6
+        expected, _ = _MeanFeaturizer().extract_features_batch(corpus.generate_unit(0))
+        np.testing.assert_allclose(store.phoneme_slice('aa')[0], np.vstack(expected),
+                                   rtol=1e-6)
+
+
+def main():
+    """主测试函数"""
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"✓ {name}")
+    print("🎉 所有测试通过!")
+
+
+if __name__ == "__main__":
+    main()